@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark the CPU cost of large message history calls per JSON backend.
+
+Serves pages of 1,000 synthetic messages from an in-process mock transport
+and times get_message_history(fetch_all=True) through the MCP tool layer.
+Each backend runs in its own process because the backend is chosen at import
+time from SENDBLUE_JSON_BACKEND.
+
+Usage:
+    python benchmarks/benchmark_json.py [--pages 5] [--rounds 5] [--backends stdlib,orjson]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PAGE_SIZE = 1000
+
+
+def make_page(page: int) -> bytes:
+    """Build one page of messages shaped like /accounts/messages output."""
+    messages = []
+    for i in range(page * PAGE_SIZE, (page + 1) * PAGE_SIZE):
+        contact = f"+1999{i % 50:07d}"
+        messages.append({
+            "accountEmail": "bench@example.com",
+            "content": f"Benchmark message {i} — see you at 5pm? \U0001F44D",
+            "is_outbound": i % 2 == 0,
+            "status": "DELIVERED",
+            "error_code": None,
+            "error_message": None,
+            "message_handle": str(uuid.uuid4()),
+            "date_sent": f"2024-01-{1 + i // 86400 % 28:02d}T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}.000Z",
+            "date_updated": "2024-02-01T00:00:00.000Z",
+            "from_number": "+15550000001",
+            "number": contact,
+            "to_number": contact,
+            "was_downgraded": None,
+            "plan": "dedicated",
+            "media_url": "",
+            "message_type": "message",
+            "group_id": "",
+            "participants": [],
+            "send_style": "",
+            "opted_out": False,
+            "error_detail": None,
+            "uuid": str(uuid.uuid4())
+        })
+    return json.dumps({"messages": messages}).encode("utf-8")
+
+
+async def run(pages: int, rounds: int) -> dict:
+    import httpx
+    from src import client
+    from src.json_backend import BACKEND
+    from src.main import mcp
+
+    bodies = [make_page(page) for page in range(pages)]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params.get("offset", 0)) // PAGE_SIZE
+        body = bodies[page] if page < pages else b'{"messages":[]}'
+        return httpx.Response(200, content=body, headers={"content-type": "application/json"})
+
+    await client.open_http_client(transport=httpx.MockTransport(handler))
+    try:
+        # Warm up imports and caches before timing
+        await mcp.call_tool("get_message_history", {"fetch_all": True})
+        samples = []
+        for _ in range(rounds):
+            started = time.process_time()
+            await mcp.call_tool("get_message_history", {"fetch_all": True})
+            samples.append(time.process_time() - started)
+    finally:
+        await client.close_http_client()
+    samples.sort()
+    return {
+        "backend": BACKEND,
+        "messages": pages * PAGE_SIZE,
+        "cpu_ms_median": round(samples[len(samples) // 2] * 1000, 1),
+        "cpu_ms_min": round(samples[0] * 1000, 1)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=5, help="History pages of 1,000 messages")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed calls per backend")
+    parser.add_argument("--backends", default="stdlib,orjson,msgspec", help="Comma-separated backends to compare")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(run(args.pages, args.rounds))))
+        return
+
+    env = dict(
+        os.environ,
+        SENDBLUE_API_KEY_ID=os.environ.get("SENDBLUE_API_KEY_ID", "benchmark"),
+        SENDBLUE_API_SECRET_KEY=os.environ.get("SENDBLUE_API_SECRET_KEY", "benchmark"),
+        SENDBLUE_DATA_DIR="",
+        SENDBLUE_RATE_LIMIT_ENABLED="false",
+        SENDBLUE_MIRROR_ENABLED="false"
+    )
+    results = []
+    for backend in args.backends.split(","):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker",
+             "--pages", str(args.pages), "--rounds", str(args.rounds)],
+            env=dict(env, SENDBLUE_JSON_BACKEND=backend.strip()),
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        if result["backend"] != backend.strip():
+            print(f"{backend}: not installed, skipped")
+            continue
+        results.append(result)
+
+    if not results:
+        return
+    baseline = results[0]["cpu_ms_median"]
+    print(f"get_message_history(fetch_all=True), {results[0]['messages']} messages, median of {args.rounds}")
+    for result in results:
+        print(
+            f"  {result['backend']:<8} {result['cpu_ms_median']:>8.1f} ms CPU"
+            f"  ({result['cpu_ms_median'] / baseline:.2f}x {results[0]['backend']})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Circuit breakers for Sendblue API requests.
+
+When Sendblue degrades, waiting out the full request timeout on every call
+ties up agents and worker slots. Each endpoint (and, for sends, each
+from_number line) has a breaker that watches the outcomes of recent
+requests:
+
+- closed: requests flow; if enough requests in the rolling window failed
+  (transport errors, 408 and 5xx) or were slow, the breaker opens.
+- open: requests fail immediately with a CIRCUIT_OPEN error until the open
+  period has passed.
+- half-open: a few probe requests are let through; if they all succeed the
+  breaker closes, if any fails it opens again.
+"""
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from src.config import (
+    SENDBLUE_CIRCUIT_ENABLED,
+    SENDBLUE_CIRCUIT_WINDOW,
+    SENDBLUE_CIRCUIT_MIN_REQUESTS,
+    SENDBLUE_CIRCUIT_FAILURE_RATE,
+    SENDBLUE_CIRCUIT_SLOW_CALL_SECONDS,
+    SENDBLUE_CIRCUIT_SLOW_CALL_RATE,
+    SENDBLUE_CIRCUIT_OPEN_SECONDS,
+    SENDBLUE_CIRCUIT_HALF_OPEN_PROBES,
+    SENDBLUE_LANE_ENDPOINTS
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_failure(status_code: Optional[int]) -> bool:
+    """Whether a request outcome counts against the circuit (None = no response)."""
+    return status_code is None or status_code == 408 or status_code >= 500
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of making a request while a circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open after repeated Sendblue failures; retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a rolling window of outcomes."""
+
+    def __init__(
+        self,
+        name: str,
+        window: float = SENDBLUE_CIRCUIT_WINDOW,
+        min_requests: int = SENDBLUE_CIRCUIT_MIN_REQUESTS,
+        failure_rate: float = SENDBLUE_CIRCUIT_FAILURE_RATE,
+        slow_call_seconds: float = SENDBLUE_CIRCUIT_SLOW_CALL_SECONDS,
+        slow_call_rate: float = SENDBLUE_CIRCUIT_SLOW_CALL_RATE,
+        open_seconds: float = SENDBLUE_CIRCUIT_OPEN_SECONDS,
+        half_open_probes: int = SENDBLUE_CIRCUIT_HALF_OPEN_PROBES
+    ):
+        self.name = name
+        self.window = window
+        self.min_requests = min_requests
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = max(1, half_open_probes)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._outcomes: Deque[Tuple[float, bool, bool]] = deque()
+        self._failed = 0
+        self._slow = 0
+        self._probes_in_flight = 0
+        self._probes_succeeded = 0
+
+    def _prune(self, now: float) -> None:
+        while self._outcomes and self._outcomes[0][0] <= now - self.window:
+            _, failed, slow = self._outcomes.popleft()
+            self._failed -= failed
+            self._slow -= slow
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through."""
+        return max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        """
+        Admit a request.
+
+        Returns:
+            bool: True if the request is a half-open probe
+
+        Raises:
+            CircuitOpenError: If the circuit is open or all probe slots are taken
+        """
+        if self.state == OPEN:
+            if self.retry_after() > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.retry_after())
+            self.state = HALF_OPEN
+            self._probes_in_flight = 0
+            self._probes_succeeded = 0
+        if self.state == HALF_OPEN:
+            if self._probes_in_flight + self._probes_succeeded >= self.half_open_probes:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, 1.0)
+            self._probes_in_flight += 1
+            return True
+        return False
+
+    def cancel(self, probe: bool) -> None:
+        """Give back an admission that did not lead to a request."""
+        if probe and self.state == HALF_OPEN:
+            self._probes_in_flight -= 1
+
+    def record(self, failed: bool, latency: Optional[float], probe: bool) -> None:
+        """Record the outcome of an admitted request."""
+        now = time.monotonic()
+        slow = latency is not None and latency >= self.slow_call_seconds
+        if probe and self.state == HALF_OPEN:
+            self._probes_in_flight -= 1
+            if failed or slow:
+                self._open(now)
+            else:
+                self._probes_succeeded += 1
+                if self._probes_succeeded >= self.half_open_probes:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                    self._failed = self._slow = 0
+            return
+
+        self._outcomes.append((now, failed, slow))
+        self._failed += failed
+        self._slow += slow
+        self._prune(now)
+        if self.state != CLOSED or len(self._outcomes) < self.min_requests:
+            return
+        total = len(self._outcomes)
+        if self._failed / total >= self.failure_rate or self._slow / total >= self.slow_call_rate:
+            self._open(now)
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self.opened_at = now
+        self.times_opened += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the breaker state for monitoring."""
+        self._prune(time.monotonic())
+        total = len(self._outcomes)
+        result = {
+            "state": self.state,
+            "window_requests": total,
+            "failure_rate": round(self._failed / total, 3) if total else 0.0,
+            "slow_call_rate": round(self._slow / total, 3) if total else 0.0,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected
+        }
+        if self.state == OPEN:
+            result["retry_after_seconds"] = round(self.retry_after(), 3)
+        return result
+
+
+class CircuitBreakerRegistry:
+    """Breakers per endpoint, plus one per from_number line for sends."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str) -> CircuitBreaker:
+        """Return (creating on first use) a breaker by name."""
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name)
+            self._breakers[name] = breaker
+        return breaker
+
+    def is_open(self, name: str) -> bool:
+        """Whether a breaker exists and is currently rejecting requests."""
+        breaker = self._breakers.get(name)
+        return breaker is not None and breaker.state == OPEN and breaker.retry_after() > 0
+
+    def for_request(self, endpoint: str, data: Optional[Dict[str, Any]] = None) -> List[CircuitBreaker]:
+        """Return the breakers a request must pass."""
+        if not self.enabled:
+            return []
+        name = endpoint.split("?", 1)[0].strip("/")
+        breakers = [self.get(name)]
+        if name in SENDBLUE_LANE_ENDPOINTS and data and data.get("from_number"):
+            breakers.append(self.get(f"line:{data['from_number']}"))
+        return breakers
+
+    def admit(self, breakers: List[CircuitBreaker]) -> List[bool]:
+        """
+        Admit a request through every breaker, or through none of them.
+
+        Returns:
+            List[bool]: Whether the request is a probe, per breaker
+
+        Raises:
+            CircuitOpenError: If any breaker rejects the request
+        """
+        probes: List[bool] = []
+        try:
+            for breaker in breakers:
+                probes.append(breaker.allow())
+        except CircuitOpenError:
+            for breaker, probe in zip(breakers, probes):
+                breaker.cancel(probe)
+            raise
+        return probes
+
+    def reset(self) -> None:
+        """Drop all breaker state; called on shutdown and between tests."""
+        self._breakers.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the state of every breaker that has seen traffic."""
+        return {
+            "enabled": self.enabled,
+            "circuits": {name: breaker.snapshot() for name, breaker in self._breakers.items()}
+        }
+
+
+# Process-wide registry used by the API client
+circuit_breakers = CircuitBreakerRegistry(enabled=SENDBLUE_CIRCUIT_ENABLED)
@@ -1,71 +1,387 @@
 """
 HTTP client module for making requests to the Sendblue API.
 Provides a configured client with auth headers and error handling.
+
+A single pooled httpx.AsyncClient is shared by every tool call so that
+connections (TCP, TLS and DNS) are reused between requests. The server opens
+it on startup and closes it on shutdown; if a request is made without the
+server lifecycle (scripts, tests) the client is created lazily.
+
+Every request also passes through the per-endpoint adaptive rate limiter in
+src.ratelimit, fails fast while its circuit breaker (src.circuit) is open,
+and is retried according to src.retry. Bodies are encoded and responses
+decoded with the JSON backend from src.json_backend. Sends are first queued
+in the lane of their from_number (src.lanes) so busy lines cannot starve
+the others. Slow attempts on read-only GET endpoints may be hedged with a
+duplicate request (src.hedging).
 """
+import asyncio
+import logging
+import time
 import httpx
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
 from src.config import SENDBLUE_API_KEY_ID, SENDBLUE_API_SECRET_KEY
 from src.config import SENDBLUE_API_BASE_URL, SENDBLUE_ACCOUNTS_BASE_URL
+from src.config import (
+    SENDBLUE_HTTP_TIMEOUT,
+    SENDBLUE_HTTP_MAX_CONNECTIONS,
+    SENDBLUE_HTTP_MAX_KEEPALIVE,
+    SENDBLUE_HTTP_KEEPALIVE_EXPIRY,
+    SENDBLUE_HTTP2
+)
+from src.circuit import circuit_breakers, is_failure, CircuitBreaker, CircuitOpenError
+from src.hedging import request_hedgers
+from src.json_backend import loads, dumps_bytes
+from src.lanes import send_lanes
+from src.ratelimit import rate_limiters, parse_retry_after
+from src.retry import (
+    RetryPolicy,
+    default_retry_policy,
+    is_idempotent,
+    is_retryable_exception,
+    is_retryable_status
+)
+
+logger = logging.getLogger("sendblue-mcp")
+
+# Process-wide client shared by all tool calls
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    """Check whether the optional h2 package needed for HTTP/2 is installed."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_http_client(
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    http2: Optional[bool] = None
+) -> httpx.AsyncClient:
+    """
+    Build a pooled AsyncClient configured from the server settings.
+
+    Args:
+        transport (Optional[httpx.AsyncBaseTransport]): Custom transport, e.g.
+            httpx.MockTransport for tests and benchmarks
+        http2 (Optional[bool]): Override the SENDBLUE_HTTP2 setting
+
+    Returns:
+        httpx.AsyncClient: A new client; the caller owns closing it
+    """
+    use_http2 = SENDBLUE_HTTP2 if http2 is None else http2
+    if use_http2 and transport is None and not _http2_available():
+        logger.warning("HTTP/2 requested but the 'h2' package is not installed - falling back to HTTP/1.1")
+        use_http2 = False
+
+    limits = httpx.Limits(
+        max_connections=SENDBLUE_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=SENDBLUE_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=SENDBLUE_HTTP_KEEPALIVE_EXPIRY
+    )
+
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=SENDBLUE_HTTP_TIMEOUT,
+        http2=use_http2,
+        transport=transport
+    )
+
+
+async def open_http_client(
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    http2: Optional[bool] = None
+) -> httpx.AsyncClient:
+    """
+    Open the shared client, replacing (and closing) any existing one.
+
+    Args:
+        transport (Optional[httpx.AsyncBaseTransport]): Custom transport to inject
+        http2 (Optional[bool]): Override the SENDBLUE_HTTP2 setting
+
+    Returns:
+        httpx.AsyncClient: The shared client
+    """
+    global _http_client
+    await close_http_client()
+    _http_client = create_http_client(transport=transport, http2=http2)
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared client and release its pooled connections."""
+    global _http_client
+    client, _http_client = _http_client, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared client, creating it on first use.
+
+    Returns:
+        httpx.AsyncClient: The shared client
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
+
+
+class SendblueAPIError(httpx.HTTPError):
+    """A failed Sendblue API request, with the details callers need to react to it."""
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None,
+        retryable: bool = False,
+        error_code: Optional[str] = None
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.retryable = retryable
+        self.error_code = error_code
+        self.attempts = 1
+        self.retry_wait = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the error as a tool result."""
+        result = {
+            "status": "ERROR",
+            "error_message": str(self),
+            "retryable": self.retryable,
+            "retry_info": {
+                "attempts": self.attempts,
+                "retries": self.attempts - 1,
+                "retry_wait_seconds": round(self.retry_wait, 3)
+            }
+        }
+        if self.error_code is not None:
+            result["error_code"] = self.error_code
+        if self.status_code is not None:
+            result["status_code"] = self.status_code
+        if self.retry_after is not None:
+            result["retry_after_seconds"] = round(self.retry_after, 3)
+        return result
+
+
+def _build_url(endpoint: str) -> str:
+    """Resolve an endpoint against the API or accounts base URL."""
+    # Determine if this is an accounts endpoint or regular API endpoint
+    if endpoint.startswith("/accounts"):
+        return f"{SENDBLUE_ACCOUNTS_BASE_URL}{endpoint[9:]}"  # Remove /accounts prefix
+    return f"{SENDBLUE_API_BASE_URL}{endpoint}"
+
+
+def _error_message(response: httpx.Response, retry_after: Optional[float]) -> str:
+    """Build a readable error message from a failed Sendblue response."""
+    # Try to extract error information from the response if possible
+    try:
+        error_detail = loads(response.content)
+        if not isinstance(error_detail, dict):
+            error_detail = {}
+    except ValueError:
+        error_detail = {}
+
+    detail = error_detail.get("error_message") or error_detail.get("message") or response.reason_phrase
+    error_message = f"Sendblue API error: {response.status_code} - {detail}"
+    if retry_after is not None:
+        error_message += f" (retry after {retry_after:.1f}s)"
+    return error_message
+
+
+async def _send_once(
+    endpoint: str,
+    method: str,
+    url: str,
+    headers: Dict[str, str],
+    data: Optional[Dict[str, Any]],
+    params: Optional[Dict[str, Any]],
+    timeout: float,
+    on_sent: Optional[Callable[[], None]] = None
+) -> Tuple[httpx.Response, float]:
+    """
+    Make a single attempt while holding a slot in the sending line's lane and the endpoint's rate budget.
+
+    on_sent, if given, is called once both slots are held and the request is
+    about to be sent (the hedger starts its clock there).
+
+    Returns:
+        Tuple[httpx.Response, float]: The response and the time spent on the
+        HTTP request itself, excluding time queued for a slot
+    """
+    client = get_http_client()
+    async with send_lanes.slot(endpoint, data), rate_limiters.slot(endpoint) as slot:
+        if on_sent is not None:
+            on_sent()
+        started = time.monotonic()
+        if method == "GET":
+            response = await client.get(url, headers=headers, params=params, timeout=timeout)
+        else:
+            body = dumps_bytes(data) if data is not None else None
+            response = await client.post(url, headers=headers, content=body, timeout=timeout)
+        latency = time.monotonic() - started
+        slot.record(response.status_code, parse_retry_after(response.headers.get("Retry-After")))
+    return response, latency
+
 
 async def make_sendblue_api_request(
-    endpoint: str, 
-    method: str = "GET", 
+    endpoint: str,
+    method: str = "GET",
     data: Optional[Dict[str, Any]] = None,
-    params: Optional[Dict[str, Any]] = None
+    params: Optional[Dict[str, Any]] = None,
+    stats: Optional[Dict[str, Any]] = None,
+    retry_policy: Optional[RetryPolicy] = None
 ) -> Dict[str, Any]:
     """
     Make a request to the Sendblue API with proper error handling.
-    
+
+    Transient failures are retried with jittered exponential backoff when it
+    is safe to do so (see src.retry), within the policy's total deadline.
+    While a circuit breaker for the endpoint (or sending line) is open the
+    request fails immediately with error_code CIRCUIT_OPEN. When hedging is
+    enabled, slow GETs to the hedged endpoints are duplicated and the first
+    response is used.
+
     Args:
         endpoint (str): The API endpoint (without the base URL)
         method (str): HTTP method (GET or POST)
         data (Optional[Dict[str, Any]]): JSON payload for POST requests
         params (Optional[Dict[str, Any]]): Query parameters for GET requests
-        
+        stats (Optional[Dict[str, Any]]): If given, filled with the number of
+            attempts and the time spent waiting between retries
+        retry_policy (Optional[RetryPolicy]): Override the default retry policy
+
     Returns:
         Dict[str, Any]: The JSON response from the API
-        
+
     Raises:
-        httpx.HTTPError: If the request fails
+        SendblueAPIError: If the request fails (a subclass of httpx.HTTPError)
     """
-    # Determine if this is an accounts endpoint or regular API endpoint
-    if endpoint.startswith("/accounts"):
-        url = f"{SENDBLUE_ACCOUNTS_BASE_URL}{endpoint[9:]}"  # Remove /accounts prefix
-    else:
-        url = f"{SENDBLUE_API_BASE_URL}{endpoint}"
-    
+    method = method.upper()
+    if method not in ("GET", "POST"):
+        raise SendblueAPIError(f"Error communicating with Sendblue API: Unsupported HTTP method: {method}")
+
+    url = _build_url(endpoint)
     headers = {
         "sb-api-key-id": SENDBLUE_API_KEY_ID,
         "sb-api-secret-key": SENDBLUE_API_SECRET_KEY,
         "Content-Type": "application/json"
     }
-    
-    async with httpx.AsyncClient() as client:
+
+    policy = retry_policy or default_retry_policy
+    idempotent = is_idempotent(method, endpoint)
+    started = time.monotonic()
+    deadline = started + policy.deadline
+    attempt = 0
+    retry_wait = 0.0
+    breakers = circuit_breakers.for_request(endpoint, data)
+    hedger = request_hedgers.for_request(method, endpoint)
+
+    while True:
+        attempt += 1
+        timeout = max(0.001, min(SENDBLUE_HTTP_TIMEOUT, deadline - time.monotonic()))
+        try:
+            probes = circuit_breakers.admit(breakers)
+        except CircuitOpenError as e:
+            # Fail fast; the request was never sent, so callers may retry later
+            error = SendblueAPIError(str(e), retry_after=e.retry_after, retryable=True, error_code="CIRCUIT_OPEN")
+            error.attempts = attempt
+            error.retry_wait = retry_wait
+            _record_stats(stats, attempt, retry_wait, started)
+            raise error from e
         try:
-            if method.upper() == "GET":
-                response = await client.get(url, headers=headers, params=params, timeout=30.0)
-            elif method.upper() == "POST":
-                response = await client.post(url, headers=headers, json=data, timeout=30.0)
+            if hedger is not None:
+                response, latency = await hedger.send(
+                    lambda attempt_timeout, on_sent: _send_once(
+                        endpoint, method, url, headers, data, params, attempt_timeout, on_sent
+                    ),
+                    timeout
+                )
             else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-            
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            # Try to extract error information from the response if possible
-            error_detail = {}
-            try:
-                error_detail = e.response.json()
-            except:
-                error_detail = {"error": str(e)}
-            
-            error_message = (
-                f"Sendblue API error: {e.response.status_code} - "
-                f"{error_detail.get('error_message', str(e))}"
+                response, latency = await _send_once(endpoint, method, url, headers, data, params, timeout)
+        except httpx.TransportError as e:
+            _record_outcome(breakers, probes, None, None)
+            error = SendblueAPIError(
+                f"Error communicating with Sendblue API: {str(e) or type(e).__name__}",
+                retryable=is_retryable_exception(e, idempotent)
             )
-            
-            # Re-raise with more information
-            raise httpx.HTTPError(error_message) from e
+            error.__cause__ = e
         except Exception as e:
-            raise httpx.HTTPError(f"Error communicating with Sendblue API: {str(e)}")
\ No newline at end of file
+            # Not a Sendblue outcome (e.g. missing credentials in the headers)
+            for breaker, probe in zip(breakers, probes):
+                breaker.cancel(probe)
+            error = SendblueAPIError(f"Error communicating with Sendblue API: {str(e) or type(e).__name__}")
+            error.attempts = attempt
+            error.retry_wait = retry_wait
+            _record_stats(stats, attempt, retry_wait, started)
+            raise error from e
+        except BaseException:
+            for breaker, probe in zip(breakers, probes):
+                breaker.cancel(probe)
+            raise
+        else:
+            _record_outcome(breakers, probes, response.status_code, latency)
+            if response.is_success:
+                _record_stats(stats, attempt, retry_wait, started)
+                try:
+                    return loads(response.content)
+                except ValueError as e:
+                    raise SendblueAPIError(f"Error communicating with Sendblue API: invalid JSON response ({e})") from e
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            error = SendblueAPIError(
+                _error_message(response, retry_after),
+                status_code=response.status_code,
+                retry_after=retry_after,
+                retryable=is_retryable_status(response.status_code, idempotent)
+            )
+
+        if error.retryable and attempt < policy.max_attempts:
+            delay = policy.backoff(attempt, error.retry_after)
+            if time.monotonic() + delay < deadline:
+                logger.info(f"Retrying {method} {endpoint} in {delay:.2f}s (attempt {attempt} failed: {error})")
+                await asyncio.sleep(delay)
+                retry_wait += delay
+                continue
+
+        error.attempts = attempt
+        error.retry_wait = retry_wait
+        _record_stats(stats, attempt, retry_wait, started)
+        raise error
+
+
+def _record_outcome(
+    breakers: List[CircuitBreaker],
+    probes: List[bool],
+    status_code: Optional[int],
+    latency: Optional[float]
+) -> None:
+    """Report an attempt's outcome to the circuit breakers it passed."""
+    failed = is_failure(status_code)
+    for breaker, probe in zip(breakers, probes):
+        breaker.record(failed, latency, probe)
+
+
+def _record_stats(
+    stats: Optional[Dict[str, Any]],
+    attempts: int,
+    retry_wait: float,
+    started: float
+) -> None:
+    """Fill the caller's stats dictionary, if one was given."""
+    if stats is None:
+        return
+    stats.update({
+        "attempts": attempts,
+        "retries": attempts - 1,
+        "retry_wait_seconds": round(retry_wait, 3),
+        "elapsed_seconds": round(time.monotonic() - started, 3)
+    })
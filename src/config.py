@@ -20,6 +20,168 @@ MCP_HTTP_PORT = int(os.environ.get("MCP_HTTP_PORT", 5000))
 SENDBLUE_API_BASE_URL = "https://api.sendblue.co/api"
 SENDBLUE_ACCOUNTS_BASE_URL = "https://api.sendblue.co/accounts"
 
+# Shared HTTP client settings (connection pool and protocol)
+SENDBLUE_HTTP_TIMEOUT = float(os.environ.get("SENDBLUE_HTTP_TIMEOUT", 30.0))
+SENDBLUE_HTTP_MAX_CONNECTIONS = int(os.environ.get("SENDBLUE_HTTP_MAX_CONNECTIONS", 100))
+SENDBLUE_HTTP_MAX_KEEPALIVE = int(os.environ.get("SENDBLUE_HTTP_MAX_KEEPALIVE", 20))
+SENDBLUE_HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("SENDBLUE_HTTP_KEEPALIVE_EXPIRY", 30.0))
+SENDBLUE_HTTP2 = os.environ.get("SENDBLUE_HTTP2", "false").lower() in ("1", "true", "yes")
+
+# JSON backend: "auto" (orjson, then msgspec, then stdlib), "orjson", "msgspec" or "stdlib"
+SENDBLUE_JSON_BACKEND = os.environ.get("SENDBLUE_JSON_BACKEND", "auto").lower()
+
+# Outbound rate limiting (requests per second per endpoint budget)
+SENDBLUE_RATE_LIMIT_ENABLED = os.environ.get("SENDBLUE_RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+SENDBLUE_RATE_LIMITS = {
+    "send-message": float(os.environ.get("SENDBLUE_RATE_SEND_MESSAGE", 10)),
+    "send-group-message": float(os.environ.get("SENDBLUE_RATE_SEND_GROUP_MESSAGE", 5)),
+    "evaluate-service": float(os.environ.get("SENDBLUE_RATE_EVALUATE_SERVICE", 10)),
+    "accounts/messages": float(os.environ.get("SENDBLUE_RATE_ACCOUNTS_MESSAGES", 5)),
+    "send-typing-indicator": float(os.environ.get("SENDBLUE_RATE_TYPING_INDICATOR", 5)),
+    "default": float(os.environ.get("SENDBLUE_RATE_DEFAULT", 10))
+}
+SENDBLUE_RATE_MAX_CONCURRENCY = int(os.environ.get("SENDBLUE_RATE_MAX_CONCURRENCY", 20))
+SENDBLUE_RATE_MIN_CONCURRENCY = int(os.environ.get("SENDBLUE_RATE_MIN_CONCURRENCY", 1))
+
+# Per-line send lanes (sends are queued per from_number and served
+# weighted round-robin); weights are "+15551234567=2,+15557654321=1"
+SENDBLUE_LANES_ENABLED = os.environ.get("SENDBLUE_LANES_ENABLED", "true").lower() in ("1", "true", "yes")
+SENDBLUE_LANE_ENDPOINTS = ["send-message", "send-group-message"]
+SENDBLUE_LANE_RATE = float(os.environ.get("SENDBLUE_LANE_RATE", 10))
+SENDBLUE_LANE_CONCURRENCY = int(os.environ.get("SENDBLUE_LANE_CONCURRENCY", 10))
+SENDBLUE_LANE_TOTAL_CONCURRENCY = int(os.environ.get("SENDBLUE_LANE_TOTAL_CONCURRENCY", SENDBLUE_RATE_MAX_CONCURRENCY))
+SENDBLUE_LANE_WEIGHTS = {
+    number.strip(): int(weight)
+    for number, _, weight in (item.partition("=") for item in os.environ.get("SENDBLUE_LANE_WEIGHTS", "").split(","))
+    if number.strip() and weight.strip()
+}
+
+# Sender pool for sends without a from_number (comma-separated E.164 lines);
+# recipients are mapped to lines with a consistent-hash ring
+SENDBLUE_SENDER_POOL = [n.strip() for n in os.environ.get("SENDBLUE_SENDER_POOL", "").split(",") if n.strip()]
+SENDBLUE_SENDER_POOL_VNODES = int(os.environ.get("SENDBLUE_SENDER_POOL_VNODES", 160))
+SENDBLUE_SENDER_POOL_FAILOVER = int(os.environ.get("SENDBLUE_SENDER_POOL_FAILOVER", 2))
+SENDBLUE_SENDER_POOL_COOLDOWN = float(os.environ.get("SENDBLUE_SENDER_POOL_COOLDOWN", 60.0))
+SENDBLUE_SENDER_POOL_MAX_DEPTH = int(os.environ.get("SENDBLUE_SENDER_POOL_MAX_DEPTH", 100))
+
+# Typing indicator debouncing (seconds): calls within the window share one
+# request, and an active indicator is re-sent every refresh interval until no
+# call was seen for the active period
+SENDBLUE_TYPING_DEBOUNCE_ENABLED = os.environ.get("SENDBLUE_TYPING_DEBOUNCE_ENABLED", "true").lower() in ("1", "true", "yes")
+SENDBLUE_TYPING_DEBOUNCE_WINDOW = float(os.environ.get("SENDBLUE_TYPING_DEBOUNCE_WINDOW", 5.0))
+SENDBLUE_TYPING_REFRESH_INTERVAL = float(os.environ.get("SENDBLUE_TYPING_REFRESH_INTERVAL", 5.0))
+SENDBLUE_TYPING_ACTIVE_FOR = float(os.environ.get("SENDBLUE_TYPING_ACTIVE_FOR", 15.0))
+SENDBLUE_TYPING_SUPPRESS_AFTER_SEND = float(os.environ.get("SENDBLUE_TYPING_SUPPRESS_AFTER_SEND", 3.0))
+
+# Circuit breakers (per endpoint and per sending line); rates are fractions
+# of the requests in the rolling window, times are in seconds
+SENDBLUE_CIRCUIT_ENABLED = os.environ.get("SENDBLUE_CIRCUIT_ENABLED", "true").lower() in ("1", "true", "yes")
+SENDBLUE_CIRCUIT_WINDOW = float(os.environ.get("SENDBLUE_CIRCUIT_WINDOW", 30.0))
+SENDBLUE_CIRCUIT_MIN_REQUESTS = int(os.environ.get("SENDBLUE_CIRCUIT_MIN_REQUESTS", 10))
+SENDBLUE_CIRCUIT_FAILURE_RATE = float(os.environ.get("SENDBLUE_CIRCUIT_FAILURE_RATE", 0.5))
+SENDBLUE_CIRCUIT_SLOW_CALL_SECONDS = float(os.environ.get("SENDBLUE_CIRCUIT_SLOW_CALL_SECONDS", 10.0))
+SENDBLUE_CIRCUIT_SLOW_CALL_RATE = float(os.environ.get("SENDBLUE_CIRCUIT_SLOW_CALL_RATE", 0.8))
+SENDBLUE_CIRCUIT_OPEN_SECONDS = float(os.environ.get("SENDBLUE_CIRCUIT_OPEN_SECONDS", 30.0))
+SENDBLUE_CIRCUIT_HALF_OPEN_PROBES = int(os.environ.get("SENDBLUE_CIRCUIT_HALF_OPEN_PROBES", 2))
+
+# Hedged requests for read-only GETs: if a request has not answered within
+# the given percentile of recent latency, a duplicate is sent and the first
+# response wins; the budget is the fraction of extra requests allowed
+SENDBLUE_HEDGE_ENABLED = os.environ.get("SENDBLUE_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+SENDBLUE_HEDGE_ENDPOINTS = ["evaluate-service", "accounts/messages"]
+SENDBLUE_HEDGE_PERCENTILE = float(os.environ.get("SENDBLUE_HEDGE_PERCENTILE", 0.95))
+SENDBLUE_HEDGE_MIN_DELAY = float(os.environ.get("SENDBLUE_HEDGE_MIN_DELAY", 0.05))
+SENDBLUE_HEDGE_MIN_SAMPLES = int(os.environ.get("SENDBLUE_HEDGE_MIN_SAMPLES", 20))
+SENDBLUE_HEDGE_BUDGET = float(os.environ.get("SENDBLUE_HEDGE_BUDGET", 0.05))
+
+# Retry settings
+SENDBLUE_RETRY_MAX_ATTEMPTS = int(os.environ.get("SENDBLUE_RETRY_MAX_ATTEMPTS", 4))
+SENDBLUE_RETRY_BASE_DELAY = float(os.environ.get("SENDBLUE_RETRY_BASE_DELAY", 0.25))
+SENDBLUE_RETRY_MAX_DELAY = float(os.environ.get("SENDBLUE_RETRY_MAX_DELAY", 8.0))
+SENDBLUE_RETRY_DEADLINE = float(os.environ.get("SENDBLUE_RETRY_DEADLINE", 60.0))
+
+# Local storage for caches and persistent state (unset or "" keeps everything in memory)
+SENDBLUE_DATA_DIR = os.path.expanduser(os.environ.get("SENDBLUE_DATA_DIR", ""))
+
+# Number lookup cache settings (TTLs in seconds)
+SENDBLUE_LOOKUP_CACHE_ENABLED = os.environ.get("SENDBLUE_LOOKUP_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+SENDBLUE_LOOKUP_CACHE_SIZE = int(os.environ.get("SENDBLUE_LOOKUP_CACHE_SIZE", 50000))
+SENDBLUE_LOOKUP_CACHE_TTL = float(os.environ.get("SENDBLUE_LOOKUP_CACHE_TTL", 7 * 24 * 3600))
+SENDBLUE_LOOKUP_CACHE_NEGATIVE_TTL = float(os.environ.get("SENDBLUE_LOOKUP_CACHE_NEGATIVE_TTL", 3600))
+
+# Batch number lookup settings
+SENDBLUE_LOOKUP_BATCH_CONCURRENCY = int(os.environ.get("SENDBLUE_LOOKUP_BATCH_CONCURRENCY", 20))
+SENDBLUE_LOOKUP_BATCH_MAX_NUMBERS = int(os.environ.get("SENDBLUE_LOOKUP_BATCH_MAX_NUMBERS", 100000))
+
+# Message history pagination (fetch_all mode)
+SENDBLUE_HISTORY_PAGE_SIZE = int(os.environ.get("SENDBLUE_HISTORY_PAGE_SIZE", 1000))
+SENDBLUE_HISTORY_CONCURRENCY = int(os.environ.get("SENDBLUE_HISTORY_CONCURRENCY", 4))
+SENDBLUE_HISTORY_MAX_MESSAGES = int(os.environ.get("SENDBLUE_HISTORY_MAX_MESSAGES", 100000))
+SENDBLUE_HISTORY_TIME_BUDGET = float(os.environ.get("SENDBLUE_HISTORY_TIME_BUDGET", 60.0))
+SENDBLUE_HISTORY_MAX_CONTENT_CHARS = int(os.environ.get("SENDBLUE_HISTORY_MAX_CONTENT_CHARS", 500))
+
+# Local message history mirror (ages in seconds)
+SENDBLUE_MIRROR_ENABLED = os.environ.get("SENDBLUE_MIRROR_ENABLED", "false").lower() in ("1", "true", "yes")
+SENDBLUE_MIRROR_MAX_AGE = float(os.environ.get("SENDBLUE_MIRROR_MAX_AGE", 60.0))
+SENDBLUE_MIRROR_OVERLAP = float(os.environ.get("SENDBLUE_MIRROR_OVERLAP", 300.0))
+SENDBLUE_MIRROR_SYNC_MAX_MESSAGES = int(os.environ.get("SENDBLUE_MIRROR_SYNC_MAX_MESSAGES", 100000))
+
+# In-memory conversation index (list_conversations / get_conversation)
+SENDBLUE_CONVERSATIONS_ENABLED = os.environ.get("SENDBLUE_CONVERSATIONS_ENABLED", "true").lower() in ("1", "true", "yes")
+SENDBLUE_CONVERSATIONS_MAX_THREADS = int(os.environ.get("SENDBLUE_CONVERSATIONS_MAX_THREADS", 10000))
+SENDBLUE_CONVERSATIONS_MAX_MESSAGES = int(os.environ.get("SENDBLUE_CONVERSATIONS_MAX_MESSAGES", 1000))
+
+# Local full-text search index (search_messages)
+SENDBLUE_SEARCH_ENABLED = os.environ.get("SENDBLUE_SEARCH_ENABLED", "true").lower() in ("1", "true", "yes")
+SENDBLUE_SEARCH_MAX_RESULTS = int(os.environ.get("SENDBLUE_SEARCH_MAX_RESULTS", 200))
+
+# Registry of group chats by member set (send_group_message reuses known groups)
+SENDBLUE_GROUP_REGISTRY_ENABLED = os.environ.get("SENDBLUE_GROUP_REGISTRY_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# add_recipients_to_group: modify-group requests in flight at once
+SENDBLUE_GROUP_ADD_CONCURRENCY = int(os.environ.get("SENDBLUE_GROUP_ADD_CONCURRENCY", 5))
+
+# Webhook receiver settings (inbound messages for wait_for_reply)
+SENDBLUE_WEBHOOK_ENABLED = os.environ.get("SENDBLUE_WEBHOOK_ENABLED", "false").lower() in ("1", "true", "yes")
+SENDBLUE_WEBHOOK_HOST = os.environ.get("SENDBLUE_WEBHOOK_HOST", "127.0.0.1")
+SENDBLUE_WEBHOOK_PORT = int(os.environ.get("SENDBLUE_WEBHOOK_PORT", 8787))
+SENDBLUE_WEBHOOK_PATH = os.environ.get("SENDBLUE_WEBHOOK_PATH", "/webhooks/inbound")
+SENDBLUE_WEBHOOK_SECRET = os.environ.get("SENDBLUE_WEBHOOK_SECRET")
+SENDBLUE_INBOUND_BUFFER_SIZE = int(os.environ.get("SENDBLUE_INBOUND_BUFFER_SIZE", 10000))
+SENDBLUE_WAIT_FOR_REPLY_MAX_TIMEOUT = float(os.environ.get("SENDBLUE_WAIT_FOR_REPLY_MAX_TIMEOUT", 600.0))
+
+# Status callbacks (delivery tracking); the public URL is the externally
+# reachable base of the webhook receiver, e.g. https://example.ngrok.app
+SENDBLUE_WEBHOOK_PUBLIC_URL = os.environ.get("SENDBLUE_WEBHOOK_PUBLIC_URL")
+SENDBLUE_WEBHOOK_STATUS_PATH = os.environ.get("SENDBLUE_WEBHOOK_STATUS_PATH", "/webhooks/status")
+SENDBLUE_DELIVERY_TRACKER_SIZE = int(os.environ.get("SENDBLUE_DELIVERY_TRACKER_SIZE", 100000))
+SENDBLUE_AWAIT_DELIVERY_MAX_TIMEOUT = float(os.environ.get("SENDBLUE_AWAIT_DELIVERY_MAX_TIMEOUT", 600.0))
+SENDBLUE_AWAIT_DELIVERY_MAX_HANDLES = int(os.environ.get("SENDBLUE_AWAIT_DELIVERY_MAX_HANDLES", 10000))
+
+# Media upload cache (ages in seconds); revalidation is "none", "etag" or "hash"
+SENDBLUE_MEDIA_CACHE_ENABLED = os.environ.get("SENDBLUE_MEDIA_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+SENDBLUE_MEDIA_CACHE_TTL = float(os.environ.get("SENDBLUE_MEDIA_CACHE_TTL", 30 * 24 * 3600))
+SENDBLUE_MEDIA_CACHE_REVALIDATE = os.environ.get("SENDBLUE_MEDIA_CACHE_REVALIDATE", "none").lower()
+SENDBLUE_MEDIA_CACHE_REVALIDATE_AFTER = float(os.environ.get("SENDBLUE_MEDIA_CACHE_REVALIDATE_AFTER", 3600.0))
+SENDBLUE_MEDIA_CACHE_SWAP_SENDS = os.environ.get("SENDBLUE_MEDIA_CACHE_SWAP_SENDS", "false").lower() in ("1", "true", "yes")
+SENDBLUE_MEDIA_MAX_BYTES = int(os.environ.get("SENDBLUE_MEDIA_MAX_BYTES", 5 * 1024 * 1024))
+
+# Durable send queue (enqueue mode of the send tools)
+SENDBLUE_QUEUE_ENABLED = os.environ.get("SENDBLUE_QUEUE_ENABLED", "false").lower() in ("1", "true", "yes")
+SENDBLUE_QUEUE_WORKERS = int(os.environ.get("SENDBLUE_QUEUE_WORKERS", 8))
+SENDBLUE_QUEUE_POLL_INTERVAL = float(os.environ.get("SENDBLUE_QUEUE_POLL_INTERVAL", 1.0))
+SENDBLUE_QUEUE_SHUTDOWN_GRACE = float(os.environ.get("SENDBLUE_QUEUE_SHUTDOWN_GRACE", 10.0))
+
+# Scheduled sends (released into the send queue)
+SENDBLUE_SCHEDULER_BATCH_SIZE = int(os.environ.get("SENDBLUE_SCHEDULER_BATCH_SIZE", 100))
+SENDBLUE_SCHEDULER_RELEASE_RATE = float(os.environ.get("SENDBLUE_SCHEDULER_RELEASE_RATE", 50.0))
+SENDBLUE_SCHEDULER_MAX_HORIZON = float(os.environ.get("SENDBLUE_SCHEDULER_MAX_HORIZON", 365 * 24 * 3600))
+
+# Bulk send settings
+SENDBLUE_BULK_CONCURRENCY = int(os.environ.get("SENDBLUE_BULK_CONCURRENCY", 10))
+SENDBLUE_BULK_MAX_CONCURRENCY = int(os.environ.get("SENDBLUE_BULK_MAX_CONCURRENCY", 100))
+SENDBLUE_BULK_MAX_MESSAGES = int(os.environ.get("SENDBLUE_BULK_MAX_MESSAGES", 5000))
+
 # Dictionary of valid send styles for expressive messages
 VALID_SEND_STYLES = {
     "celebration",
@@ -0,0 +1,299 @@
+"""
+In-memory conversation index over message history.
+
+Messages seen by get_message_history (from the API or the local mirror) and
+inbound messages posted to the webhook receiver are grouped into threads: one
+per group_id, or per contact number for one-to-one messages. Each thread
+keeps its messages ordered by send time, a deduplication index by uuid /
+message handle, and inbound and unread counters, so list_conversations and
+get_conversation answer with dictionary lookups and binary searches instead
+of re-fetching and re-sorting history. A min-heap of (last activity, thread)
+entries finds the least recently active thread to evict in O(log threads);
+entries left behind when a thread's activity changes are skipped when popped
+rather than searched for and removed.
+
+A message counts as unread when it is inbound and newer than both the last
+outbound message in the thread and the last time the thread was marked read.
+"""
+import bisect
+import heapq
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.config import (
+    SENDBLUE_CONVERSATIONS_ENABLED,
+    SENDBLUE_CONVERSATIONS_MAX_THREADS,
+    SENDBLUE_CONVERSATIONS_MAX_MESSAGES
+)
+from src.records import MessageRecord, format_timestamp
+
+# Content characters kept in the last-message preview of list_conversations
+PREVIEW_CHARS = 160
+
+# Fields a status callback may change on a message that is already indexed
+_STATUS_FIELDS = ("status", "error_code", "error_message", "error_detail", "was_downgraded", "updated_timestamp")
+
+
+def thread_key(record: MessageRecord) -> Optional[str]:
+    """Return the thread a message belongs to: "group:<id>" or "number:<contact>"."""
+    if record.group_id:
+        return f"group:{record.group_id}"
+    number = record.number or (record.to_number if record.is_outbound else record.from_number)
+    return f"number:{number}" if number else None
+
+
+class Conversation:
+    """The indexed messages of one thread, oldest first."""
+
+    __slots__ = (
+        "key", "number", "group_id", "participants", "records", "times", "by_key",
+        "inbound", "unread", "last_outbound", "read_through"
+    )
+
+    def __init__(self, key: str):
+        self.key = key
+        kind, _, target = key.partition(":")
+        self.number = target if kind == "number" else None
+        self.group_id = target if kind == "group" else None
+        self.participants: Optional[List[str]] = None
+        self.records: List[MessageRecord] = []
+        # Send times parallel to records, for binary search
+        self.times: List[float] = []
+        self.by_key: Dict[str, MessageRecord] = {}
+        self.inbound = 0
+        self.unread = 0
+        self.last_outbound = 0.0
+        self.read_through = 0.0
+
+    @property
+    def last_activity(self) -> float:
+        """Send time of the newest message."""
+        return self.times[-1] if self.times else 0.0
+
+    def _position(self, record: MessageRecord) -> int:
+        index = bisect.bisect_left(self.times, record.timestamp)
+        while index < len(self.records) and self.times[index] == record.timestamp:
+            if self.records[index] is record:
+                return index
+            index += 1
+        # Times are briefly unsorted while a batch moves messages
+        return next(i for i, candidate in enumerate(self.records) if candidate is record)
+
+    def merge(self, records: Iterable[MessageRecord]) -> int:
+        """
+        Add or replace messages of this thread.
+
+        Returns:
+            int: How many messages were new
+        """
+        added = 0
+        unordered = False
+        for record in records:
+            key = record.key
+            existing = self.by_key.get(key) if key is not None else None
+            if existing is not None:
+                index = self._position(existing)
+                self.records[index] = record
+                if record.timestamp != existing.timestamp:
+                    self.times[index] = record.timestamp
+                    unordered = True
+            else:
+                if self.times and record.timestamp < self.times[-1]:
+                    unordered = True
+                self.records.append(record)
+                self.times.append(record.timestamp)
+                if not record.is_outbound:
+                    self.inbound += 1
+                added += 1
+            if key is not None:
+                self.by_key[key] = record
+            if record.is_outbound:
+                self.last_outbound = max(self.last_outbound, record.timestamp)
+            if record.participants:
+                self.participants = record.participants
+        if unordered:
+            # Timsort merges the appended run with the ordered prefix cheaply
+            self.records.sort(key=attrgetter("timestamp"))
+            self.times = [record.timestamp for record in self.records]
+        return added
+
+    def trim(self, max_messages: int) -> int:
+        """Drop the oldest messages beyond the per-thread cap; returns how many."""
+        excess = len(self.records) - max_messages
+        if excess <= 0:
+            return 0
+        for record in self.records[:excess]:
+            if record.key is not None:
+                self.by_key.pop(record.key, None)
+            if not record.is_outbound:
+                self.inbound -= 1
+        del self.records[:excess]
+        del self.times[:excess]
+        return excess
+
+    def recount(self) -> None:
+        """Recount unread messages (inbound ones after the last reply or read mark)."""
+        cutoff = max(self.last_outbound, self.read_through)
+        unread = 0
+        index = len(self.times) - 1
+        while index >= 0 and self.times[index] > cutoff:
+            if not self.records[index].is_outbound:
+                unread += 1
+            index -= 1
+        self.unread = unread
+
+    def mark_read(self) -> None:
+        """Mark every indexed message as read."""
+        self.read_through = self.last_activity
+        self.unread = 0
+
+    def page(self, limit: int, before: Optional[float] = None) -> Tuple[List[MessageRecord], bool]:
+        """
+        Return the newest messages sent before a time, oldest first.
+
+        Returns:
+            Tuple[List[MessageRecord], bool]: The messages and whether older ones exist
+        """
+        end = len(self.times) if before is None else bisect.bisect_left(self.times, before)
+        start = max(0, end - limit)
+        return self.records[start:end], start > 0
+
+    def summary(self) -> Dict[str, Any]:
+        """Return the thread's counters and a preview of its newest message."""
+        result: Dict[str, Any] = {}
+        if self.group_id:
+            result["group_id"] = self.group_id
+            if self.participants:
+                result["participants"] = self.participants
+        else:
+            result["number"] = self.number
+        result.update({
+            "last_activity": format_timestamp(self.last_activity),
+            "messages": len(self.records),
+            "inbound": self.inbound,
+            "unread": self.unread
+        })
+        if self.records:
+            preview = self.records[-1].project(("date", "is_outbound", "status", "content"))
+            content = preview.get("content")
+            if isinstance(content, str) and len(content) > PREVIEW_CHARS:
+                preview["content"] = content[:PREVIEW_CHARS] + "…"
+            result["last_message"] = preview
+        return result
+
+
+class ConversationIndex:
+    """Threads by contact or group, ordered by last activity."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_threads: int = SENDBLUE_CONVERSATIONS_MAX_THREADS,
+        max_messages: int = SENDBLUE_CONVERSATIONS_MAX_MESSAGES
+    ):
+        self.enabled = enabled
+        self.max_threads = max_threads
+        self.max_messages = max_messages
+        self.messages = 0
+        self.evicted = 0
+        self._threads: Dict[str, Conversation] = {}
+        # Min-heap of (last activity, thread key); stale entries are skipped lazily
+        self._heap: List[Tuple[float, str]] = []
+
+    def add(self, records: Iterable[MessageRecord]) -> int:
+        """
+        Index messages, replacing ones already indexed by uuid / message handle.
+
+        Returns:
+            int: How many threads were updated
+        """
+        if not self.enabled:
+            return 0
+        grouped: Dict[str, List[MessageRecord]] = {}
+        for record in records:
+            key = thread_key(record)
+            if key is not None:
+                grouped.setdefault(key, []).append(record)
+
+        for key, thread_records in grouped.items():
+            conversation = self._threads.get(key)
+            if conversation is None:
+                conversation = Conversation(key)
+                self._threads[key] = conversation
+                previous = None
+            else:
+                previous = conversation.last_activity
+            self.messages += conversation.merge(thread_records)
+            self.messages -= conversation.trim(self.max_messages)
+            conversation.recount()
+            self._reorder(key, previous, conversation.last_activity)
+
+        while len(self._threads) > self.max_threads:
+            activity, key = heapq.heappop(self._heap)
+            conversation = self._threads.get(key)
+            if conversation is None or conversation.last_activity != activity:
+                continue
+            del self._threads[key]
+            self.messages -= len(conversation.records)
+            self.evicted += 1
+        return len(grouped)
+
+    def _reorder(self, key: str, previous: Optional[float], current: float) -> None:
+        if previous == current:
+            return
+        heapq.heappush(self._heap, (current, key))
+        if len(self._heap) > 2 * len(self._threads) + 64:
+            # Mostly stale entries: rebuild from the live threads
+            self._heap = [(conversation.last_activity, key) for key, conversation in self._threads.items()]
+            heapq.heapify(self._heap)
+
+    def update_status(self, record: MessageRecord) -> bool:
+        """
+        Apply a status callback to an indexed message.
+
+        Returns:
+            bool: False if the message is not indexed
+        """
+        key = thread_key(record)
+        conversation = self._threads.get(key) if key is not None else None
+        existing = conversation.by_key.get(record.key) if conversation is not None and record.key else None
+        if existing is None:
+            return False
+        for field in _STATUS_FIELDS:
+            value = getattr(record, field)
+            if value is not None:
+                setattr(existing, field, value)
+        return True
+
+    def get(self, number: Optional[str] = None, group_id: Optional[str] = None) -> Optional[Conversation]:
+        """Return the thread of a group (takes precedence) or contact, if indexed."""
+        return self._threads.get(f"group:{group_id}" if group_id else f"number:{number}")
+
+    def recent(self, limit: int, offset: int = 0, unread_only: bool = False) -> List[Conversation]:
+        """Return threads by most recent activity."""
+        threads: Iterable[Conversation] = self._threads.values()
+        if unread_only:
+            threads = (conversation for conversation in threads if conversation.unread)
+        return heapq.nlargest(offset + limit, threads, key=attrgetter("last_activity", "key"))[offset:]
+
+    def __len__(self) -> int:
+        return len(self._threads)
+
+    def clear(self) -> None:
+        """Drop every indexed thread."""
+        self._threads.clear()
+        self._heap.clear()
+        self.messages = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return index statistics for monitoring."""
+        return {
+            "enabled": self.enabled,
+            "threads": len(self._threads),
+            "messages": self.messages,
+            "unread_threads": sum(1 for conversation in self._threads.values() if conversation.unread),
+            "evicted_threads": self.evicted
+        }
+
+
+conversation_index = ConversationIndex(enabled=SENDBLUE_CONVERSATIONS_ENABLED)
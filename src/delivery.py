@@ -0,0 +1,174 @@
+"""
+Delivery status tracking for outbound messages.
+
+Sendblue POSTs a status callback whenever an outbound message moves through
+QUEUED, SENT, DELIVERED, READ or ERROR. The tracker keeps the latest status
+per message_handle in a bounded table (least recently updated entries are
+evicted first) and lets await_delivery wait on many handles at once instead
+of polling message history.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from src.config import SENDBLUE_DELIVERY_TRACKER_SIZE
+from src.records import MessageRecord, format_timestamp
+
+# Progress order of delivery statuses; ERROR is terminal and ranked separately
+STATUS_RANK = {"QUEUED": 0, "SENT": 1, "DELIVERED": 2, "READ": 3}
+TERMINAL_STATUSES = {"READ", "ERROR"}
+
+
+@dataclass(slots=True)
+class DeliveryState:
+    """Latest known status of one outbound message."""
+    status: str
+    updated_at: float
+    number: Optional[str] = None
+    was_downgraded: Optional[bool] = None
+    error_code: Optional[int] = None
+    error_message: Optional[str] = None
+
+    def reached(self, target: str) -> bool:
+        """
+        Whether the message reached the target status or can no longer progress.
+
+        SMS messages (downgraded) never report DELIVERED or READ, so SENT is
+        final for them.
+        """
+        if self.status in TERMINAL_STATUSES:
+            return True
+        rank = STATUS_RANK.get(self.status, -1)
+        if self.was_downgraded and rank >= STATUS_RANK["SENT"]:
+            return True
+        return rank >= STATUS_RANK[target]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for tool output, omitting empty fields."""
+        result = {"status": self.status, "updated_at": format_timestamp(self.updated_at)}
+        for field in ("number", "was_downgraded", "error_code", "error_message"):
+            value = getattr(self, field)
+            if value is not None:
+                result[field] = value
+        return result
+
+
+class DeliveryTracker:
+    """Bounded table of message_handle -> latest delivery status."""
+
+    def __init__(self, capacity: int = SENDBLUE_DELIVERY_TRACKER_SIZE):
+        self.capacity = capacity
+        self.callbacks = 0
+        self.evicted = 0
+        self._states: "OrderedDict[str, DeliveryState]" = OrderedDict()
+        # Each waiting call registers one queue under every handle it waits on
+        self._waiters: Dict[str, Set["asyncio.Queue[str]"]] = {}
+
+    def update(self, record: MessageRecord) -> bool:
+        """
+        Apply a send response or status callback.
+
+        Statuses never move backwards, since callbacks can arrive out of
+        order (or before the send response that created the message).
+
+        Returns:
+            bool: False if the record has no handle or status
+        """
+        handle = record.message_handle
+        status = (record.status or "").upper()
+        if not handle or not status:
+            return False
+
+        state = self._states.get(handle)
+        if state is None:
+            state = DeliveryState(status=status, updated_at=record.updated_timestamp or time.time())
+            self._states[handle] = state
+        elif state.status != "ERROR" and (
+            status == "ERROR" or STATUS_RANK.get(status, -1) > STATUS_RANK.get(state.status, -1)
+        ):
+            state.status = status
+            state.updated_at = record.updated_timestamp or time.time()
+        self._states.move_to_end(handle)
+
+        if record.number:
+            state.number = record.number
+        if record.was_downgraded is not None:
+            state.was_downgraded = record.was_downgraded
+        if record.error_code:
+            state.error_code = record.error_code
+        if record.error_message:
+            state.error_message = record.error_message
+
+        for queue in self._waiters.get(handle, ()):
+            queue.put_nowait(handle)
+
+        while len(self._states) > self.capacity:
+            self._states.popitem(last=False)
+            self.evicted += 1
+        return True
+
+    def get(self, handle: str) -> Optional[DeliveryState]:
+        """Return the latest known status of a message, if tracked."""
+        return self._states.get(handle)
+
+    async def wait(self, handles: Iterable[str], target: str = "DELIVERED", timeout: float = 60.0) -> List[str]:
+        """
+        Wait until every message reached the target status (or failed).
+
+        Returns:
+            List[str]: Handles still pending when the timeout expired
+        """
+        handles = list(dict.fromkeys(handles))
+        pending = {handle for handle in handles if not self._reached(handle, target)}
+        if not pending:
+            return []
+        deadline = time.monotonic() + timeout
+        queue: "asyncio.Queue[str]" = asyncio.Queue()
+        for handle in pending:
+            self._waiters.setdefault(handle, set()).add(queue)
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    handle = await asyncio.wait_for(queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if handle in pending and self._reached(handle, target):
+                    pending.discard(handle)
+                    self._unregister(handle, queue)
+        finally:
+            for handle in pending:
+                self._unregister(handle, queue)
+        return [handle for handle in handles if handle in pending]
+
+    def _unregister(self, handle: str, queue: "asyncio.Queue[str]") -> None:
+        queues = self._waiters.get(handle)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._waiters[handle]
+
+    def _reached(self, handle: str, target: str) -> bool:
+        state = self._states.get(handle)
+        return state is not None and state.reached(target)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return tracker statistics for monitoring."""
+        counts: Dict[str, int] = {}
+        for state in self._states.values():
+            counts[state.status] = counts.get(state.status, 0) + 1
+        return {
+            "tracked": len(self._states),
+            "capacity": self.capacity,
+            "by_status": counts,
+            "callbacks": self.callbacks,
+            "evicted": self.evicted,
+            "waiting": sum(len(waiters) for waiters in self._waiters.values())
+        }
+
+
+delivery_tracker = DeliveryTracker()
@@ -0,0 +1,142 @@
+"""
+Registry of known group chats by member set.
+
+Sending to a list of numbers can create a new Sendblue group every time,
+while sending to a group_id reuses the existing chat. Each group created by a
+numbers-based send_group_message is stored here (SQLite, so it survives
+restarts) under a canonical key of its sorted, deduplicated member numbers,
+together with the line it was sent from. Later sends to the same members are
+resolved to the stored group_id, and add_recipient_to_group keeps the member
+set of a known group current.
+"""
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.json_backend import dumps, loads
+from src.storage import connect
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS groups (
+    group_id TEXT PRIMARY KEY,
+    member_key TEXT NOT NULL,
+    members TEXT NOT NULL,
+    from_number TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS groups_member_key ON groups (member_key, updated_at);
+"""
+
+
+def member_key(numbers: Iterable[str]) -> str:
+    """Return the canonical key of a member set: sorted, deduplicated numbers joined by commas."""
+    return ",".join(sorted(set(numbers)))
+
+
+def _group(row: Any) -> Dict[str, Any]:
+    return {
+        "group_id": row["group_id"],
+        "members": loads(row["members"]),
+        "from_number": row["from_number"],
+        "updated_at": row["updated_at"]
+    }
+
+
+class GroupRegistry:
+    """Persistent map from member sets to group IDs."""
+
+    def __init__(self, filename: str = "groups.db"):
+        self.hits = 0
+        self.misses = 0
+        self._db = connect(filename)
+        self._db.executescript(SCHEMA)
+
+    def resolve(self, numbers: Iterable[str], from_number: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find the group with exactly these members.
+
+        Args:
+            numbers (Iterable[str]): E.164 numbers of the members, in any order
+            from_number (Optional[str]): Only match groups sent from this line
+
+        Returns:
+            Optional[Dict[str, Any]]: The most recently updated matching group
+            (group_id, members, from_number), or None
+        """
+        sql = "SELECT * FROM groups WHERE member_key = ?"
+        args: List[Any] = [member_key(numbers)]
+        if from_number:
+            sql += " AND (from_number = ? OR from_number IS NULL)"
+            args.append(from_number)
+        row = self._db.execute(sql + " ORDER BY updated_at DESC LIMIT 1", args).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _group(row)
+
+    def get(self, group_id: str) -> Optional[Dict[str, Any]]:
+        """Return a known group by ID, or None."""
+        row = self._db.execute("SELECT * FROM groups WHERE group_id = ?", (group_id,)).fetchone()
+        return _group(row) if row is not None else None
+
+    def remember(self, numbers: Iterable[str], group_id: str, from_number: Optional[str] = None) -> None:
+        """Store (or refresh) the members and line of a group."""
+        members = sorted(set(numbers))
+        now = time.time()
+        self._db.execute(
+            "INSERT INTO groups (group_id, member_key, members, from_number, created_at, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT(group_id) DO UPDATE SET member_key = excluded.member_key,"
+            " members = excluded.members, from_number = COALESCE(excluded.from_number, groups.from_number),"
+            " updated_at = excluded.updated_at",
+            (group_id, member_key(members), dumps(members), from_number, now, now)
+        )
+
+    def add_members(self, group_id: str, numbers: Iterable[str]) -> bool:
+        """
+        Record members added to a known group.
+
+        Returns:
+            bool: False if the group is not in the registry
+        """
+        group = self.get(group_id)
+        if group is None:
+            return False
+        self.remember(list(group["members"]) + list(numbers), group_id)
+        return True
+
+    def forget(self, group_id: str) -> None:
+        """Remove a group, e.g. one Sendblue no longer accepts."""
+        self._db.execute("DELETE FROM groups WHERE group_id = ?", (group_id,))
+
+    def count(self) -> int:
+        """Return the number of known groups."""
+        return self._db.execute("SELECT COUNT(*) AS n FROM groups").fetchone()["n"]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return registry statistics for monitoring."""
+        return {"groups": self.count(), "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        self._db.close()
+
+
+_group_registry: Optional[GroupRegistry] = None
+
+
+def get_group_registry() -> GroupRegistry:
+    """Return the process-wide group registry, opening it on first use."""
+    global _group_registry
+    if _group_registry is None:
+        _group_registry = GroupRegistry()
+    return _group_registry
+
+
+def close_group_registry() -> None:
+    """Close the process-wide group registry if it was opened."""
+    global _group_registry
+    if _group_registry is not None:
+        _group_registry.close()
+        _group_registry = None
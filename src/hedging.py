@@ -0,0 +1,201 @@
+"""
+Hedged requests for read-only Sendblue endpoints.
+
+Tail latency on lookups and history reads is dominated by the occasional slow
+response. For the GET endpoints in SENDBLUE_HEDGE_ENDPOINTS, an attempt that
+has not answered within a percentile of the endpoint's recently observed
+latency gets an identical second request; whichever response arrives first
+is used and the other request is cancelled. The hedge delay is measured from
+when an attempt has its lane and rate-limit slots and is actually sent, so
+time spent queued behind the limiter never triggers a hedge. Each endpoint has a token bucket
+that earns a fraction of a hedge per request (the hedge budget), so hedging
+can add at most that fraction of extra load even while Sendblue is slow
+across the board. Sends are never hedged.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+import httpx
+
+from src.config import (
+    SENDBLUE_HEDGE_ENABLED,
+    SENDBLUE_HEDGE_ENDPOINTS,
+    SENDBLUE_HEDGE_PERCENTILE,
+    SENDBLUE_HEDGE_MIN_DELAY,
+    SENDBLUE_HEDGE_MIN_SAMPLES,
+    SENDBLUE_HEDGE_BUDGET
+)
+
+# Recent latency samples kept per endpoint
+LATENCY_SAMPLES = 256
+
+# Unused hedges an endpoint may save up for a burst of slow responses
+BUDGET_BURST = 10.0
+
+# (timeout, on_sent) -> (response, latency); on_sent is called once the request is sent
+Attempt = Callable[[float, Callable[[], None]], Awaitable[Tuple[httpx.Response, float]]]
+
+
+def _discard(task: "asyncio.Task[Any]") -> None:
+    # Mark the exception of a cancelled loser as retrieved
+    if not task.cancelled():
+        task.exception()
+
+
+class Hedger:
+    """Latency tracking and hedge budget for one endpoint."""
+
+    def __init__(
+        self,
+        name: str,
+        percentile: float = SENDBLUE_HEDGE_PERCENTILE,
+        min_delay: float = SENDBLUE_HEDGE_MIN_DELAY,
+        min_samples: int = SENDBLUE_HEDGE_MIN_SAMPLES,
+        budget: float = SENDBLUE_HEDGE_BUDGET
+    ):
+        self.name = name
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.budget = budget
+        self.tokens = 0.0
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.denied = 0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._delay: Optional[float] = None
+
+    def record(self, latency: float) -> None:
+        """Add a latency sample."""
+        self.latencies.append(latency)
+        self._delay = None
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None until enough latency samples exist."""
+        if len(self.latencies) < self.min_samples:
+            return None
+        if self._delay is None:
+            ordered = sorted(self.latencies)
+            index = min(len(ordered) - 1, int(self.percentile * len(ordered)))
+            self._delay = max(self.min_delay, ordered[index])
+        return self._delay
+
+    async def send(self, attempt: Attempt, timeout: float) -> Tuple[httpx.Response, float]:
+        """
+        Run an attempt, hedging it with a second one if it is slow.
+
+        Args:
+            attempt: Coroutine factory taking a timeout and a callback to run
+                once the request is sent, and returning (response, latency),
+                e.g. one call of the client's _send_once
+            timeout (float): Timeout of the first attempt in seconds
+
+        Returns:
+            Tuple[httpx.Response, float]: The first response to arrive and its latency
+
+        Raises:
+            httpx.HTTPError: If every attempt fails
+        """
+        self.requests += 1
+        self.tokens = min(BUDGET_BURST, self.tokens + self.budget)
+        sent: "asyncio.Future[float]" = asyncio.get_running_loop().create_future()
+
+        def on_sent() -> None:
+            if not sent.done():
+                sent.set_result(time.monotonic())
+
+        primary = asyncio.ensure_future(attempt(timeout, on_sent))
+        hedge: Optional["asyncio.Task[Tuple[httpx.Response, float]]"] = None
+        try:
+            delay = self.delay()
+            if delay is not None and delay < timeout:
+                # Start the clock once the primary holds its slots and is sent
+                await asyncio.wait({primary, sent}, return_when=asyncio.FIRST_COMPLETED)
+                if not primary.done():
+                    done, _ = await asyncio.wait({primary}, timeout=delay)
+                    if not done:
+                        if self.tokens >= 1:
+                            self.tokens -= 1
+                            self.hedged += 1
+                            hedge = asyncio.ensure_future(attempt(timeout - delay, lambda: None))
+                        else:
+                            self.denied += 1
+            if hedge is None:
+                response, latency = await primary
+                self.record(latency)
+                return response, latency
+
+            pending = {primary, hedge}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in (primary, hedge):
+                    if task not in done:
+                        continue
+                    if task.exception() is not None:
+                        # Keep waiting for the other request
+                        error = task.exception()
+                        continue
+                    response, latency = task.result()
+                    self.record(latency)
+                    if task is hedge:
+                        self.hedge_wins += 1
+                        if not primary.done():
+                            # The slow request took at least this long
+                            self.record(time.monotonic() - sent.result())
+                    return response, latency
+            raise error
+        finally:
+            sent.cancel()
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+                    task.add_done_callback(_discard)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return hedging statistics for monitoring."""
+        delay = self.delay()
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "budget_denied": self.denied,
+            "hedge_rate": round(self.hedged / self.requests, 4) if self.requests else 0.0,
+            "budget_tokens": round(self.tokens, 2),
+            "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None,
+            "latency_samples": len(self.latencies)
+        }
+
+
+class HedgerRegistry:
+    """Hedgers for the read-only endpoints that may be hedged."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._hedgers: Dict[str, Hedger] = {}
+
+    def for_request(self, method: str, endpoint: str) -> Optional[Hedger]:
+        """Return the hedger for a request, or None if it must not be hedged."""
+        if not self.enabled or method.upper() != "GET":
+            return None
+        name = endpoint.split("?", 1)[0].strip("/")
+        if name not in SENDBLUE_HEDGE_ENDPOINTS:
+            return None
+        hedger = self._hedgers.get(name)
+        if hedger is None:
+            hedger = Hedger(name)
+            self._hedgers[name] = hedger
+        return hedger
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the state of every hedged endpoint that has seen traffic."""
+        return {
+            "enabled": self.enabled,
+            "endpoints": {name: hedger.snapshot() for name, hedger in self._hedgers.items()}
+        }
+
+
+request_hedgers = HedgerRegistry(enabled=SENDBLUE_HEDGE_ENABLED)
@@ -0,0 +1,156 @@
+"""
+Auto-paginating message history fetcher for GET /accounts/messages.
+
+The endpoint returns at most one page (up to 1,000 messages) per request. The
+fetcher reads the first page and, if it is full, requests the following
+offset windows concurrently until a short page, the message budget, or the
+time budget ends the scan. Pages can overlap when new messages arrive during
+the scan, so results are normalized to MessageRecords, deduplicated by uuid /
+message_handle and returned as one date-ordered list.
+"""
+import asyncio
+import time
+from operator import attrgetter
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.client import make_sendblue_api_request
+from src.config import (
+    SENDBLUE_HISTORY_PAGE_SIZE,
+    SENDBLUE_HISTORY_CONCURRENCY,
+    SENDBLUE_HISTORY_MAX_MESSAGES,
+    SENDBLUE_HISTORY_TIME_BUDGET
+)
+from src.records import MessageRecord, normalize_messages
+
+
+def merge_messages(pages: List[List[MessageRecord]]) -> List[MessageRecord]:
+    """Deduplicate records across pages and order them oldest first."""
+    seen = set()
+    merged = []
+    for page in pages:
+        for record in page:
+            key = record.key
+            if key is not None:
+                if key in seen:
+                    continue
+                seen.add(key)
+            merged.append(record)
+    merged.sort(key=attrgetter("timestamp"))
+    return merged
+
+
+async def _fetch_page(query_params: Dict[str, Any], offset: int, page_size: int) -> List[MessageRecord]:
+    params = dict(query_params, limit=page_size)
+    if offset:
+        params["offset"] = offset
+    response = await make_sendblue_api_request(
+        endpoint="/accounts/messages",
+        method="GET",
+        params=params
+    )
+    return normalize_messages(response.get("messages", []))
+
+
+async def fetch_all_messages(
+    query_params: Dict[str, Any],
+    start_offset: int = 0,
+    max_messages: Optional[int] = None,
+    time_budget: Optional[float] = None,
+    page_size: int = SENDBLUE_HISTORY_PAGE_SIZE,
+    concurrency: int = SENDBLUE_HISTORY_CONCURRENCY
+) -> Tuple[List[MessageRecord], Dict[str, Any]]:
+    """
+    Fetch every page of messages matching a filter, within the given budgets.
+
+    Args:
+        query_params (Dict[str, Any]): Filters (number, cid, from_date) without limit/offset
+        start_offset (int): Offset of the first message to fetch
+        max_messages (Optional[int]): Stop once this many messages were fetched
+        time_budget (Optional[float]): Stop after this many seconds
+        page_size (int): Messages requested per page (API maximum is 1,000)
+        concurrency (int): Pages requested at once after the first page
+
+    Returns:
+        Tuple[List[MessageRecord], Dict[str, Any]]: The merged, date-ordered
+        message records and a summary (pages fetched, whether the scan
+        completed, why it stopped, and the offset to resume from)
+
+    Raises:
+        httpx.HTTPError: If the first page cannot be fetched
+    """
+    max_messages = max_messages or SENDBLUE_HISTORY_MAX_MESSAGES
+    time_budget = time_budget or SENDBLUE_HISTORY_TIME_BUDGET
+    started = time.monotonic()
+    deadline = started + time_budget
+
+    first_page = await _fetch_page(query_params, start_offset, page_size)
+    pages = [first_page]
+    fetched = len(first_page)
+    next_offset = start_offset + page_size
+    stop_reason = "complete" if len(first_page) < page_size else None
+    error = None
+
+    while stop_reason is None:
+        if fetched >= max_messages:
+            stop_reason = "max_messages"
+            break
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            stop_reason = "time_budget"
+            break
+
+        # Never request more windows than the message budget still allows
+        windows = min(concurrency, -(-(max_messages - fetched) // page_size))
+        offsets = [next_offset + i * page_size for i in range(windows)]
+        tasks = [asyncio.ensure_future(_fetch_page(query_params, offset, page_size)) for offset in offsets]
+        done, not_done = await asyncio.wait(tasks, timeout=remaining)
+        for task in not_done:
+            task.cancel()
+
+        # Consume windows in offset order; a gap ends the scan
+        for task in tasks:
+            if task not in done:
+                stop_reason = "time_budget"
+                break
+            if task.exception() is not None:
+                error = str(task.exception())
+                stop_reason = "error"
+                break
+            page = task.result()
+            pages.append(page)
+            fetched += len(page)
+            if len(page) < page_size:
+                stop_reason = "complete"
+                break
+        # Retrieve exceptions of windows we did not consume
+        for task in done:
+            if not task.cancelled():
+                task.exception()
+        next_offset += windows * page_size
+
+    # Pages come newest first: keep the first max_messages in fetch order,
+    # i.e. the contiguous offset range [start_offset, next_offset), before
+    # ordering them by date
+    kept_pages = []
+    kept = 0
+    for page in pages:
+        if kept >= max_messages:
+            break
+        page = page[:max_messages - kept]
+        kept_pages.append(page)
+        kept += len(page)
+    if kept < fetched:
+        stop_reason = "max_messages"
+    messages = merge_messages(kept_pages)
+
+    complete = stop_reason == "complete"
+    summary = {
+        "pages": len(pages),
+        "complete": complete,
+        "stop_reason": stop_reason,
+        "next_offset": None if complete else start_offset + kept,
+        "elapsed_seconds": round(time.monotonic() - started, 3)
+    }
+    if error is not None:
+        summary["error_message"] = error
+    return messages, summary
@@ -0,0 +1,160 @@
+"""
+In-memory buffer of inbound messages received through the webhook receiver.
+
+Messages are kept in a fixed-size ring buffer and indexed by contact number
+and group_id, so wait_for_reply can answer from memory and wake up as soon as
+a matching message is posted, without calling the Sendblue API.
+"""
+import asyncio
+import itertools
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from src.config import SENDBLUE_INBOUND_BUFFER_SIZE
+from src.records import MessageRecord
+
+# (sequence number, receive time, record)
+Entry = Tuple[int, float, MessageRecord]
+
+
+class InboundBuffer:
+    """Ring buffer of received messages with per-number and per-group indexes."""
+
+    def __init__(self, capacity: int = SENDBLUE_INBOUND_BUFFER_SIZE):
+        self.capacity = capacity
+        self.received = 0
+        self.duplicates = 0
+        self._entries: Deque[Entry] = deque()
+        self._index: Dict[str, Deque[Entry]] = {}
+        self._handles: Set[str] = set()
+        self._waiters: Dict[str, Set["asyncio.Future[None]"]] = {}
+        self._sequence = itertools.count(1)
+
+    @staticmethod
+    def _keys(record: MessageRecord) -> List[str]:
+        keys = []
+        if record.group_id:
+            keys.append(f"group:{record.group_id}")
+        if record.number:
+            keys.append(f"number:{record.number}")
+        return keys
+
+    def add(self, record: MessageRecord) -> bool:
+        """
+        Store a received message and wake any matching waiters.
+
+        Returns:
+            bool: False if the message was already buffered (webhook redelivery)
+        """
+        if record.key is not None:
+            if record.key in self._handles:
+                self.duplicates += 1
+                return False
+            self._handles.add(record.key)
+
+        entry = (next(self._sequence), time.time(), record)
+        self._entries.append(entry)
+        self.received += 1
+        for key in self._keys(record):
+            self._index.setdefault(key, deque()).append(entry)
+            for waiter in self._waiters.pop(key, ()):
+                if not waiter.done():
+                    waiter.set_result(None)
+
+        while len(self._entries) > self.capacity:
+            self._evict(self._entries.popleft())
+        return True
+
+    def _evict(self, entry: Entry) -> None:
+        record = entry[2]
+        if record.key is not None:
+            self._handles.discard(record.key)
+        for key in self._keys(record):
+            entries = self._index.get(key)
+            # Entries are appended in sequence order, so the evicted one is at the head
+            if entries and entries[0][0] == entry[0]:
+                entries.popleft()
+                if not entries:
+                    del self._index[key]
+
+    def find(
+        self,
+        number: Optional[str] = None,
+        group_id: Optional[str] = None,
+        since: Optional[float] = None,
+        after_sequence: int = 0
+    ) -> List[Entry]:
+        """
+        Return buffered inbound messages for a contact or group, oldest first.
+
+        Args:
+            number (Optional[str]): Contact E.164 number
+            group_id (Optional[str]): Group ID; takes precedence over number
+            since (Optional[float]): Only messages sent after this time (epoch seconds)
+            after_sequence (int): Only messages buffered after this sequence number
+        """
+        key = f"group:{group_id}" if group_id else f"number:{number}"
+        return [
+            entry for entry in self._index.get(key, ())
+            if entry[0] > after_sequence
+            and not entry[2].is_outbound
+            and (since is None or entry[2].timestamp > since)
+        ]
+
+    async def wait(
+        self,
+        number: Optional[str] = None,
+        group_id: Optional[str] = None,
+        since: Optional[float] = None,
+        timeout: float = 60.0
+    ) -> List[Entry]:
+        """
+        Wait until an inbound message for the contact or group is buffered.
+
+        Messages already buffered are returned immediately when `since` is
+        given; otherwise only messages arriving after the call count.
+
+        Returns:
+            List[Entry]: The matching messages, or an empty list on timeout
+        """
+        after_sequence = 0 if since is not None else self.last_sequence()
+        key = f"group:{group_id}" if group_id else f"number:{number}"
+        deadline = time.monotonic() + timeout
+        loop = asyncio.get_running_loop()
+        while True:
+            matches = self.find(number, group_id, since, after_sequence)
+            if matches:
+                return matches
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            waiter = loop.create_future()
+            self._waiters.setdefault(key, set()).add(waiter)
+            try:
+                await asyncio.wait_for(waiter, timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                waiters = self._waiters.get(key)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[key]
+
+    def last_sequence(self) -> int:
+        """Return the sequence number of the newest buffered message."""
+        return self._entries[-1][0] if self._entries else 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return buffer statistics for monitoring."""
+        return {
+            "buffered": len(self._entries),
+            "capacity": self.capacity,
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "waiting": sum(len(waiters) for waiters in self._waiters.values())
+        }
+
+
+inbound_buffer = InboundBuffer()
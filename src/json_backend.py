@@ -0,0 +1,90 @@
+"""
+Pluggable JSON encoding and decoding.
+
+orjson or msgspec are used when installed: both parse bytes directly (the
+standard library first decodes the whole body to a str) and encode faster.
+JSON is a small part of a history call, though, next to building and
+indexing message records, so the end-to-end gain is marginal. The standard
+library json module is the fallback. SENDBLUE_JSON_BACKEND selects a backend
+explicitly; "auto" picks the first one available in the order orjson,
+msgspec, stdlib.
+
+Every backend produces compact JSON with non-ASCII characters kept as UTF-8,
+and raises ValueError for invalid input.
+"""
+import json
+import logging
+from typing import Any, Callable, Tuple, Union
+
+from src.config import SENDBLUE_JSON_BACKEND
+
+logger = logging.getLogger("sendblue-mcp")
+
+BACKENDS = ("orjson", "msgspec", "stdlib")
+
+Loads = Callable[[Union[bytes, str]], Any]
+DumpsBytes = Callable[[Any], bytes]
+
+
+def _stdlib() -> Tuple[Loads, DumpsBytes]:
+    def dumps_bytes(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return json.loads, dumps_bytes
+
+
+def _orjson() -> Tuple[Loads, DumpsBytes]:
+    import orjson
+    return orjson.loads, orjson.dumps
+
+
+def _msgspec() -> Tuple[Loads, DumpsBytes]:
+    import msgspec
+
+    decoder = msgspec.json.Decoder()
+    encoder = msgspec.json.Encoder()
+
+    def loads(data: Union[bytes, str]) -> Any:
+        try:
+            return decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    return loads, encoder.encode
+
+
+_LOADERS = {"orjson": _orjson, "msgspec": _msgspec, "stdlib": _stdlib}
+
+
+def load_backend(name: str = "auto") -> Tuple[str, Loads, DumpsBytes]:
+    """
+    Return the name, loads and dumps_bytes functions of a JSON backend.
+
+    Args:
+        name (str): A backend from BACKENDS, or "auto" for the fastest one installed
+
+    Returns:
+        Tuple[str, Loads, DumpsBytes]: The backend actually loaded; falls back
+        to stdlib if the requested one is not installed
+    """
+    candidates = BACKENDS if name == "auto" else (name,)
+    for candidate in candidates:
+        loader = _LOADERS.get(candidate)
+        if loader is None:
+            logger.warning(f"Unknown JSON backend '{candidate}' - using stdlib")
+            break
+        try:
+            loads, dumps_bytes = loader()
+        except ImportError:
+            if name != "auto":
+                logger.warning(f"JSON backend '{candidate}' is not installed - using stdlib")
+            continue
+        return candidate, loads, dumps_bytes
+    return ("stdlib",) + _stdlib()
+
+
+BACKEND, loads, dumps_bytes = load_backend(SENDBLUE_JSON_BACKEND)
+
+
+def dumps(obj: Any) -> str:
+    """Encode to a compact JSON string."""
+    return dumps_bytes(obj).decode("utf-8")
@@ -0,0 +1,251 @@
+"""
+Per-line lanes for outbound sends.
+
+Every Sendblue from_number is a physical line with its own throughput
+ceiling, so sends are queued per line ("lane") before they reach the shared
+per-endpoint rate limiter. Each lane has its own concurrency limit and token
+bucket, and waiting lanes are served weighted round-robin: a lane gets up to
+`weight` sends per turn before the next lane is served. A burst on one line
+therefore only delays the other lines by one turn instead of by its whole
+backlog.
+
+Sends without a from_number share the "default" lane.
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+from src.config import (
+    SENDBLUE_LANES_ENABLED,
+    SENDBLUE_LANE_ENDPOINTS,
+    SENDBLUE_LANE_RATE,
+    SENDBLUE_LANE_CONCURRENCY,
+    SENDBLUE_LANE_TOTAL_CONCURRENCY,
+    SENDBLUE_LANE_WEIGHTS
+)
+
+DEFAULT_LANE = "default"
+
+# Recent samples kept per lane for the latency percentiles
+LATENCY_SAMPLES = 256
+
+
+def _percentile(samples: Deque[float], fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 1)
+
+
+class Lane:
+    """Queue, concurrency limit and token bucket of one sending line."""
+
+    def __init__(self, name: str, rate: float, concurrency: int, weight: int = 1):
+        self.name = name
+        self.rate = rate
+        self.concurrency = concurrency
+        self.weight = max(1, weight)
+        self.tokens = max(1.0, rate)
+        self.in_flight = 0
+        self.completed = 0
+        # Sends granted in the lane's current round-robin turn
+        self.turn_granted = 0
+        self.waiters: Deque["asyncio.Future[None]"] = deque()
+        self.queue_waits: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.service_times: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self.tokens = min(max(1.0, self.rate), self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def can_start(self, now: float) -> bool:
+        """Whether the lane has a free slot and a rate token."""
+        if self.in_flight >= self.concurrency:
+            return False
+        self._refill(now)
+        return self.rate <= 0 or self.tokens >= 1.0
+
+    def next_token_in(self) -> Optional[float]:
+        """Seconds until the lane's next token, if a token is all it is missing."""
+        if self.rate <= 0 or self.in_flight >= self.concurrency or not self.waiters:
+            return None
+        return max(0.0, (1.0 - self.tokens) / self.rate)
+
+    def start(self) -> None:
+        self.in_flight += 1
+        if self.rate > 0:
+            self.tokens -= 1.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the lane's depth and latency for monitoring."""
+        return {
+            "depth": len(self.waiters),
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rate_per_second": self.rate,
+            "concurrency": self.concurrency,
+            "weight": self.weight,
+            "queue_wait_ms": {
+                "p50": _percentile(self.queue_waits, 0.5),
+                "p95": _percentile(self.queue_waits, 0.95)
+            },
+            "service_ms": {
+                "p50": _percentile(self.service_times, 0.5),
+                "p95": _percentile(self.service_times, 0.95)
+            }
+        }
+
+
+class LaneScheduler:
+    """Serves per-line lanes weighted round-robin within a shared concurrency cap."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        endpoints: Optional[List[str]] = None,
+        rate: float = SENDBLUE_LANE_RATE,
+        concurrency: int = SENDBLUE_LANE_CONCURRENCY,
+        total_concurrency: int = SENDBLUE_LANE_TOTAL_CONCURRENCY,
+        weights: Optional[Dict[str, int]] = None
+    ):
+        self.enabled = enabled
+        self.endpoints = set(endpoints if endpoints is not None else SENDBLUE_LANE_ENDPOINTS)
+        self.rate = rate
+        self.concurrency = concurrency
+        self.total_concurrency = total_concurrency
+        self.weights = weights if weights is not None else SENDBLUE_LANE_WEIGHTS
+        self.in_flight = 0
+        self._lanes: Dict[str, Lane] = {}
+        # Lanes with waiting sends, in service order
+        self._ring: Deque[Lane] = deque()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def lane_name(self, endpoint: str, data: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Return the lane for a request, or None if the endpoint is not laned."""
+        if not self.enabled or endpoint.split("?", 1)[0].strip("/") not in self.endpoints:
+            return None
+        return (data or {}).get("from_number") or DEFAULT_LANE
+
+    def get_lane(self, name: str) -> Lane:
+        """Return (creating on first use) the lane for a line."""
+        lane = self._lanes.get(name)
+        if lane is None:
+            lane = Lane(name, self.rate, self.concurrency, self.weights.get(name, 1))
+            self._lanes[name] = lane
+        return lane
+
+    def load(self, name: str) -> int:
+        """Return the number of sends waiting or in flight on a line."""
+        lane = self._lanes.get(name)
+        return len(lane.waiters) + lane.in_flight if lane is not None else 0
+
+    def _dispatch(self) -> None:
+        """Grant waiting sends, one lane turn at a time, while capacity remains."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        idle_turns = 0
+        while self._ring and idle_turns < len(self._ring) and self.in_flight < self.total_concurrency:
+            lane = self._ring.popleft()
+            granted = 0
+            while lane.waiters and lane.turn_granted < lane.weight and self.in_flight < self.total_concurrency:
+                if not lane.can_start(now):
+                    break
+                waiter = lane.waiters.popleft()
+                if waiter.done():
+                    # Cancelled while queued; its acquire is giving up
+                    continue
+                lane.start()
+                self.in_flight += 1
+                waiter.set_result(None)
+                lane.turn_granted += 1
+                granted += 1
+            idle_turns = 0 if granted else idle_turns + 1
+            if not lane.waiters:
+                lane.turn_granted = 0
+            elif lane.turn_granted < lane.weight and self.in_flight >= self.total_concurrency:
+                # Cut short by the shared cap; keep the rest of this turn
+                self._ring.appendleft(lane)
+            else:
+                lane.turn_granted = 0
+                self._ring.append(lane)
+
+        # Lanes held back only by their token bucket need a timer to resume
+        delays = [delay for delay in (lane.next_token_in() for lane in self._ring) if delay is not None]
+        if delays and self.in_flight < self.total_concurrency:
+            self._timer = asyncio.get_running_loop().call_later(min(delays), self._dispatch)
+
+    async def acquire(self, name: str) -> Lane:
+        """Wait for the lane's turn and a free slot in it."""
+        lane = self.get_lane(name)
+        waiter = asyncio.get_running_loop().create_future()
+        if not lane.waiters:
+            self._ring.append(lane)
+        lane.waiters.append(waiter)
+        queued = time.monotonic()
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as the caller gave up
+                self.release(lane)
+            else:
+                if waiter in lane.waiters:
+                    lane.waiters.remove(waiter)
+                if not lane.waiters and lane in self._ring:
+                    self._ring.remove(lane)
+                    lane.turn_granted = 0
+            raise
+        lane.queue_waits.append(time.monotonic() - queued)
+        return lane
+
+    def release(self, lane: Lane, service_time: Optional[float] = None) -> None:
+        """Free a lane slot and grant the next waiting sends."""
+        lane.in_flight -= 1
+        self.in_flight -= 1
+        if service_time is not None:
+            lane.completed += 1
+            lane.service_times.append(service_time)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, endpoint: str, data: Optional[Dict[str, Any]] = None) -> AsyncIterator[Optional[Lane]]:
+        """Hold a slot in the request's lane, or nothing if the endpoint is not laned."""
+        name = self.lane_name(endpoint, data)
+        if name is None:
+            yield None
+            return
+        lane = await self.acquire(name)
+        started = time.monotonic()
+        try:
+            yield lane
+        finally:
+            self.release(lane, time.monotonic() - started)
+
+    def reset(self) -> None:
+        """Drop all lane state; called on shutdown and between tests, since waiters and timers belong to one event loop."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._lanes.clear()
+        self._ring.clear()
+        self.in_flight = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the state of every lane that has seen traffic."""
+        return {
+            "enabled": self.enabled,
+            "in_flight": self.in_flight,
+            "total_concurrency": self.total_concurrency,
+            "lanes": {name: lane.snapshot() for name, lane in self._lanes.items()}
+        }
+
+
+# Process-wide lanes used by the API client
+send_lanes = LaneScheduler(enabled=SENDBLUE_LANES_ENABLED)
@@ -0,0 +1,69 @@
+"""
+Server lifespan for the Sendblue MCP server.
+Opens shared resources when FastMCP starts and releases them on shutdown.
+"""
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from src.client import open_http_client, close_http_client
+from src.config import SENDBLUE_WEBHOOK_ENABLED, SENDBLUE_WEBHOOK_PATH, SENDBLUE_QUEUE_ENABLED
+from src.lookup_cache import close_lookup_cache
+from src.mirror import close_message_mirror
+from src.search import close_search_index
+from src.groups import close_group_registry
+from src.media_cache import close_media_cache
+from src.webhooks import webhook_receiver
+from src.send_queue import start_send_workers, stop_send_workers
+from src.scheduler import start_scheduler, stop_scheduler
+from src.typing_indicators import typing_debouncer
+from src.ratelimit import rate_limiters
+from src.lanes import send_lanes
+from src.circuit import circuit_breakers
+from src.tools import run_send_job
+
+logger = logging.getLogger("sendblue-mcp")
+
+
+@asynccontextmanager
+async def sendblue_lifespan(server: Any) -> AsyncIterator[None]:
+    """
+    Manage process-wide resources for the lifetime of the MCP server.
+
+    Args:
+        server: The FastMCP server instance being started
+    """
+    await open_http_client()
+    logger.info("Opened pooled Sendblue HTTP client")
+    try:
+        if SENDBLUE_WEBHOOK_ENABLED:
+            try:
+                await webhook_receiver.start()
+                logger.info(
+                    f"Webhook receiver listening on "
+                    f"http://{webhook_receiver.host}:{webhook_receiver.port}{SENDBLUE_WEBHOOK_PATH}"
+                )
+            except RuntimeError as e:
+                # Keep serving the other tools; wait_for_reply reports the problem
+                logger.error(str(e))
+        if SENDBLUE_QUEUE_ENABLED:
+            workers = start_send_workers(run_send_job)
+            logger.info(f"Started {workers.workers} send queue workers")
+            start_scheduler(workers.queue)
+        yield
+    finally:
+        await stop_scheduler()
+        await stop_send_workers()
+        await webhook_receiver.stop()
+        await typing_debouncer.close()
+        await close_http_client()
+        # Waiters and timers belong to this event loop; a restarted server starts afresh
+        rate_limiters.reset()
+        send_lanes.reset()
+        circuit_breakers.reset()
+        logger.info("Closed pooled Sendblue HTTP client")
+        close_lookup_cache()
+        close_message_mirror()
+        close_search_index()
+        close_group_registry()
+        close_media_cache()
@@ -0,0 +1,171 @@
+"""
+Two-tier cache for number service lookups (GET /evaluate-service).
+
+Whether a number supports iMessage or SMS rarely changes, so results are kept
+in an in-memory LRU backed by a SQLite file that survives restarts. Successful
+lookups live for the positive TTL; definitive failures (e.g. Sendblue
+rejecting the number) are cached for the shorter negative TTL. Concurrent
+lookups of the same number share a single request.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from src.config import (
+    SENDBLUE_LOOKUP_CACHE_SIZE,
+    SENDBLUE_LOOKUP_CACHE_TTL,
+    SENDBLUE_LOOKUP_CACHE_NEGATIVE_TTL
+)
+from src.json_backend import dumps, loads
+from src.storage import connect
+
+# Status codes that say something about the number itself rather than about
+# the request, so the failure is worth remembering
+NEGATIVE_STATUS_CODES = {400, 404, 422}
+
+
+class LookupCache:
+    """In-memory LRU in front of a persistent SQLite table, keyed by E.164 number."""
+
+    def __init__(
+        self,
+        filename: str = "lookup_cache.db",
+        max_entries: int = SENDBLUE_LOOKUP_CACHE_SIZE,
+        positive_ttl: float = SENDBLUE_LOOKUP_CACHE_TTL,
+        negative_ttl: float = SENDBLUE_LOOKUP_CACHE_NEGATIVE_TTL
+    ):
+        self.max_entries = max_entries
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._in_flight: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+        self._db = connect(filename)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS lookups ("
+            " number TEXT PRIMARY KEY,"
+            " result TEXT NOT NULL,"
+            " negative INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+
+    def _remember(self, number: str, expires_at: float, result: Dict[str, Any]) -> None:
+        self._memory[number] = (expires_at, result)
+        self._memory.move_to_end(number)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, number: str) -> Optional[Dict[str, Any]]:
+        """Return an unexpired cached result, checking memory before disk."""
+        now = time.time()
+        entry = self._memory.get(number)
+        if entry is not None:
+            if entry[0] > now:
+                self._memory.move_to_end(number)
+                return entry[1]
+            del self._memory[number]
+
+        row = self._db.execute(
+            "SELECT result, expires_at FROM lookups WHERE number = ?", (number,)
+        ).fetchone()
+        if row is None or row["expires_at"] <= now:
+            return None
+        result = loads(row["result"])
+        self._remember(number, row["expires_at"], result)
+        return result
+
+    def put(self, number: str, result: Dict[str, Any], negative: bool = False) -> None:
+        """Store a lookup result with the positive or negative TTL."""
+        expires_at = time.time() + (self.negative_ttl if negative else self.positive_ttl)
+        self._remember(number, expires_at, result)
+        self._db.execute(
+            "INSERT OR REPLACE INTO lookups (number, result, negative, expires_at) VALUES (?, ?, ?, ?)",
+            (number, dumps(result), int(negative), expires_at)
+        )
+
+    def invalidate(self, number: str) -> None:
+        """Forget a cached result."""
+        self._memory.pop(number, None)
+        self._db.execute("DELETE FROM lookups WHERE number = ?", (number,))
+
+    async def lookup(
+        self,
+        number: str,
+        fetch: Callable[[], Awaitable[Tuple[Dict[str, Any], bool]]],
+        force_refresh: bool = False
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Return the cached result for a number, fetching it if needed.
+
+        Args:
+            number (str): E.164 phone number
+            fetch: Coroutine factory returning (result, negative), where
+                negative marks a definitive failure; if it raises, nothing is cached
+            force_refresh (bool): Ignore any cached value and fetch again
+
+        Returns:
+            Tuple[Dict[str, Any], bool]: The result and whether it came from the cache
+        """
+        if not force_refresh:
+            cached = self.get(number)
+            if cached is not None:
+                self.hits += 1
+                return cached, True
+
+        task = self._in_flight.get(number)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fetch_and_store(number, fetch))
+            self._in_flight[number] = task
+            task.add_done_callback(lambda t: self._finish(number, t))
+        # Shield so one caller giving up does not cancel the request for the others
+        return await asyncio.shield(task), False
+
+    def _finish(self, number: str, task: "asyncio.Task[Dict[str, Any]]") -> None:
+        self._in_flight.pop(number, None)
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch_and_store(
+        self,
+        number: str,
+        fetch: Callable[[], Awaitable[Tuple[Dict[str, Any], bool]]]
+    ) -> Dict[str, Any]:
+        result, negative = await fetch()
+        self.put(number, result, negative=negative)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return cache statistics for monitoring."""
+        return {
+            "memory_entries": len(self._memory),
+            "in_flight": len(self._in_flight),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        self._db.close()
+
+
+_lookup_cache: Optional[LookupCache] = None
+
+
+def get_lookup_cache() -> LookupCache:
+    """Return the process-wide lookup cache, opening it on first use."""
+    global _lookup_cache
+    if _lookup_cache is None:
+        _lookup_cache = LookupCache()
+    return _lookup_cache
+
+
+def close_lookup_cache() -> None:
+    """Close the process-wide lookup cache if it was opened."""
+    global _lookup_cache
+    if _lookup_cache is not None:
+        _lookup_cache.close()
+        _lookup_cache = None
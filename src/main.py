@@ -7,14 +7,29 @@ import os
 from mcp.server.fastmcp import FastMCP
 
 from src.config import check_credentials
+from src.lifespan import sendblue_lifespan
 from src.tools import (
     send_message,
+    send_messages_bulk,
     send_group_message,
     lookup_number_service,
+    lookup_number_services,
     send_typing_indicator,
     get_message_history,
+    list_conversations,
+    get_conversation,
+    search_messages,
+    wait_for_reply,
+    get_delivery_status,
+    await_delivery,
+    get_send_job,
+    list_send_jobs,
+    schedule_message,
+    cancel_scheduled_message,
     add_recipient_to_group,
-    upload_media_for_sending
+    add_recipients_to_group,
+    upload_media_for_sending,
+    get_api_diagnostics
 )
 
 # Set up logging
@@ -25,16 +40,30 @@ logging.basicConfig(
 logger = logging.getLogger("sendblue-mcp")
 
 # Initialize FastMCP server
-mcp = FastMCP("sendblue-mcp")
+mcp = FastMCP("sendblue-mcp", lifespan=sendblue_lifespan)
 
 # Register tools with FastMCP
 mcp.tool()(send_message)
+mcp.tool()(send_messages_bulk)
 mcp.tool()(send_group_message)
 mcp.tool()(lookup_number_service)
+mcp.tool()(lookup_number_services)
 mcp.tool()(send_typing_indicator)
 mcp.tool()(get_message_history)
+mcp.tool()(list_conversations)
+mcp.tool()(get_conversation)
+mcp.tool()(search_messages)
+mcp.tool()(wait_for_reply)
+mcp.tool()(get_delivery_status)
+mcp.tool()(await_delivery)
+mcp.tool()(get_send_job)
+mcp.tool()(list_send_jobs)
+mcp.tool()(schedule_message)
+mcp.tool()(cancel_scheduled_message)
 mcp.tool()(add_recipient_to_group)
+mcp.tool()(add_recipients_to_group)
 mcp.tool()(upload_media_for_sending)
+mcp.tool()(get_api_diagnostics)
 
 def main():
     """Main entry point for the server."""
@@ -0,0 +1,262 @@
+"""
+Persistent cache of uploaded media objects (POST /upload-media-object).
+
+Campaigns send the same image or voice note to many recipients, so the
+mediaObjectId returned for a URL is stored in SQLite and reused instead of
+uploading the file again. Entries can optionally be revalidated against the
+source: "etag" compares the ETag / Last-Modified headers from a HEAD request,
+and "hash" downloads the file and compares its SHA-256, which also lets
+different URLs serving identical bytes share one media object. Concurrent
+uploads of the same URL share a single request.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from src.client import get_http_client
+from src.config import (
+    SENDBLUE_MEDIA_CACHE_TTL,
+    SENDBLUE_MEDIA_CACHE_REVALIDATE,
+    SENDBLUE_MEDIA_CACHE_REVALIDATE_AFTER,
+    SENDBLUE_MEDIA_MAX_BYTES
+)
+from src.storage import connect
+
+logger = logging.getLogger("sendblue-mcp")
+
+REVALIDATION_MODES = ("none", "etag", "hash")
+
+# Uploads the URL and returns Sendblue's response (with mediaObjectId)
+Uploader = Callable[[str], Awaitable[Dict[str, Any]]]
+
+
+class MediaSourceError(Exception):
+    """The media URL could not be read for revalidation."""
+
+
+class MediaCache:
+    """SQLite table of media URL -> mediaObjectId with source validators."""
+
+    def __init__(
+        self,
+        filename: str = "media_cache.db",
+        ttl: float = SENDBLUE_MEDIA_CACHE_TTL,
+        revalidate: str = SENDBLUE_MEDIA_CACHE_REVALIDATE,
+        revalidate_after: float = SENDBLUE_MEDIA_CACHE_REVALIDATE_AFTER
+    ):
+        if revalidate not in REVALIDATION_MODES:
+            logger.warning(f"Unknown media cache revalidation mode '{revalidate}' - using 'none'")
+            revalidate = "none"
+        self.ttl = ttl
+        self.revalidate = revalidate
+        self.revalidate_after = revalidate_after
+        self.hits = 0
+        self.uploads = 0
+        self.revalidations = 0
+        self._in_flight: Dict[str, "asyncio.Task[Tuple[Dict[str, Any], bool]]"] = {}
+        self._db = connect(filename)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS media ("
+            " url TEXT PRIMARY KEY,"
+            " media_object_id TEXT NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " content_hash TEXT,"
+            " uploaded_at REAL NOT NULL,"
+            " validated_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_media_hash ON media (content_hash);"
+        )
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the unexpired entry for a URL."""
+        row = self._db.execute("SELECT * FROM media WHERE url = ?", (url,)).fetchone()
+        if row is None or row["uploaded_at"] + self.ttl <= time.time():
+            return None
+        return dict(row)
+
+    def _get_by_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        row = self._db.execute(
+            "SELECT * FROM media WHERE content_hash = ? AND uploaded_at > ? ORDER BY uploaded_at DESC LIMIT 1",
+            (content_hash, time.time() - self.ttl)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def put(
+        self,
+        url: str,
+        media_object_id: str,
+        validators: Optional[Dict[str, Optional[str]]] = None,
+        uploaded_at: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Store the media object for a URL, with the source validators seen at upload."""
+        now = time.time()
+        validators = validators or {}
+        entry = {
+            "url": url,
+            "media_object_id": media_object_id,
+            "etag": validators.get("etag"),
+            "last_modified": validators.get("last_modified"),
+            "content_hash": validators.get("content_hash"),
+            "uploaded_at": uploaded_at or now,
+            "validated_at": now
+        }
+        self._db.execute(
+            "INSERT OR REPLACE INTO media (url, media_object_id, etag, last_modified, content_hash,"
+            " uploaded_at, validated_at) VALUES (:url, :media_object_id, :etag, :last_modified,"
+            " :content_hash, :uploaded_at, :validated_at)",
+            entry
+        )
+        return entry
+
+    def invalidate(self, url: str) -> None:
+        """Forget the media object for a URL."""
+        self._db.execute("DELETE FROM media WHERE url = ?", (url,))
+
+    def _needs_revalidation(self, entry: Dict[str, Any]) -> bool:
+        return self.revalidate != "none" and time.time() - entry["validated_at"] >= self.revalidate_after
+
+    async def _fetch_validators(self, url: str) -> Dict[str, Optional[str]]:
+        """Read the source's current validators for the configured mode."""
+        client = get_http_client()
+        try:
+            if self.revalidate == "etag":
+                response = await client.head(url, follow_redirects=True)
+                response.raise_for_status()
+                return {
+                    "etag": response.headers.get("etag"),
+                    "last_modified": response.headers.get("last-modified")
+                }
+            digest = hashlib.sha256()
+            size = 0
+            async with client.stream("GET", url, follow_redirects=True) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > SENDBLUE_MEDIA_MAX_BYTES:
+                        raise MediaSourceError(f"Media at {url} is larger than {SENDBLUE_MEDIA_MAX_BYTES} bytes")
+                    digest.update(chunk)
+            return {"content_hash": digest.hexdigest()}
+        except httpx.HTTPError as e:
+            raise MediaSourceError(f"Could not revalidate {url}: {str(e)}") from e
+
+    @staticmethod
+    def _unchanged(entry: Dict[str, Any], validators: Dict[str, Optional[str]]) -> bool:
+        compared = False
+        for key in ("etag", "last_modified", "content_hash"):
+            if entry.get(key) and validators.get(key):
+                if entry[key] != validators[key]:
+                    return False
+                compared = True
+        # Without any validator to compare we cannot tell, so keep the entry
+        return compared or not any(validators.values())
+
+    async def resolve(
+        self,
+        url: str,
+        upload: Uploader,
+        force_refresh: bool = False
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Return the media object for a URL, uploading it if needed.
+
+        Args:
+            url (str): Public URL of the media file
+            upload: Coroutine function uploading a URL and returning Sendblue's
+                response; if it raises or returns no mediaObjectId nothing is cached
+            force_refresh (bool): Upload again even if a cached object exists
+
+        Returns:
+            Tuple[Dict[str, Any], bool]: The cache entry (or the upload response
+            if it had no mediaObjectId) and whether it came from the cache
+        """
+        if not force_refresh:
+            entry = self.get(url)
+            if entry is not None and not self._needs_revalidation(entry):
+                self.hits += 1
+                return entry, True
+
+        task = self._in_flight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._resolve(url, upload, force_refresh))
+            self._in_flight[url] = task
+            task.add_done_callback(lambda t: self._finish(url, t))
+        # Shield so one caller giving up does not cancel the upload for the others
+        return await asyncio.shield(task)
+
+    def _finish(self, url: str, task: "asyncio.Task[Tuple[Dict[str, Any], bool]]") -> None:
+        self._in_flight.pop(url, None)
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def _resolve(self, url: str, upload: Uploader, force_refresh: bool) -> Tuple[Dict[str, Any], bool]:
+        entry = None if force_refresh else self.get(url)
+        validators: Dict[str, Optional[str]] = {}
+        if self.revalidate != "none":
+            try:
+                validators = await self._fetch_validators(url)
+                self.revalidations += 1
+            except MediaSourceError as e:
+                if entry is not None:
+                    # The source is unreachable right now; keep serving the cached object
+                    logger.warning(f"{str(e)} - keeping cached media object")
+                    self.hits += 1
+                    return entry, True
+                logger.warning(str(e))
+
+        if entry is not None and self._unchanged(entry, validators):
+            self.hits += 1
+            return self.put(url, entry["media_object_id"], validators, entry["uploaded_at"]), True
+
+        content_hash = validators.get("content_hash")
+        if content_hash and not force_refresh:
+            same_content = self._get_by_hash(content_hash)
+            if same_content is not None:
+                self.hits += 1
+                return self.put(url, same_content["media_object_id"], validators, same_content["uploaded_at"]), True
+
+        self.uploads += 1
+        response = await upload(url)
+        media_object_id = response.get("mediaObjectId")
+        if not media_object_id:
+            return response, False
+        return self.put(url, media_object_id, validators), False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return cache statistics for monitoring."""
+        count = self._db.execute("SELECT COUNT(*) AS n FROM media").fetchone()["n"]
+        return {
+            "entries": count,
+            "in_flight": len(self._in_flight),
+            "hits": self.hits,
+            "uploads": self.uploads,
+            "revalidations": self.revalidations,
+            "revalidate": self.revalidate
+        }
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        self._db.close()
+
+
+_media_cache: Optional[MediaCache] = None
+
+
+def get_media_cache() -> MediaCache:
+    """Return the process-wide media cache, opening it on first use."""
+    global _media_cache
+    if _media_cache is None:
+        _media_cache = MediaCache()
+    return _media_cache
+
+
+def close_media_cache() -> None:
+    """Close the process-wide media cache if it was opened."""
+    global _media_cache
+    if _media_cache is not None:
+        _media_cache.close()
+        _media_cache = None
@@ -0,0 +1,257 @@
+"""
+Local SQLite mirror of the account's message history.
+
+The first sync scans the whole account history; later syncs ask GET
+/accounts/messages for everything after the newest mirrored message (minus a
+small overlap so late status changes are picked up). Results are upserted by
+uuid. A scan that stops early (message or time budget, or a failed page) is
+saved with the offset it reached and resumed by the next sync; offsets count
+from the newest message, so messages arriving in between only cause overlap,
+never a gap. The mirror only counts as synced once a scan has completed, and
+while it was synced recently enough get_message_history answers from it with
+indexed local queries, in the same order and with the same offsets as the
+API, instead of re-downloading pages from Sendblue.
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from src.config import (
+    SENDBLUE_MIRROR_MAX_AGE,
+    SENDBLUE_MIRROR_OVERLAP,
+    SENDBLUE_MIRROR_SYNC_MAX_MESSAGES
+)
+from src.history import fetch_all_messages
+from src.json_backend import dumps, loads
+from src.records import MessageRecord
+from src.storage import connect
+
+# Format accepted by the from_date query parameter
+FROM_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    uuid TEXT PRIMARY KEY,
+    number TEXT,
+    group_id TEXT,
+    date_ts REAL NOT NULL,
+    status TEXT,
+    is_outbound INTEGER,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_number_date ON messages (number, date_ts);
+CREATE INDEX IF NOT EXISTS idx_messages_group_date ON messages (group_id, date_ts);
+CREATE INDEX IF NOT EXISTS idx_messages_date ON messages (date_ts);
+CREATE INDEX IF NOT EXISTS idx_messages_status ON messages (status);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+
+def format_from_date(timestamp: float) -> str:
+    """Format epoch seconds as a from_date query value (UTC)."""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime(FROM_DATE_FORMAT)
+
+
+def parse_from_date(value: str) -> float:
+    """Parse a from_date value ('2023-06-15 12:00:00' or ISO 8601, UTC if no zone) to epoch seconds."""
+    parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class MessageMirror:
+    """Indexed local copy of account messages, keyed by uuid."""
+
+    def __init__(self, filename: str = "message_mirror.db", sync_max_messages: int = SENDBLUE_MIRROR_SYNC_MAX_MESSAGES):
+        self.sync_max_messages = sync_max_messages
+        self._db = connect(filename)
+        self._db.executescript(SCHEMA)
+        self._sync_lock = asyncio.Lock()
+
+    def _get_state(self, key: str) -> Optional[float]:
+        row = self._db.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_state(self, key: str, value: float) -> None:
+        self._db.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
+
+    def _clear_state(self, *keys: str) -> None:
+        self._db.executemany("DELETE FROM sync_state WHERE key = ?", [(key,) for key in keys])
+
+    def pending_scan(self) -> Optional[Dict[str, Any]]:
+        """
+        Return the scan an earlier sync stopped part way through, if any.
+
+        Returns:
+            Optional[Dict[str, Any]]: from_ts (lower date bound, None for the
+            whole history), the offset to resume at, and when the scan started
+        """
+        offset = self._get_state("scan_offset")
+        if offset is None:
+            return None
+        from_ts = self._get_state("scan_from")
+        return {
+            "from_ts": None if from_ts is None or from_ts < 0 else from_ts,
+            "offset": int(offset),
+            "started_at": self._get_state("scan_started_at")
+        }
+
+    def watermark(self) -> Optional[float]:
+        """Return the send time of the newest mirrored message."""
+        row = self._db.execute("SELECT MAX(date_ts) AS latest FROM messages").fetchone()
+        return row["latest"]
+
+    def last_synced_at(self) -> Optional[float]:
+        """Return when the mirror last completed a sync (epoch seconds)."""
+        return self._get_state("last_synced_at")
+
+    def is_fresh(self, max_age: float = SENDBLUE_MIRROR_MAX_AGE) -> bool:
+        """Return True if the last completed sync is recent enough to answer from."""
+        synced_at = self.last_synced_at()
+        return synced_at is not None and time.time() - synced_at <= max_age
+
+    def upsert(self, records: List[MessageRecord]) -> int:
+        """Insert or update message records by uuid; records without an id are skipped."""
+        rows = []
+        for record in records:
+            key = record.key
+            if key is None:
+                continue
+            rows.append((
+                key,
+                record.number or record.to_number,
+                record.group_id,
+                record.timestamp,
+                record.status,
+                None if record.is_outbound is None else int(bool(record.is_outbound)),
+                dumps(record.to_dict())
+            ))
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT INTO messages (uuid, number, group_id, date_ts, status, is_outbound, payload)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(uuid) DO UPDATE SET number = excluded.number, group_id = excluded.group_id,"
+                " date_ts = excluded.date_ts, status = excluded.status,"
+                " is_outbound = excluded.is_outbound, payload = excluded.payload",
+                rows
+            )
+        return len(rows)
+
+    async def sync(self) -> Dict[str, Any]:
+        """
+        Continue an unfinished scan, or pull messages newer than the watermark, and upsert them.
+
+        Until a first scan of the whole history has completed, every sync
+        continues it. Concurrent callers wait for the sync already in
+        progress instead of starting another one.
+
+        Returns:
+            Dict[str, Any]: Sync summary, including whether the mirror caught up
+
+        Raises:
+            httpx.HTTPError: If the first page cannot be fetched
+        """
+        if self._sync_lock.locked():
+            async with self._sync_lock:
+                return {"complete": self.is_fresh(), "coalesced": True}
+
+        async with self._sync_lock:
+            scan = self.pending_scan()
+            if scan is None:
+                watermark = self.watermark()
+                from_ts = None
+                if watermark is not None and self.last_synced_at() is not None:
+                    from_ts = max(0.0, watermark - SENDBLUE_MIRROR_OVERLAP)
+                scan = {"from_ts": from_ts, "offset": 0, "started_at": time.time()}
+
+            query_params = {}
+            if scan["from_ts"] is not None:
+                query_params["from_date"] = format_from_date(scan["from_ts"])
+            messages, summary = await fetch_all_messages(
+                query_params,
+                start_offset=scan["offset"],
+                max_messages=self.sync_max_messages
+            )
+            upserted = self.upsert(messages)
+            if summary["complete"]:
+                # Everything that existed when the scan started is mirrored
+                self._clear_state("scan_from", "scan_offset", "scan_started_at")
+                self._set_state("last_synced_at", scan["started_at"])
+            else:
+                self._set_state("scan_from", -1.0 if scan["from_ts"] is None else scan["from_ts"])
+                self._set_state("scan_offset", summary["next_offset"])
+                self._set_state("scan_started_at", scan["started_at"])
+            return {"upserted": upserted, **summary}
+
+    def query(
+        self,
+        number: Optional[str] = None,
+        from_date: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[MessageRecord]:
+        """
+        Return mirrored message records matching the filters, newest first like the API.
+
+        Args:
+            number (Optional[str]): Sender/recipient E.164 number
+            from_date (Optional[str]): Only messages sent after this date/time
+            limit (Optional[int]): Maximum number of messages to return
+            offset (int): Number of newer matching messages to skip
+        """
+        clauses = []
+        args: List[Any] = []
+        if number:
+            clauses.append("number = ?")
+            args.append(number)
+        if from_date:
+            clauses.append("date_ts > ?")
+            args.append(parse_from_date(from_date))
+        sql = "SELECT payload FROM messages"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY date_ts DESC, uuid DESC LIMIT ? OFFSET ?"
+        args.extend([limit if limit is not None else -1, offset or 0])
+        return [MessageRecord.from_api(loads(row["payload"])) for row in self._db.execute(sql, args)]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return mirror statistics for monitoring."""
+        count = self._db.execute("SELECT COUNT(*) AS n FROM messages").fetchone()["n"]
+        synced_at = self.last_synced_at()
+        scan = self.pending_scan()
+        return {
+            "messages": count,
+            "fresh": self.is_fresh(),
+            "scan_in_progress": scan is not None,
+            "scan_offset": scan["offset"] if scan is not None else None,
+            "seconds_since_sync": round(time.time() - synced_at, 1) if synced_at else None
+        }
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        self._db.close()
+
+
+_message_mirror: Optional[MessageMirror] = None
+
+
+def get_message_mirror() -> MessageMirror:
+    """Return the process-wide message mirror, opening it on first use."""
+    global _message_mirror
+    if _message_mirror is None:
+        _message_mirror = MessageMirror()
+    return _message_mirror
+
+
+def close_message_mirror() -> None:
+    """Close the process-wide message mirror if it was opened."""
+    global _message_mirror
+    if _message_mirror is not None:
+        _message_mirror.close()
+        _message_mirror = None
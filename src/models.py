@@ -1,15 +1,47 @@
 """
 Pydantic models for validating tool parameters and Sendblue API responses.
 """
-from typing import List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 from pydantic import BaseModel, Field, validator, HttpUrl
 import re
+import time
 
 from src.config import VALID_SEND_STYLES
+from src.config import SENDBLUE_BULK_MAX_CONCURRENCY, SENDBLUE_BULK_MAX_MESSAGES
+from src.config import SENDBLUE_LOOKUP_BATCH_MAX_NUMBERS, SENDBLUE_HISTORY_MAX_MESSAGES
+from src.config import SENDBLUE_WAIT_FOR_REPLY_MAX_TIMEOUT
+from src.config import SENDBLUE_AWAIT_DELIVERY_MAX_TIMEOUT, SENDBLUE_AWAIT_DELIVERY_MAX_HANDLES
+from src.config import SENDBLUE_SCHEDULER_MAX_HORIZON, SENDBLUE_SEARCH_MAX_RESULTS
+from src.records import PROJECTABLE_FIELDS, parse_timestamp
+from src.send_queue import JOB_STATUSES as SEND_JOB_STATUSES
 
 # Regular expression for E.164 phone number format
 E164_PATTERN = r"^\+[1-9]\d{1,14}$"
 
+# Largest group chat Sendblue supports
+MAX_GROUP_MEMBERS = 25
+
+# Formatting characters people commonly put inside phone numbers
+PHONE_FORMATTING_PATTERN = re.compile(r"[\s\-().]")
+
+
+def normalize_phone_number(value: str) -> str:
+    """
+    Strip common formatting from a phone number and check it is E.164.
+    
+    Spaces, dashes, dots and parentheses are removed and an international
+    "00" prefix is rewritten to "+". No country code is guessed.
+    
+    Raises:
+        ValueError: If the result is not in E.164 format
+    """
+    number = PHONE_FORMATTING_PATTERN.sub("", value or "")
+    if number.startswith("00"):
+        number = "+" + number[2:]
+    if not re.match(E164_PATTERN, number):
+        raise ValueError(f"Phone number must be in E.164 format (e.g., +19998887777)")
+    return number
+
 class SendMessageParams(BaseModel):
     """Parameters for the send_message tool."""
     to_number: str = Field(..., description="The E.164 formatted phone number of the recipient")
@@ -41,6 +73,70 @@ class SendMessageParams(BaseModel):
         return v
 
 
+class ScheduleMessageParams(SendMessageParams):
+    """Parameters for the schedule_message tool: a send_message plus when to send it."""
+    send_at: Optional[str] = Field(None, description="ISO 8601 date/time to send at (UTC if no offset)")
+    delay_seconds: Optional[float] = Field(None, description="Send this many seconds from now")
+    
+    @validator('send_at')
+    def validate_send_at(cls, v):
+        """Validate that send_at is a parseable date/time."""
+        if v is not None and parse_timestamp(v) is None:
+            raise ValueError("send_at must be an ISO 8601 date/time (e.g., '2023-06-15T12:00:00Z')")
+        return v
+    
+    @validator('delay_seconds', always=True)
+    def validate_when(cls, v, values):
+        """Validate that exactly one of send_at and delay_seconds is given, within the horizon."""
+        send_at = values.get('send_at')
+        if (send_at is None) == (v is None):
+            raise ValueError("Provide exactly one of send_at or delay_seconds")
+        delay = v if v is not None else parse_timestamp(send_at) - time.time()
+        # Allow a little clock skew for "now"
+        if delay < -60:
+            raise ValueError("send_at is in the past")
+        if delay > SENDBLUE_SCHEDULER_MAX_HORIZON:
+            raise ValueError(f"Messages can be scheduled at most {SENDBLUE_SCHEDULER_MAX_HORIZON:.0f} seconds ahead")
+        return v
+    
+    def send_at_timestamp(self) -> float:
+        """Return the send time as epoch seconds."""
+        if self.delay_seconds is not None:
+            return time.time() + self.delay_seconds
+        return parse_timestamp(self.send_at)
+
+
+class CancelScheduledMessageParams(BaseModel):
+    """Parameters for the cancel_scheduled_message tool."""
+    schedule_id: int = Field(..., description="The schedule id returned by schedule_message")
+
+
+class SendMessagesBulkParams(BaseModel):
+    """Parameters for the send_messages_bulk tool.
+
+    Individual messages are validated one at a time with SendMessageParams so
+    that a single bad entry does not reject the whole batch.
+    """
+    messages: List[Dict[str, Any]] = Field(..., description="List of send_message parameter objects")
+    max_concurrency: Optional[int] = Field(None, description="Maximum number of sends in flight at once")
+
+    @validator('messages')
+    def validate_messages(cls, v):
+        """Validate that the batch is non-empty and within the configured size."""
+        if not v:
+            raise ValueError("At least one message must be provided")
+        if len(v) > SENDBLUE_BULK_MAX_MESSAGES:
+            raise ValueError(f"A bulk send can contain at most {SENDBLUE_BULK_MAX_MESSAGES} messages")
+        return v
+
+    @validator('max_concurrency')
+    def validate_max_concurrency(cls, v):
+        """Validate that the concurrency cap is within the allowed range."""
+        if v is not None and (v < 1 or v > SENDBLUE_BULK_MAX_CONCURRENCY):
+            raise ValueError(f"max_concurrency must be between 1 and {SENDBLUE_BULK_MAX_CONCURRENCY}")
+        return v
+
+
 class SendGroupMessageParams(BaseModel):
     """Parameters for the send_group_message tool."""
     to_numbers: Optional[List[str]] = Field(None, description="Array of E.164 formatted phone numbers for group recipients (max 25)")
@@ -55,8 +151,8 @@ class SendGroupMessageParams(BaseModel):
     def validate_to_numbers(cls, v):
         """Validate that to_numbers contains valid E.164 phone numbers and has at most 25 numbers."""
         if v:
-            if len(v) > 25:
-                raise ValueError("Group chats can have at most 25 participants")
+            if len(v) > MAX_GROUP_MEMBERS:
+                raise ValueError(f"Group chats can have at most {MAX_GROUP_MEMBERS} participants")
             for number in v:
                 if not re.match(E164_PATTERN, number):
                     raise ValueError(f"Phone number {number} must be in E.164 format (e.g., +19998887777)")
@@ -98,6 +194,7 @@ class SendGroupMessageParams(BaseModel):
 class LookupNumberServiceParams(BaseModel):
     """Parameters for the lookup_number_service tool."""
     phone_number: str = Field(..., description="The E.164 formatted phone number to evaluate")
+    force_refresh: bool = Field(False, description="Bypass the local lookup cache")
     
     @validator('phone_number')
     def validate_phone_number(cls, v):
@@ -107,6 +204,33 @@ class LookupNumberServiceParams(BaseModel):
         return v
 
 
+class LookupNumberServicesParams(BaseModel):
+    """Parameters for the lookup_number_services tool.
+
+    Individual numbers are normalized and validated one at a time so that a
+    single bad entry does not reject the whole batch.
+    """
+    phone_numbers: List[str] = Field(..., description="Phone numbers to evaluate")
+    force_refresh: bool = Field(False, description="Bypass the local lookup cache")
+    max_concurrency: Optional[int] = Field(None, description="Maximum number of lookups in flight at once")
+
+    @validator('phone_numbers')
+    def validate_phone_numbers(cls, v):
+        """Validate that the batch is non-empty and within the configured size."""
+        if not v:
+            raise ValueError("At least one phone number must be provided")
+        if len(v) > SENDBLUE_LOOKUP_BATCH_MAX_NUMBERS:
+            raise ValueError(f"A batch lookup can contain at most {SENDBLUE_LOOKUP_BATCH_MAX_NUMBERS} numbers")
+        return v
+
+    @validator('max_concurrency')
+    def validate_max_concurrency(cls, v):
+        """Validate that the concurrency cap is within the allowed range."""
+        if v is not None and (v < 1 or v > SENDBLUE_BULK_MAX_CONCURRENCY):
+            raise ValueError(f"max_concurrency must be between 1 and {SENDBLUE_BULK_MAX_CONCURRENCY}")
+        return v
+
+
 class SendTypingIndicatorParams(BaseModel):
     """Parameters for the send_typing_indicator tool."""
     to_number: str = Field(..., description="The E.164 formatted phone number to send the typing indicator to")
@@ -126,6 +250,13 @@ class GetMessageHistoryParams(BaseModel):
     limit: Optional[int] = Field(50, description="Maximum number of messages per request")
     offset: Optional[int] = Field(0, description="Offset for paginating through messages")
     from_date: Optional[str] = Field(None, description="Filter messages sent after this date/time (e.g., '2023-06-15 12:00:00')")
+    fetch_all: bool = Field(False, description="Fetch every page matching the filters instead of a single page")
+    max_messages: Optional[int] = Field(None, description="With fetch_all, stop after this many messages")
+    time_budget_seconds: Optional[float] = Field(None, description="With fetch_all, stop after this many seconds")
+    fields: Optional[List[str]] = Field(None, description="Only return these message fields")
+    max_bytes: Optional[int] = Field(None, description="Approximate JSON size budget for the returned messages")
+    max_tokens: Optional[int] = Field(None, description="Approximate token budget for the returned messages")
+    max_content_chars: Optional[int] = Field(None, description="Truncate message content longer than this")
     
     @validator('contact_phone_number')
     def validate_phone_number(cls, v):
@@ -147,6 +278,274 @@ class GetMessageHistoryParams(BaseModel):
         if v and v < 0:
             raise ValueError("Offset cannot be negative")
         return v
+    
+    @validator('max_messages')
+    def validate_max_messages(cls, v):
+        """Validate that the message budget is positive and within the configured cap."""
+        if v is not None and (v < 1 or v > SENDBLUE_HISTORY_MAX_MESSAGES):
+            raise ValueError(f"max_messages must be between 1 and {SENDBLUE_HISTORY_MAX_MESSAGES}")
+        return v
+    
+    @validator('time_budget_seconds')
+    def validate_time_budget(cls, v):
+        """Validate that the time budget is positive."""
+        if v is not None and v <= 0:
+            raise ValueError("time_budget_seconds must be positive")
+        return v
+    
+    @validator('fields')
+    def validate_fields(cls, v):
+        """Validate that every requested field exists on normalized messages."""
+        if v is not None:
+            unknown = sorted(set(v) - PROJECTABLE_FIELDS)
+            if unknown:
+                raise ValueError(
+                    f"Unknown fields: {', '.join(unknown)}. "
+                    f"Valid fields: {', '.join(sorted(PROJECTABLE_FIELDS))}"
+                )
+            if not v:
+                raise ValueError("fields cannot be empty")
+        return v
+    
+    @validator('max_bytes', 'max_tokens', 'max_content_chars')
+    def validate_budget(cls, v):
+        """Validate that output budgets are positive."""
+        if v is not None and v < 1:
+            raise ValueError("Output budgets must be positive")
+        return v
+
+
+class ListConversationsParams(BaseModel):
+    """Parameters for the list_conversations tool."""
+    limit: int = Field(20, description="Maximum number of conversations to return")
+    offset: int = Field(0, description="Number of conversations to skip")
+    unread_only: bool = Field(False, description="Only conversations with unread inbound messages")
+    
+    @validator('limit')
+    def validate_limit(cls, v):
+        """Validate that limit is between 1 and 500."""
+        if v < 1 or v > 500:
+            raise ValueError("Limit must be between 1 and 500")
+        return v
+    
+    @validator('offset')
+    def validate_offset(cls, v):
+        """Validate that offset is a non-negative integer."""
+        if v < 0:
+            raise ValueError("Offset cannot be negative")
+        return v
+
+
+class GetConversationParams(BaseModel):
+    """Parameters for the get_conversation tool."""
+    phone_number: Optional[str] = Field(None, description="The E.164 formatted phone number of the contact")
+    group_id: Optional[str] = Field(None, description="The ID of the group chat")
+    limit: int = Field(50, description="Maximum number of messages to return")
+    before: Optional[str] = Field(None, description="Only messages sent before this ISO 8601 date/time")
+    mark_read: bool = Field(True, description="Reset the conversation's unread counter")
+    
+    @validator('phone_number')
+    def validate_phone_number(cls, v):
+        """Validate that phone numbers are in E.164 format."""
+        if v and not re.match(E164_PATTERN, v):
+            raise ValueError(f"Phone number must be in E.164 format (e.g., +19998887777)")
+        return v
+    
+    @validator('group_id', always=True)
+    def validate_target(cls, v, values):
+        """Validate that a contact or a group was given."""
+        if not v and not values.get('phone_number'):
+            raise ValueError("Either phone_number or group_id must be provided")
+        return v
+    
+    @validator('limit')
+    def validate_limit(cls, v):
+        """Validate that limit is between 1 and 1000."""
+        if v < 1 or v > 1000:
+            raise ValueError("Limit must be between 1 and 1000")
+        return v
+    
+    @validator('before')
+    def validate_before(cls, v):
+        """Validate that before is a parseable date/time."""
+        if v is not None and parse_timestamp(v) is None:
+            raise ValueError("before must be an ISO 8601 date/time (e.g., '2023-06-15T12:00:00Z')")
+        return v
+
+
+class SearchMessagesParams(BaseModel):
+    """Parameters for the search_messages tool."""
+    query: str = Field(..., description="Words that must all appear; \"quoted phrases\" and prefix* terms are supported")
+    contact_phone_number: Optional[str] = Field(None, description="Only messages with this E.164 phone number")
+    group_id: Optional[str] = Field(None, description="Only messages in this group chat")
+    is_outbound: Optional[bool] = Field(None, description="Only sent (true) or received (false) messages")
+    status: Optional[str] = Field(None, description="Only messages with this status, e.g. DELIVERED")
+    from_date: Optional[str] = Field(None, description="Only messages sent at or after this ISO 8601 date/time")
+    to_date: Optional[str] = Field(None, description="Only messages sent before this ISO 8601 date/time")
+    order: str = Field("newest", description="Result order: 'newest' or 'relevance'")
+    limit: int = Field(20, description="Maximum number of messages to return")
+    offset: int = Field(0, description="Number of matches to skip")
+    
+    @validator('query')
+    def validate_query(cls, v):
+        """Validate that the query is not empty."""
+        if not v.strip():
+            raise ValueError("query cannot be empty")
+        return v
+    
+    @validator('contact_phone_number')
+    def validate_phone_number(cls, v):
+        """Validate that phone numbers are in E.164 format."""
+        if v and not re.match(E164_PATTERN, v):
+            raise ValueError(f"Phone number must be in E.164 format (e.g., +19998887777)")
+        return v
+    
+    @validator('status')
+    def validate_status(cls, v):
+        """Normalize the status to Sendblue's upper-case form."""
+        return v.upper() if v else v
+    
+    @validator('from_date', 'to_date')
+    def validate_dates(cls, v):
+        """Validate that dates are parseable date/times."""
+        if v is not None and parse_timestamp(v) is None:
+            raise ValueError("Dates must be ISO 8601 date/times (e.g., '2023-06-15T12:00:00Z')")
+        return v
+    
+    @validator('order')
+    def validate_order(cls, v):
+        """Validate that the order is newest or relevance."""
+        v = v.lower()
+        if v not in ("newest", "relevance"):
+            raise ValueError("order must be 'newest' or 'relevance'")
+        return v
+    
+    @validator('limit')
+    def validate_limit(cls, v):
+        """Validate that limit is positive and within the configured cap."""
+        if v < 1 or v > SENDBLUE_SEARCH_MAX_RESULTS:
+            raise ValueError(f"Limit must be between 1 and {SENDBLUE_SEARCH_MAX_RESULTS}")
+        return v
+    
+    @validator('offset')
+    def validate_offset(cls, v):
+        """Validate that offset is a non-negative integer."""
+        if v < 0:
+            raise ValueError("Offset cannot be negative")
+        return v
+
+
+class WaitForReplyParams(BaseModel):
+    """Parameters for the wait_for_reply tool."""
+    phone_number: Optional[str] = Field(None, description="The E.164 formatted phone number of the contact")
+    group_id: Optional[str] = Field(None, description="The ID of the group chat to wait on")
+    since: Optional[str] = Field(None, description="Also accept replies already received after this ISO 8601 date/time")
+    timeout_seconds: float = Field(60.0, description="Maximum time to wait for a reply")
+    
+    @validator('phone_number')
+    def validate_phone_number(cls, v):
+        """Validate that phone numbers are in E.164 format."""
+        if v and not re.match(E164_PATTERN, v):
+            raise ValueError(f"Phone number must be in E.164 format (e.g., +19998887777)")
+        return v
+    
+    @validator('group_id', always=True)
+    def validate_target(cls, v, values):
+        """Validate that a contact or a group to wait on was given."""
+        if not v and not values.get('phone_number'):
+            raise ValueError("Either phone_number or group_id must be provided")
+        return v
+    
+    @validator('since')
+    def validate_since(cls, v):
+        """Validate that since is a parseable date/time."""
+        if v is not None and parse_timestamp(v) is None:
+            raise ValueError("since must be an ISO 8601 date/time (e.g., '2023-06-15T12:00:00Z')")
+        return v
+    
+    @validator('timeout_seconds')
+    def validate_timeout(cls, v):
+        """Validate that the timeout is positive and within the configured cap."""
+        if v <= 0 or v > SENDBLUE_WAIT_FOR_REPLY_MAX_TIMEOUT:
+            raise ValueError(f"timeout_seconds must be between 0 and {SENDBLUE_WAIT_FOR_REPLY_MAX_TIMEOUT}")
+        return v
+
+
+class GetDeliveryStatusParams(BaseModel):
+    """Parameters for the get_delivery_status tool."""
+    message_handles: List[str] = Field(..., description="Message handles returned by the send tools")
+    
+    @validator('message_handles')
+    def validate_message_handles(cls, v):
+        """Validate that the handle list is non-empty and within the configured cap."""
+        if not v:
+            raise ValueError("message_handles cannot be empty")
+        if len(v) > SENDBLUE_AWAIT_DELIVERY_MAX_HANDLES:
+            raise ValueError(f"At most {SENDBLUE_AWAIT_DELIVERY_MAX_HANDLES} message handles are allowed")
+        return v
+
+
+class AwaitDeliveryParams(GetDeliveryStatusParams):
+    """Parameters for the await_delivery tool."""
+    until: str = Field("DELIVERED", description="Status to wait for: SENT, DELIVERED or READ")
+    timeout_seconds: float = Field(60.0, description="Maximum time to wait")
+    
+    @validator('until')
+    def validate_until(cls, v):
+        """Validate that the target is a delivery status messages can reach."""
+        v = v.upper()
+        if v not in ("SENT", "DELIVERED", "READ"):
+            raise ValueError("until must be one of: SENT, DELIVERED, READ")
+        return v
+    
+    @validator('timeout_seconds')
+    def validate_timeout(cls, v):
+        """Validate that the timeout is positive and within the configured cap."""
+        if v <= 0 or v > SENDBLUE_AWAIT_DELIVERY_MAX_TIMEOUT:
+            raise ValueError(f"timeout_seconds must be between 0 and {SENDBLUE_AWAIT_DELIVERY_MAX_TIMEOUT}")
+        return v
+
+
+class GetSendJobParams(BaseModel):
+    """Parameters for the get_send_job tool."""
+    job_id: str = Field(..., description="The job id returned when the message was enqueued")
+    
+    @validator('job_id')
+    def validate_job_id(cls, v):
+        """Validate that the job id is not empty."""
+        if not v.strip():
+            raise ValueError("job_id cannot be empty")
+        return v.strip()
+
+
+class ListSendJobsParams(BaseModel):
+    """Parameters for the list_send_jobs tool."""
+    status: Optional[str] = Field(None, description="Only jobs in this state")
+    limit: int = Field(50, description="Maximum number of jobs to return")
+    offset: int = Field(0, description="Number of jobs to skip")
+    
+    @validator('status')
+    def validate_status(cls, v):
+        """Validate that the status is a known job state."""
+        if v is not None:
+            v = v.lower()
+            if v not in SEND_JOB_STATUSES:
+                raise ValueError(f"status must be one of: {', '.join(SEND_JOB_STATUSES)}")
+        return v
+    
+    @validator('limit')
+    def validate_limit(cls, v):
+        """Validate that limit is between 1 and 500."""
+        if v < 1 or v > 500:
+            raise ValueError("Limit must be between 1 and 500")
+        return v
+    
+    @validator('offset')
+    def validate_offset(cls, v):
+        """Validate that offset is a non-negative integer."""
+        if v < 0:
+            raise ValueError("Offset cannot be negative")
+        return v
 
 
 class AddRecipientToGroupParams(BaseModel):
@@ -162,6 +561,33 @@ class AddRecipientToGroupParams(BaseModel):
         return v
 
 
+class AddRecipientsToGroupParams(BaseModel):
+    """Parameters for the add_recipients_to_group tool."""
+    group_id: str = Field(..., description="The ID (uuid) of the group to which the recipients will be added")
+    recipient_numbers: List[str] = Field(..., description="E.164 formatted phone numbers of the recipients to add (max 25)")
+    max_concurrency: Optional[int] = Field(None, description="Maximum number of modify-group requests in flight at once")
+    
+    @validator('recipient_numbers')
+    def validate_recipient_numbers(cls, v):
+        """Validate every number in one pass, drop duplicates and enforce the group size cap."""
+        if not v:
+            raise ValueError("At least one recipient number must be provided")
+        invalid = [number for number in v if not re.match(E164_PATTERN, number)]
+        if invalid:
+            raise ValueError(f"Phone numbers must be in E.164 format (e.g., +19998887777): {', '.join(invalid)}")
+        numbers = list(dict.fromkeys(v))
+        if len(numbers) > MAX_GROUP_MEMBERS:
+            raise ValueError(f"Group chats can have at most {MAX_GROUP_MEMBERS} participants")
+        return numbers
+    
+    @validator('max_concurrency')
+    def validate_max_concurrency(cls, v):
+        """Validate that the concurrency cap is within the allowed range."""
+        if v is not None and (v < 1 or v > SENDBLUE_BULK_MAX_CONCURRENCY):
+            raise ValueError(f"max_concurrency must be between 1 and {SENDBLUE_BULK_MAX_CONCURRENCY}")
+        return v
+
+
 class UploadMediaParams(BaseModel):
     """Parameters for the upload_media_for_sending tool."""
     media_file_url: str = Field(..., description="The publicly accessible URL of the media file")
\ No newline at end of file
@@ -0,0 +1,266 @@
+"""
+Adaptive rate limiting for outbound Sendblue API traffic.
+
+Every request made through make_sendblue_api_request passes through the
+limiter for its endpoint. Each endpoint has its own budget made of:
+
+- a token bucket that paces the request rate, and
+- a concurrency window that shrinks multiplicatively on 429/5xx responses and
+  grows back additively while responses are healthy (AIMD).
+
+A Retry-After header pauses the endpoint's bucket until the server says it
+is safe to send again.
+"""
+import asyncio
+import email.utils
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from src.config import (
+    SENDBLUE_RATE_LIMIT_ENABLED,
+    SENDBLUE_RATE_LIMITS,
+    SENDBLUE_RATE_MAX_CONCURRENCY,
+    SENDBLUE_RATE_MIN_CONCURRENCY
+)
+
+# Status codes that signal Sendblue is overloaded or throttling us
+THROTTLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Minimum pause applied on a 429 that carries no Retry-After header
+DEFAULT_THROTTLE_PAUSE = 1.0
+
+# Minimum time between two multiplicative decreases, so one burst of
+# failures only halves the window once
+DECREASE_COOLDOWN = 1.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given either in seconds or as an HTTP date.
+
+    Args:
+        value (Optional[str]): The raw header value
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class TokenBucket:
+    """Token bucket that refills continuously at a fixed rate."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for the given number of seconds."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+
+class AdaptiveLimiter:
+    """Rate and concurrency budget for a single Sendblue endpoint."""
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        max_concurrency: int = SENDBLUE_RATE_MAX_CONCURRENCY,
+        min_concurrency: int = SENDBLUE_RATE_MIN_CONCURRENCY,
+        increase: float = 1.0,
+        decrease: float = 0.5
+    ):
+        self.name = name
+        self.bucket = TokenBucket(rate)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.increase = increase
+        self.decrease = decrease
+        self.window = float(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.throttled = 0
+        self.completed = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < max(self.min_concurrency, int(self.window))
+
+    async def acquire(self) -> None:
+        """Wait for a free slot in the concurrency window and a rate token."""
+        self.waiting += 1
+        try:
+            async with self._condition:
+                await self._condition.wait_for(self._has_capacity)
+                self.in_flight += 1
+        finally:
+            self.waiting -= 1
+        try:
+            await self.bucket.acquire()
+        except BaseException:
+            await self.release()
+            raise
+
+    async def release(
+        self,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None
+    ) -> None:
+        """
+        Free a slot and adapt the budget to the response outcome.
+
+        Args:
+            status_code (Optional[int]): HTTP status of the response, or None if
+                no response was received (the outcome is then treated as neutral)
+            retry_after (Optional[float]): Parsed Retry-After header, in seconds
+        """
+        self.record(status_code, retry_after)
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def record(self, status_code: Optional[int], retry_after: Optional[float] = None) -> None:
+        """Apply additive increase or multiplicative decrease for one response."""
+        if status_code is None:
+            return
+        self.completed += 1
+        if status_code in THROTTLE_STATUS_CODES:
+            self.throttled += 1
+            now = time.monotonic()
+            if now - self._last_decrease >= DECREASE_COOLDOWN:
+                self.window = max(float(self.min_concurrency), self.window * self.decrease)
+                self._last_decrease = now
+            if retry_after is not None:
+                self.bucket.pause(retry_after)
+            elif status_code == 429:
+                self.bucket.pause(DEFAULT_THROTTLE_PAUSE)
+        elif status_code < 400:
+            # Grow by roughly `increase` slots per full window of healthy responses
+            self.window = min(
+                float(self.max_concurrency),
+                self.window + self.increase / max(self.window, 1.0)
+            )
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator["LimiterSlot"]:
+        """Hold a slot for the duration of one request."""
+        await self.acquire()
+        slot = LimiterSlot()
+        try:
+            yield slot
+        finally:
+            await self.release(slot.status_code, slot.retry_after)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the current limiter state for monitoring."""
+        paused_for = self.bucket.paused_until - time.monotonic()
+        return {
+            "rate_per_second": self.bucket.rate,
+            "tokens": round(self.bucket.tokens, 2),
+            "concurrency_window": round(self.window, 2),
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "throttled_responses": self.throttled,
+            "completed_responses": self.completed,
+            "paused_for_seconds": round(paused_for, 3) if paused_for > 0 else 0.0
+        }
+
+
+class LimiterSlot:
+    """Outcome of a request, filled in by the caller while holding a slot."""
+
+    def __init__(self):
+        self.status_code: Optional[int] = None
+        self.retry_after: Optional[float] = None
+
+    def record(self, status_code: int, retry_after: Optional[float] = None) -> None:
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class RateLimiterRegistry:
+    """Maps Sendblue endpoints to their individual budgets."""
+
+    def __init__(self, limits: Dict[str, float], enabled: bool = True):
+        self.enabled = enabled
+        self.limits = limits
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+
+    @staticmethod
+    def budget_name(endpoint: str) -> str:
+        """Return the budget key for an endpoint, e.g. '/send-message' -> 'send-message'."""
+        name = endpoint.split("?", 1)[0].strip("/")
+        return name if name in SENDBLUE_RATE_LIMITS else "default"
+
+    def for_endpoint(self, endpoint: str) -> AdaptiveLimiter:
+        """Return (creating on first use) the limiter for an endpoint."""
+        name = self.budget_name(endpoint)
+        limiter = self._limiters.get(name)
+        if limiter is None:
+            limiter = AdaptiveLimiter(name, self.limits.get(name, self.limits["default"]))
+            self._limiters[name] = limiter
+        return limiter
+
+    @asynccontextmanager
+    async def slot(self, endpoint: str) -> AsyncIterator[LimiterSlot]:
+        """Hold a slot in the endpoint's budget, or a no-op slot if limiting is disabled."""
+        if not self.enabled:
+            yield LimiterSlot()
+            return
+        async with self.for_endpoint(endpoint).slot() as slot:
+            yield slot
+
+    def reset(self) -> None:
+        """Drop all limiter state; called on shutdown and between tests, since waiters belong to one event loop."""
+        self._limiters.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the state of every budget that has seen traffic."""
+        return {
+            "enabled": self.enabled,
+            "budgets": {name: limiter.snapshot() for name, limiter in self._limiters.items()}
+        }
+
+
+# Process-wide registry used by the API client
+rate_limiters = RateLimiterRegistry(SENDBLUE_RATE_LIMITS, enabled=SENDBLUE_RATE_LIMIT_ENABLED)
@@ -0,0 +1,409 @@
+"""
+Compact, normalized message records for message history results.
+
+Messages from /accounts/messages (and webhook payloads) are inconsistent: the
+send time may be an ISO `date` string or `date_sent: {_seconds, _nanoseconds}`,
+and several fields come in both camelCase and snake_case (sendStyle /
+send_style, type / message_type, callbackURL / callback_url, allowSMS /
+allow_sms). MessageRecord unifies them into one slotted object with epoch
+timestamps for filtering, sorting and field projection. Phone numbers,
+statuses and other low-cardinality strings are interned so large histories
+share one copy of each value.
+
+Each record also points to the key layout of the message it was built from
+(key order, which alias was used, how dates were written and which keys held
+empty values). Layouts are shared between messages of the same shape, and
+to_dict uses them to give back the message with Sendblue's own keys and date
+strings.
+"""
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.json_backend import dumps_bytes
+
+# Source keys for each normalized field, in order of preference
+_ALIASES = {
+    "send_style": ("send_style", "sendStyle"),
+    "message_type": ("message_type", "type"),
+    "callback_url": ("callback_url", "callbackURL"),
+    "allow_sms": ("allow_sms", "allowSMS")
+}
+
+# Fields copied as-is; values of the interned ones repeat across messages
+_INTERNED_FIELDS = (
+    "number", "from_number", "to_number", "group_id", "status",
+    "accountEmail", "phoneID", "plan"
+)
+_PLAIN_FIELDS = (
+    "uuid", "message_handle", "content", "media_url", "is_outbound",
+    "error_code", "error_message", "error_detail", "was_downgraded",
+    "row_id", "opted_out", "participants"
+)
+
+# Source keys of the send and update times, and the record field each sets
+_DATE_KEYS = {
+    "timestamp": "timestamp",
+    "date_sent": "timestamp",
+    "date": "timestamp",
+    "updated_timestamp": "updated_timestamp",
+    "date_updated": "updated_timestamp"
+}
+
+# Every source key handled explicitly; anything else is kept in `extra`
+_KNOWN_KEYS = frozenset(
+    tuple(_DATE_KEYS)
+    + _INTERNED_FIELDS
+    + _PLAIN_FIELDS
+    + tuple(key for aliases in _ALIASES.values() for key in aliases)
+)
+
+# Record field for each source key (extra keys map to None)
+_SOURCE_FIELDS: Dict[str, str] = dict(
+    {field: field for field in _INTERNED_FIELDS + _PLAIN_FIELDS},
+    **{alias: field for field, aliases in _ALIASES.items() for alias in aliases},
+    **_DATE_KEYS
+)
+
+# How a date was written, so it can be written back the same way
+_DATE_ISO = "iso"
+_DATE_SECONDS = "seconds"
+_DATE_NUMBER = "number"
+# A key whose value was empty (None, "" or []), kept as-is
+_EMPTY = "empty"
+
+# Distinct layouts kept for sharing; messages of other shapes get their own
+MAX_SHARED_LAYOUTS = 1024
+
+
+def _intern(value: Any) -> Any:
+    if isinstance(value, str):
+        return sys.intern(value) if value else None
+    return value
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    """
+    Convert a Sendblue date value to epoch seconds.
+
+    Accepts ISO 8601 strings, `{_seconds, _nanoseconds}` objects and numbers.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict) and "_seconds" in value:
+        return value["_seconds"] + value.get("_nanoseconds", 0) / 1e9
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    return None
+
+
+def format_timestamp(timestamp: Optional[float]) -> Optional[str]:
+    """Format epoch seconds as an ISO 8601 UTC string with milliseconds."""
+    if timestamp is None:
+        return None
+    moment = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == []
+
+
+def _date_form(value: Any) -> str:
+    if isinstance(value, dict):
+        return _DATE_SECONDS
+    if isinstance(value, (int, float)):
+        return _DATE_NUMBER
+    return _DATE_ISO
+
+
+def _write_date(timestamp: float, form: str) -> Any:
+    if form == _DATE_SECONDS:
+        seconds = int(timestamp // 1)
+        return {"_seconds": seconds, "_nanoseconds": int(round((timestamp - seconds) * 1e9))}
+    if form == _DATE_NUMBER:
+        return timestamp
+    return format_timestamp(timestamp)
+
+
+class _Layout:
+    """Source keys of one message shape: (key, record field, date form or _EMPTY, empty value)."""
+
+    __slots__ = ("entries", "fields")
+
+    def __init__(self, entries: Tuple[Tuple[str, Optional[str], Optional[str], Any], ...]):
+        self.entries = entries
+        self.fields = frozenset(field for _, field, _, _ in entries if field is not None)
+
+
+_layouts: Dict[Tuple[Tuple[str, Optional[str], Optional[str], Any], ...], _Layout] = {}
+
+
+def _layout_of(raw: Dict[str, Any]) -> _Layout:
+    entries = []
+    for key, value in raw.items():
+        field = _SOURCE_FIELDS.get(key)
+        if _is_empty(value):
+            # Lists are not hashable; an empty one is written back as a new list
+            entries.append((key, field, _EMPTY, () if value == [] else value))
+        elif key in _DATE_KEYS:
+            entries.append((key, field, _date_form(value), None))
+        else:
+            entries.append((key, field, None, None))
+    signature = tuple(entries)
+    layout = _layouts.get(signature)
+    if layout is None:
+        layout = _Layout(signature)
+        if len(_layouts) < MAX_SHARED_LAYOUTS:
+            _layouts[signature] = layout
+    return layout
+
+
+@dataclass(slots=True)
+class MessageRecord:
+    """One message with unified field names and epoch timestamps."""
+    uuid: Optional[str] = None
+    message_handle: Optional[str] = None
+    timestamp: float = 0.0
+    updated_timestamp: Optional[float] = None
+    number: Optional[str] = None
+    from_number: Optional[str] = None
+    to_number: Optional[str] = None
+    group_id: Optional[str] = None
+    content: Optional[str] = None
+    media_url: Optional[str] = None
+    status: Optional[str] = None
+    is_outbound: Optional[bool] = None
+    send_style: Optional[str] = None
+    message_type: Optional[str] = None
+    error_code: Optional[int] = None
+    error_message: Optional[str] = None
+    error_detail: Any = None
+    was_downgraded: Optional[bool] = None
+    allow_sms: Optional[bool] = None
+    callback_url: Optional[str] = None
+    accountEmail: Optional[str] = None
+    phoneID: Optional[str] = None
+    row_id: Optional[str] = None
+    plan: Optional[str] = None
+    opted_out: Optional[bool] = None
+    participants: Optional[List[str]] = None
+    extra: Optional[Dict[str, Any]] = None
+    # Key layout of the source message, and dates written in a way that
+    # cannot be reproduced from the parsed time: key -> (time, original)
+    layout: Optional[_Layout] = None
+    original_dates: Optional[Dict[str, Tuple[float, Any]]] = None
+
+    @property
+    def key(self) -> Optional[str]:
+        """Identifier used to deduplicate the message."""
+        return self.uuid or self.message_handle
+
+    @classmethod
+    def from_api(cls, raw: Dict[str, Any]) -> "MessageRecord":
+        """Build a record from a raw API/webhook message or a serialized record."""
+        timestamp = parse_timestamp(raw.get("timestamp"))
+        if timestamp is None:
+            timestamp = parse_timestamp(raw.get("date_sent"))
+        if timestamp is None:
+            timestamp = parse_timestamp(raw.get("date"))
+        updated = parse_timestamp(raw.get("updated_timestamp"))
+        if updated is None:
+            updated = parse_timestamp(raw.get("date_updated"))
+
+        record = cls(timestamp=timestamp or 0.0, updated_timestamp=updated, layout=_layout_of(raw))
+        for key, field in _DATE_KEYS.items():
+            value = raw.get(key)
+            if _is_empty(value):
+                continue
+            parsed = getattr(record, field)
+            if parsed is None or _write_date(parsed, _date_form(value)) != value:
+                if record.original_dates is None:
+                    record.original_dates = {}
+                record.original_dates[key] = (parsed, value)
+        for field in _INTERNED_FIELDS:
+            value = raw.get(field)
+            if value is not None:
+                setattr(record, field, _intern(value))
+        for field in _PLAIN_FIELDS:
+            value = raw.get(field)
+            if value is not None and value != "" and value != []:
+                setattr(record, field, value)
+        for field, aliases in _ALIASES.items():
+            for alias in aliases:
+                value = raw.get(alias)
+                if value is not None and value != "":
+                    setattr(record, field, _intern(value))
+                    break
+
+        if len(raw) > len(_KNOWN_KEYS) or not _KNOWN_KEYS.issuperset(raw):
+            extra = {key: value for key, value in raw.items() if key not in _KNOWN_KEYS}
+            if extra:
+                record.extra = extra
+        return record
+
+    def _write_source_date(self, key: str, field: str, form: str) -> Any:
+        value = getattr(self, field)
+        original = self.original_dates.get(key) if self.original_dates else None
+        if original is not None and original[0] == value:
+            return original[1]
+        return _write_date(value, form) if value is not None else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize as the message Sendblue sent: the same keys, in the same
+        order, with the same date strings and empty values.
+
+        Fields set after the message was received (e.g. a status callback on
+        a message that had no status) are added under their normalized name.
+        """
+        layout = self.layout
+        if layout is None:
+            return self.normalized()
+        result: Dict[str, Any] = {}
+        for key, field, form, empty in layout.entries:
+            if field is None:
+                result[key] = self.extra.get(key) if self.extra else None
+            elif form == _EMPTY:
+                value = None if key in _DATE_KEYS else getattr(self, field)
+                if value is not None:
+                    result[key] = value
+                else:
+                    result[key] = [] if empty == () else empty
+            elif form is not None:
+                result[key] = self._write_source_date(key, field, form)
+            else:
+                result[key] = getattr(self, field)
+        for field in _OUTPUT_FIELDS:
+            if field in layout.fields or field == "timestamp":
+                continue
+            value = getattr(self, field)
+            if value is not None:
+                result[field] = value
+        if "timestamp" not in layout.fields and self.timestamp:
+            result["date"] = format_timestamp(self.timestamp)
+        if "updated_timestamp" not in layout.fields and self.updated_timestamp is not None:
+            result["date_updated"] = format_timestamp(self.updated_timestamp)
+        return result
+
+    def normalized(self) -> Dict[str, Any]:
+        """Serialize with unified field names, an ISO `date` and epoch `timestamp`, omitting empty fields."""
+        result: Dict[str, Any] = {}
+        for field in _OUTPUT_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                result[field] = value
+        result["date"] = format_timestamp(self.timestamp)
+        if self.updated_timestamp is not None:
+            result["date_updated"] = format_timestamp(self.updated_timestamp)
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+    def project(self, fields: Sequence[str]) -> Dict[str, Any]:
+        """
+        Serialize only the requested fields, omitting empty ones.
+
+        Fields are named as in normalized(): snake_case, an ISO `date` and an
+        epoch `timestamp`; Sendblue's camelCase names are accepted as aliases
+        and returned under the name asked for.
+        """
+        result: Dict[str, Any] = {}
+        for field in fields:
+            if field == "date":
+                value = format_timestamp(self.timestamp)
+            elif field == "date_updated":
+                value = format_timestamp(self.updated_timestamp)
+            else:
+                value = getattr(self, _PROJECTION_ALIASES.get(field, field))
+            if value is not None:
+                result[field] = value
+        return result
+
+
+# Slots serialized by normalized() (dates are formatted separately)
+_OUTPUT_FIELDS = tuple(
+    field for field in MessageRecord.__slots__
+    if field not in ("updated_timestamp", "extra", "layout", "original_dates")
+)
+
+# Sendblue's names for normalized fields, accepted by project()
+_PROJECTION_ALIASES = {
+    alias: field for field, aliases in _ALIASES.items() for alias in aliases if alias != field
+}
+
+# Output fields that can be requested by name
+PROJECTABLE_FIELDS = frozenset(_OUTPUT_FIELDS + ("date", "date_updated") + tuple(_PROJECTION_ALIASES))
+
+# Rough bytes-per-token ratio used to turn a token budget into a byte budget
+BYTES_PER_TOKEN = 4
+
+
+def normalize_messages(raw_messages: Iterable[Dict[str, Any]]) -> List[MessageRecord]:
+    """Convert raw messages to records."""
+    return [MessageRecord.from_api(raw) for raw in raw_messages]
+
+
+def serialize_messages(records: Iterable[MessageRecord]) -> List[Dict[str, Any]]:
+    """Serialize records to the tool's JSON output."""
+    return [record.to_dict() for record in records]
+
+
+def serialize_within_budget(
+    records: Sequence[MessageRecord],
+    fields: Optional[Sequence[str]] = None,
+    max_bytes: Optional[int] = None,
+    max_content_chars: Optional[int] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Serialize records, keeping the newest ones that fit a byte budget.
+
+    Records are ranked by timestamp, so API pages (newest first) and
+    fetch_all results (oldest first) both keep their newest messages.
+
+    Args:
+        records (Sequence[MessageRecord]): Records in any date order
+        fields (Optional[Sequence[str]]): Output fields to keep; all fields if omitted
+        max_bytes (Optional[int]): Budget for the compact JSON size of the messages
+        max_content_chars (Optional[int]): Truncate longer content to this many characters
+
+    Returns:
+        Tuple[List[Dict[str, Any]], Dict[str, Any]]: The kept messages (in
+        input order) and a summary with how many were omitted or truncated
+        and, with a budget, the bytes used
+    """
+    kept: Dict[int, Dict[str, Any]] = {}
+    truncated = 0
+    used = 2
+    newest_first = sorted(range(len(records)), key=lambda i: records[i].timestamp, reverse=True)
+    for index in newest_first:
+        record = records[index]
+        message = record.project(fields) if fields else record.to_dict()
+        content = message.get("content")
+        was_truncated = (
+            max_content_chars is not None
+            and isinstance(content, str)
+            and len(content) > max_content_chars
+        )
+        if was_truncated:
+            message["content"] = content[:max_content_chars] + "\u2026"
+        if max_bytes is not None:
+            size = len(dumps_bytes(message)) + 1
+            if used + size > max_bytes:
+                break
+            used += size
+        truncated += was_truncated
+        kept[index] = message
+    summary = {"omitted": len(records) - len(kept), "truncated": truncated}
+    if max_bytes is not None:
+        summary["bytes"] = used
+    return [kept[index] for index in sorted(kept)], summary
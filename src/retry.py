@@ -0,0 +1,89 @@
+"""
+Retry policy for Sendblue API requests.
+
+Decides whether a failed request may be repeated and how long to wait before
+the next attempt. Reads (GET) and typing indicators are safe to repeat, so
+they are retried on any transient failure. Sends are not idempotent: they are
+only retried when the failure is known to have happened before Sendblue
+accepted the request (connection could not be established, no pooled
+connection was available, or Sendblue rejected it with 429 before processing).
+"""
+import random
+from typing import Optional
+
+import httpx
+
+from src.config import (
+    SENDBLUE_RETRY_MAX_ATTEMPTS,
+    SENDBLUE_RETRY_BASE_DELAY,
+    SENDBLUE_RETRY_MAX_DELAY,
+    SENDBLUE_RETRY_DEADLINE
+)
+
+# POST endpoints that can be repeated without side effects
+IDEMPOTENT_POST_ENDPOINTS = {"/send-typing-indicator"}
+
+# Transport failures raised before any bytes of the request reached Sendblue
+PRE_SEND_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# Status codes worth retrying for idempotent requests
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Status codes that mean Sendblue rejected the request without processing it
+REJECTED_BEFORE_PROCESSING_STATUS_CODES = {429}
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, bounded by a total deadline."""
+
+    def __init__(
+        self,
+        max_attempts: int = SENDBLUE_RETRY_MAX_ATTEMPTS,
+        base_delay: float = SENDBLUE_RETRY_BASE_DELAY,
+        max_delay: float = SENDBLUE_RETRY_MAX_DELAY,
+        deadline: float = SENDBLUE_RETRY_DEADLINE
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Return the delay before the next attempt.
+
+        Args:
+            attempt (int): Number of attempts made so far (1 after the first failure)
+            retry_after (Optional[float]): Server-provided Retry-After, in seconds
+
+        Returns:
+            float: Seconds to sleep; never shorter than retry_after
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        delay = random.uniform(0, ceiling)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+def is_idempotent(method: str, endpoint: str) -> bool:
+    """Return True if repeating the request cannot cause a duplicate side effect."""
+    return method.upper() == "GET" or endpoint in IDEMPOTENT_POST_ENDPOINTS
+
+
+def is_retryable_exception(error: Exception, idempotent: bool) -> bool:
+    """Return True if a transport-level failure may be retried."""
+    if isinstance(error, PRE_SEND_ERRORS):
+        return True
+    return idempotent and isinstance(error, httpx.TransportError)
+
+
+def is_retryable_status(status_code: int, idempotent: bool) -> bool:
+    """Return True if an HTTP error status may be retried."""
+    if idempotent:
+        return status_code in RETRYABLE_STATUS_CODES
+    return status_code in REJECTED_BEFORE_PROCESSING_STATUS_CODES
+
+
+# Policy used by the API client
+default_retry_policy = RetryPolicy()
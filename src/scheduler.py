@@ -0,0 +1,215 @@
+"""
+Scheduler for messages that should be sent at a later time.
+
+Scheduled sends are stored in the send queue's database and mirrored in an
+in-memory min-heap of (send_at, id), so scheduling and firing cost O(log n)
+even with hundreds of thousands of pending messages. A single timer task
+sleeps until the earliest entry is due, then moves due entries into the send
+queue in batches. Each batch is claimed and enqueued in one transaction, and
+batches are paced so a burst scheduled for the same moment does not flood the
+queue. Pending entries are reloaded into the heap on startup.
+"""
+import asyncio
+import contextlib
+import heapq
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config import (
+    SENDBLUE_SCHEDULER_BATCH_SIZE,
+    SENDBLUE_SCHEDULER_RELEASE_RATE
+)
+from src.json_backend import dumps, loads
+from src.records import format_timestamp
+from src.send_queue import SendQueue
+
+logger = logging.getLogger("sendblue-mcp")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scheduled (
+    id INTEGER PRIMARY KEY,
+    send_at REAL NOT NULL,
+    endpoint TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    job_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_scheduled_status_send_at ON scheduled (status, send_at);
+"""
+
+# Longest single sleep, so clock adjustments are picked up eventually
+MAX_SLEEP = 60.0
+
+
+class MessageScheduler:
+    """Heap-ordered timer that releases scheduled sends into the send queue."""
+
+    def __init__(
+        self,
+        queue: SendQueue,
+        batch_size: int = SENDBLUE_SCHEDULER_BATCH_SIZE,
+        release_rate: float = SENDBLUE_SCHEDULER_RELEASE_RATE
+    ):
+        self.queue = queue
+        self.batch_size = batch_size
+        self.release_rate = release_rate
+        self.released = 0
+        self._db = queue.db
+        self._db.executescript(SCHEMA)
+        self._heap: List[Tuple[float, int]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def load(self) -> int:
+        """Rebuild the heap from pending entries on disk."""
+        rows = self._db.execute("SELECT send_at, id FROM scheduled WHERE status = 'pending'").fetchall()
+        self._heap = [(row["send_at"], row["id"]) for row in rows]
+        heapq.heapify(self._heap)
+        return len(self._heap)
+
+    def schedule(self, endpoint: str, payload: Dict[str, Any], send_at: float) -> int:
+        """
+        Persist a send for later and add it to the heap.
+
+        Returns:
+            int: The schedule id
+        """
+        cursor = self._db.execute(
+            "INSERT INTO scheduled (send_at, endpoint, payload, status, created_at) VALUES (?, ?, ?, 'pending', ?)",
+            (send_at, endpoint, dumps(payload), time.time())
+        )
+        schedule_id = cursor.lastrowid
+        heapq.heappush(self._heap, (send_at, schedule_id))
+        # Only an entry that became the earliest changes when the timer must fire
+        if self._heap[0][1] == schedule_id:
+            self._wakeup.set()
+        return schedule_id
+
+    def cancel(self, schedule_id: int) -> bool:
+        """
+        Cancel a pending send. The heap entry is dropped lazily when it comes due.
+
+        Returns:
+            bool: False if the send was not pending (unknown, released or cancelled)
+        """
+        cursor = self._db.execute(
+            "UPDATE scheduled SET status = 'cancelled' WHERE id = ? AND status = 'pending'",
+            (schedule_id,)
+        )
+        return cursor.rowcount > 0
+
+    def get(self, schedule_id: int) -> Optional[Dict[str, Any]]:
+        """Return a scheduled send by id."""
+        row = self._db.execute("SELECT * FROM scheduled WHERE id = ?", (schedule_id,)).fetchone()
+        if row is None:
+            return None
+        entry = dict(row)
+        entry["payload"] = loads(entry["payload"])
+        return entry
+
+    def release_due(self, now: Optional[float] = None) -> int:
+        """
+        Move up to one batch of due entries into the send queue.
+
+        Returns:
+            int: Number of sends enqueued
+        """
+        now = now or time.time()
+        ids = []
+        while self._heap and self._heap[0][0] <= now and len(ids) < self.batch_size:
+            ids.append(heapq.heappop(self._heap)[1])
+        if not ids:
+            return 0
+
+        placeholders = ",".join("?" * len(ids))
+        released = 0
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            rows = self._db.execute(
+                f"SELECT id, endpoint, payload FROM scheduled WHERE id IN ({placeholders}) AND status = 'pending'",
+                ids
+            ).fetchall()
+            for row in rows:
+                job_id = self.queue.insert_job(row["endpoint"], loads(row["payload"]))
+                self._db.execute(
+                    "UPDATE scheduled SET status = 'released', job_id = ? WHERE id = ?",
+                    (job_id, row["id"])
+                )
+                released += 1
+        if released:
+            self.released += released
+            self.queue.notify()
+        return released
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            if self._heap and self._heap[0][0] <= now:
+                released = self.release_due(now)
+                if released and self.release_rate > 0:
+                    # Pace batches so due bursts enter the queue at the release rate
+                    await asyncio.sleep(released / self.release_rate)
+                continue
+            delay = MAX_SLEEP if not self._heap else min(MAX_SLEEP, self._heap[0][0] - now)
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+
+    def start(self) -> None:
+        """Load pending entries and start the timer task."""
+        if not self.queue.persistent:
+            logger.warning(
+                "Scheduled messages are kept in memory (SENDBLUE_DATA_DIR is not set or not writable); "
+                "pending scheduled sends will be lost when the server stops"
+            )
+        pending = self.load()
+        if pending:
+            logger.info(f"Loaded {pending} scheduled send(s)")
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop the timer task; pending entries stay on disk."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return scheduler statistics for monitoring."""
+        pending = self._db.execute(
+            "SELECT COUNT(*) AS n, MIN(send_at) AS next_send_at FROM scheduled WHERE status = 'pending'"
+        ).fetchone()
+        return {
+            "pending": pending["n"],
+            "next_send_at": format_timestamp(pending["next_send_at"]),
+            "heap_entries": len(self._heap),
+            "released": self.released,
+            "persistent": self.queue.persistent
+        }
+
+
+_scheduler: Optional[MessageScheduler] = None
+
+
+def get_scheduler() -> Optional[MessageScheduler]:
+    """Return the running scheduler, if the send queue was started."""
+    return _scheduler
+
+
+def start_scheduler(queue: SendQueue) -> MessageScheduler:
+    """Start the process-wide scheduler on top of the send queue."""
+    global _scheduler
+    _scheduler = MessageScheduler(queue)
+    _scheduler.start()
+    return _scheduler
+
+
+async def stop_scheduler() -> None:
+    """Stop the process-wide scheduler."""
+    global _scheduler
+    if _scheduler is not None:
+        await _scheduler.stop()
+        _scheduler = None
@@ -0,0 +1,286 @@
+"""
+Local full-text search over message content (SQLite FTS5).
+
+Messages seen by get_message_history and inbound messages from the webhook
+receiver are upserted by uuid into a messages table, and their content is
+kept in an FTS5 index (an external-content table maintained by triggers, so
+status-only updates do not touch it). search_messages then answers with one
+indexed query instead of paging through the whole account history.
+
+Row ids encode the send time (milliseconds, plus hash bits of the uuid), so
+FTS5 can return the newest matches by walking its index backwards and stop
+after one page, even for common words, and date ranges become row id
+bounds. The contact number and group_id are also indexed as an FTS "scope"
+column (weighted zero in ranking), so a search within a conversation
+intersects two posting lists instead of ranking every match in the account.
+Direction and status are checked on the matched rows.
+
+Queries are plain words that must all appear, in any order; "double quoted"
+text must appear as a phrase and a trailing * matches word prefixes.
+"""
+import hashlib
+import re
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.json_backend import dumps, loads
+from src.records import MessageRecord
+from src.storage import connect
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    uuid TEXT NOT NULL UNIQUE,
+    number TEXT,
+    group_id TEXT,
+    date_ts REAL NOT NULL,
+    status TEXT,
+    is_outbound INTEGER,
+    content TEXT,
+    scope TEXT,
+    payload TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content,
+    scope,
+    content='messages',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, content, scope) VALUES (new.id, new.content, new.scope);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content, scope) VALUES ('delete', old.id, old.content, old.scope);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content, scope ON messages
+WHEN old.content IS NOT new.content OR old.scope IS NOT new.scope BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content, scope) VALUES ('delete', old.id, old.content, old.scope);
+    INSERT INTO messages_fts (rowid, content, scope) VALUES (new.id, new.content, new.scope);
+END;
+INSERT INTO messages_fts (messages_fts, rank) VALUES ('rank', 'bm25(1.0, 0.0)');
+"""
+
+# Existing messages keep their row id when updated
+_UPSERT = (
+    "INSERT INTO messages (id, uuid, number, group_id, date_ts, status, is_outbound, content, scope, payload)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    " ON CONFLICT(uuid) DO UPDATE SET number = excluded.number, group_id = excluded.group_id,"
+    " date_ts = excluded.date_ts, status = excluded.status, is_outbound = excluded.is_outbound,"
+    " content = excluded.content, scope = excluded.scope, payload = excluded.payload"
+)
+
+# "quoted phrase" or a bare word, with an optional trailing * for prefixes
+_TERM_PATTERN = re.compile(r'"([^"]*)"|([^\s"]+)')
+
+# Low bits of the row id taken from the uuid hash, below the send time in milliseconds
+ROWID_HASH_BITS = 20
+
+# Characters around each match in the returned snippet
+SNIPPET_START = "["
+SNIPPET_END = "]"
+SNIPPET_TOKENS = 12
+
+
+def build_match(query: str) -> str:
+    """
+    Turn a user query into an FTS5 MATCH expression.
+
+    Every term is quoted so punctuation (e.g. "#1234" or "A-17") is handled
+    by the tokenizer instead of being parsed as FTS5 syntax.
+
+    Raises:
+        ValueError: If the query has no searchable terms
+    """
+    terms = []
+    for phrase, word in _TERM_PATTERN.findall(query):
+        text = phrase if phrase else word
+        prefix = not phrase and text.endswith("*")
+        text = text.rstrip("*") if prefix else text
+        if not text.strip():
+            continue
+        term = '"' + text.replace('"', '""') + '"'
+        terms.append(term + "*" if prefix else term)
+    if not terms:
+        raise ValueError("query has no searchable terms")
+    return "content : (" + " ".join(terms) + ")"
+
+
+def _scope_phrase(kind: str, value: str) -> str:
+    return f'scope : "{kind} ' + value.replace('"', '""') + '"'
+
+
+def message_scope(number: Optional[str], group_id: Optional[str]) -> Optional[str]:
+    """Return the text indexed in the scope column, e.g. "number +15551234567"."""
+    parts = []
+    if number:
+        parts.append(f"number {number}")
+    if group_id:
+        parts.append(f"group {group_id}")
+    return " ".join(parts) or None
+
+
+def message_rowid(timestamp: float, key: str) -> int:
+    """Return a row id that sorts by send time and is unique with high probability."""
+    digest = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=4).digest(), "big")
+    return (max(0, int(timestamp * 1000)) << ROWID_HASH_BITS) | (digest & ((1 << ROWID_HASH_BITS) - 1))
+
+
+class MessageSearchIndex:
+    """Messages with ordinary filter indexes plus an FTS5 index of their content."""
+
+    def __init__(self, filename: str = "message_search.db"):
+        self._db = connect(filename)
+        self._db.executescript(SCHEMA)
+
+    def add(self, records: Iterable[MessageRecord]) -> int:
+        """Insert or update message records by uuid; records without an id are skipped."""
+        rows = []
+        for record in records:
+            key = record.key
+            if key is None:
+                continue
+            number = record.number or (record.to_number if record.is_outbound else record.from_number)
+            rows.append((
+                message_rowid(record.timestamp, key),
+                key,
+                number,
+                record.group_id,
+                record.timestamp,
+                record.status,
+                None if record.is_outbound is None else int(bool(record.is_outbound)),
+                record.content,
+                message_scope(number, record.group_id),
+                dumps(record.to_dict())
+            ))
+        if not rows:
+            return 0
+        try:
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.executemany(_UPSERT, rows)
+        except sqlite3.IntegrityError:
+            # Two messages in the same millisecond with colliding hash bits:
+            # insert one at a time, moving the newcomer to the next free id
+            with self._db:
+                self._db.execute("BEGIN")
+                for row in rows:
+                    rowid = row[0]
+                    while True:
+                        try:
+                            self._db.execute(_UPSERT, (rowid,) + row[1:])
+                            break
+                        except sqlite3.IntegrityError:
+                            rowid += 1
+        return len(rows)
+
+    def update_status(self, record: MessageRecord) -> bool:
+        """Apply a status callback to an indexed message; False if it is not indexed."""
+        if record.key is None or record.status is None:
+            return False
+        cursor = self._db.execute(
+            "UPDATE messages SET status = ?, payload = json_set(payload, '$.status', ?) WHERE uuid = ?",
+            (record.status, record.status, record.key)
+        )
+        return cursor.rowcount > 0
+
+    def search(
+        self,
+        query: str,
+        number: Optional[str] = None,
+        group_id: Optional[str] = None,
+        is_outbound: Optional[bool] = None,
+        status: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        order: str = "newest",
+        limit: int = 20,
+        offset: int = 0
+    ) -> Tuple[List[Tuple[MessageRecord, str]], bool]:
+        """
+        Find messages whose content matches a query.
+
+        Args:
+            query (str): Words, "phrases" and prefix* terms that must all appear
+            number (Optional[str]): Contact E.164 number
+            group_id (Optional[str]): Group ID
+            is_outbound (Optional[bool]): Only sent (True) or received (False) messages
+            status (Optional[str]): Message status, e.g. DELIVERED
+            since (Optional[float]): Only messages sent at or after this time (epoch seconds)
+            until (Optional[float]): Only messages sent before this time (epoch seconds)
+            order (str): "newest" or "relevance" (BM25 rank)
+            limit (int): Maximum number of messages to return
+            offset (int): Number of matches to skip
+
+        Returns:
+            Tuple[List[Tuple[MessageRecord, str]], bool]: The matching records
+            with a highlighted snippet of their content, and whether more
+            matches exist
+
+        Raises:
+            ValueError: If the query has no searchable terms
+        """
+        match = build_match(query)
+        if number is not None:
+            match += " AND " + _scope_phrase("number", number)
+        if group_id is not None:
+            match += " AND " + _scope_phrase("group", group_id)
+        clauses = ["messages_fts MATCH ?"]
+        args: List[Any] = [match]
+        if status is not None:
+            clauses.append("m.status = ?")
+            args.append(status)
+        if is_outbound is not None:
+            clauses.append("m.is_outbound = ?")
+            args.append(int(is_outbound))
+        # Row id bounds let FTS5 skip straight to the date range
+        if since is not None:
+            clauses.extend(["m.date_ts >= ?", "messages_fts.rowid >= ?"])
+            args.extend([since, max(0, int(since * 1000)) << ROWID_HASH_BITS])
+        if until is not None:
+            clauses.extend(["m.date_ts < ?", "messages_fts.rowid < ?"])
+            args.extend([until, max(0, int(until * 1000) + 1) << ROWID_HASH_BITS])
+        ordering = "messages_fts.rowid DESC" if order == "newest" else "messages_fts.rank"
+        sql = (
+            "SELECT m.date_ts, m.payload,"
+            f" snippet(messages_fts, 0, '{SNIPPET_START}', '{SNIPPET_END}', '…', {SNIPPET_TOKENS}) AS snippet"
+            " FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid"
+            f" WHERE {' AND '.join(clauses)}"
+            f" ORDER BY {ordering} LIMIT ? OFFSET ?"
+        )
+        args.extend([limit + 1, offset])
+        results = []
+        for row in self._db.execute(sql, args):
+            results.append((MessageRecord.from_api(loads(row["payload"])), row["snippet"]))
+        return results[:limit], len(results) > limit
+
+    def count(self) -> int:
+        """Return the number of indexed messages."""
+        return self._db.execute("SELECT COUNT(*) AS n FROM messages").fetchone()["n"]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return index statistics for monitoring."""
+        return {"messages": self.count()}
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        self._db.close()
+
+
+_search_index: Optional[MessageSearchIndex] = None
+
+
+def get_search_index() -> MessageSearchIndex:
+    """Return the process-wide search index, opening it on first use."""
+    global _search_index
+    if _search_index is None:
+        _search_index = MessageSearchIndex()
+    return _search_index
+
+
+def close_search_index() -> None:
+    """Close the process-wide search index if it was opened."""
+    global _search_index
+    if _search_index is not None:
+        _search_index.close()
+        _search_index = None
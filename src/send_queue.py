@@ -0,0 +1,332 @@
+"""
+Durable outbound send queue.
+
+Sends enqueued through send_message / send_group_message are written to a
+SQLite table and the tool returns a job id immediately. A pool of asyncio
+workers drains the queue through the shared client, so rate limiting and
+retries apply as for direct sends.
+
+Each job moves through queued -> dispatching -> sent | failed exactly once,
+and its outcome is recorded with the job. A job rejected by an open circuit
+breaker never reached Sendblue, so it goes back to queued until the circuit
+may have closed. Jobs still marked dispatching when
+the server starts were interrupted mid-request: Sendblue may or may not have
+accepted them, so they are marked unknown rather than sent a second time.
+"""
+import asyncio
+import contextlib
+import logging
+import sqlite3
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from src.config import (
+    SENDBLUE_QUEUE_WORKERS,
+    SENDBLUE_QUEUE_POLL_INTERVAL,
+    SENDBLUE_QUEUE_SHUTDOWN_GRACE
+)
+from src.json_backend import dumps, loads
+from src.storage import connect, is_persistent
+
+logger = logging.getLogger("sendblue-mcp")
+
+JOB_STATUSES = ("queued", "dispatching", "sent", "failed", "unknown")
+
+# Runs one job: (endpoint, request body) -> Sendblue response
+JobRunner = Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    message_handle TEXT,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_available ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at);
+"""
+
+
+def _job_to_dict(row: Any) -> Dict[str, Any]:
+    job = dict(row)
+    job["payload"] = loads(job["payload"])
+    job["result"] = loads(job["result"]) if job["result"] else None
+    return job
+
+
+class SendQueue:
+    """Persistent job table with atomic claiming."""
+
+    def __init__(self, filename: str = "send_queue.db"):
+        self._db = connect(filename)
+        self._db.executescript(SCHEMA)
+        self._wakeup = asyncio.Event()
+
+    @property
+    def persistent(self) -> bool:
+        """Whether queued jobs are stored on disk and survive a restart."""
+        return is_persistent(self._db)
+
+    def enqueue(self, endpoint: str, payload: Dict[str, Any], available_at: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Persist a send job and wake a worker.
+
+        Args:
+            endpoint (str): Sendblue endpoint, e.g. "/send-message"
+            payload (Dict[str, Any]): Request body
+            available_at (Optional[float]): Earliest dispatch time (epoch seconds)
+
+        Returns:
+            Dict[str, Any]: The new job
+        """
+        job_id = self.insert_job(endpoint, payload, available_at)
+        self.notify()
+        return self.get(job_id)
+
+    def insert_job(self, endpoint: str, payload: Dict[str, Any], available_at: Optional[float] = None) -> str:
+        """Insert a job without waking workers (for use inside a larger transaction)."""
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        self._db.execute(
+            "INSERT INTO jobs (id, endpoint, payload, status, created_at, available_at)"
+            " VALUES (?, ?, ?, 'queued', ?, ?)",
+            (job_id, endpoint, dumps(payload), now, available_at or now)
+        )
+        return job_id
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        """The queue database, shared with state that must commit atomically with jobs."""
+        return self._db
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest due job to dispatching and return it."""
+        now = time.time()
+        row = self._db.execute(
+            "UPDATE jobs SET status = 'dispatching', started_at = ?"
+            " WHERE id = (SELECT id FROM jobs WHERE status = 'queued' AND available_at <= ?"
+            " ORDER BY available_at, created_at LIMIT 1)"
+            " RETURNING *",
+            (now, now)
+        ).fetchone()
+        return _job_to_dict(row) if row else None
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        self._db.execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, message_handle = ?, result = ?, error = ?"
+            " WHERE id = ? AND status = 'dispatching'",
+            (
+                status,
+                time.time(),
+                (result or {}).get("message_handle"),
+                dumps(result) if result is not None else None,
+                error,
+                job_id
+            )
+        )
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        """Record Sendblue's response for a dispatched job."""
+        self._finish(job_id, "sent", result, None)
+
+    def fail(self, job_id: str, error: str, result: Optional[Dict[str, Any]] = None) -> None:
+        """Record a dispatched job as failed."""
+        self._finish(job_id, "failed", result, error)
+
+    def defer(self, job_id: str, available_at: float) -> None:
+        """Return a dispatched job that was never sent to the queue, due again at available_at."""
+        self._db.execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL, available_at = ?"
+            " WHERE id = ? AND status = 'dispatching'",
+            (available_at, job_id)
+        )
+
+    def recover(self) -> int:
+        """
+        Mark jobs interrupted mid-dispatch as unknown.
+
+        Returns:
+            int: Number of jobs recovered
+        """
+        cursor = self._db.execute(
+            "UPDATE jobs SET status = 'unknown', finished_at = ?,"
+            " error = 'The server stopped while this job was being sent; it may or may not have been delivered'"
+            " WHERE status = 'dispatching'",
+            (time.time(),)
+        )
+        return cursor.rowcount
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job by id."""
+        row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job_to_dict(row) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """Return jobs, newest first, optionally filtered by status."""
+        sql = "SELECT * FROM jobs"
+        args: List[Any] = []
+        if status:
+            sql += " WHERE status = ?"
+            args.append(status)
+        sql += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
+        args.extend([limit, offset])
+        return [_job_to_dict(row) for row in self._db.execute(sql, args)]
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of jobs in each status."""
+        rows = self._db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+        return {row["status"]: row["n"] for row in rows}
+
+    def notify(self) -> None:
+        """Wake every waiting worker."""
+        self._wakeup.set()
+
+    async def wait_for_work(self, timeout: float) -> None:
+        """
+        Wait until a job is enqueued or the timeout passes.
+
+        Call right after claim() found nothing; no enqueue can slip in between
+        since neither yields to the event loop.
+        """
+        self._wakeup.clear()
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        self._db.close()
+
+
+class SendQueueWorkers:
+    """Pool of asyncio workers draining the send queue."""
+
+    def __init__(self, queue: SendQueue, run_job: JobRunner, workers: int = SENDBLUE_QUEUE_WORKERS):
+        self.queue = queue
+        self.run_job = run_job
+        self.workers = workers
+        self.dispatched = 0
+        self._stopping = False
+        self._tasks: List["asyncio.Task[None]"] = []
+        self._active: Dict[str, "asyncio.Task[None]"] = {}
+
+    def start(self) -> None:
+        """Recover interrupted jobs and start the workers."""
+        if not self.queue.persistent:
+            logger.warning(
+                "The send queue is kept in memory (SENDBLUE_DATA_DIR is not set or not writable); "
+                "queued sends will be lost when the server stops"
+            )
+        recovered = self.queue.recover()
+        if recovered:
+            logger.warning(f"Marked {recovered} interrupted send job(s) as unknown")
+        self._stopping = False
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+    async def _work(self) -> None:
+        while not self._stopping:
+            job = self.queue.claim()
+            if job is None:
+                await self.queue.wait_for_work(SENDBLUE_QUEUE_POLL_INTERVAL)
+                continue
+            # Run each job in its own task so shutdown can let it finish
+            task = asyncio.ensure_future(self._dispatch(job))
+            self._active[job["id"]] = task
+            try:
+                await asyncio.shield(task)
+            finally:
+                self._active.pop(job["id"], None)
+
+    async def _dispatch(self, job: Dict[str, Any]) -> None:
+        self.dispatched += 1
+        try:
+            response = await self.run_job(job["endpoint"], job["payload"])
+        except httpx.HTTPError as e:
+            if getattr(e, "error_code", None) == "CIRCUIT_OPEN":
+                # Rejected locally without reaching Sendblue; try again once the circuit may close
+                self.queue.defer(job["id"], time.time() + (e.retry_after or SENDBLUE_QUEUE_POLL_INTERVAL))
+                self.queue.notify()
+                return
+            result = e.to_dict() if hasattr(e, "to_dict") else None
+            self.queue.fail(job["id"], str(e), result)
+            return
+        except Exception as e:
+            logger.error(f"Send job {job['id']} crashed: {str(e)}")
+            self.queue.fail(job["id"], str(e))
+            return
+        if response.get("status") == "ERROR" or response.get("error_code"):
+            self.queue.fail(job["id"], response.get("error_message") or "Sendblue reported an error", response)
+        else:
+            self.queue.complete(job["id"], response)
+
+    async def stop(self, grace: float = SENDBLUE_QUEUE_SHUTDOWN_GRACE) -> None:
+        """
+        Stop claiming jobs and give in-flight sends time to finish.
+
+        Sends still running after the grace period are cancelled; they stay
+        dispatching and are marked unknown on the next start.
+        """
+        self._stopping = True
+        self.queue.notify()
+        active = list(self._active.values())
+        if active:
+            await asyncio.wait(active, timeout=grace)
+        for task in self._tasks + active:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *active, return_exceptions=True)
+        self._tasks = []
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return worker and queue statistics for monitoring."""
+        return {
+            "workers": len(self._tasks),
+            "active": len(self._active),
+            "dispatched": self.dispatched,
+            "persistent": self.queue.persistent,
+            "jobs": self.queue.counts()
+        }
+
+
+_send_queue: Optional[SendQueue] = None
+_send_workers: Optional[SendQueueWorkers] = None
+
+
+def get_send_queue() -> SendQueue:
+    """Return the process-wide send queue, opening it on first use."""
+    global _send_queue
+    if _send_queue is None:
+        _send_queue = SendQueue()
+    return _send_queue
+
+
+def get_send_workers() -> Optional[SendQueueWorkers]:
+    """Return the running worker pool, if the queue was started."""
+    return _send_workers
+
+
+def start_send_workers(run_job: JobRunner) -> SendQueueWorkers:
+    """Start the process-wide worker pool."""
+    global _send_workers
+    _send_workers = SendQueueWorkers(get_send_queue(), run_job)
+    _send_workers.start()
+    return _send_workers
+
+
+async def stop_send_workers() -> None:
+    """Stop the worker pool and close the queue database."""
+    global _send_queue, _send_workers
+    if _send_workers is not None:
+        await _send_workers.stop()
+        _send_workers = None
+    if _send_queue is not None:
+        _send_queue.close()
+        _send_queue = None
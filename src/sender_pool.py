@@ -0,0 +1,139 @@
+"""
+Sticky sender assignment across a pool of Sendblue lines.
+
+When a send has no from_number and SENDBLUE_SENDER_POOL lists sender lines,
+the recipient (or group) is mapped to a line with a consistent-hash ring.
+Each line owns many virtual nodes on the ring, so load spreads evenly and
+adding or removing a line only moves the recipients that line gained or
+lost; everyone else keeps talking to the same number.
+
+A recipient's candidates are the next distinct lines clockwise from its hash.
+The first is used unless it is cooling down after a failed send, its lane is
+saturated or its circuit breaker is open, in which case traffic fails over to the following candidates
+(at most SENDBLUE_SENDER_POOL_FAILOVER of them).
+"""
+import bisect
+import hashlib
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config import (
+    SENDBLUE_SENDER_POOL,
+    SENDBLUE_SENDER_POOL_VNODES,
+    SENDBLUE_SENDER_POOL_FAILOVER,
+    SENDBLUE_SENDER_POOL_COOLDOWN,
+    SENDBLUE_SENDER_POOL_MAX_DEPTH
+)
+from src.circuit import circuit_breakers
+from src.lanes import send_lanes
+
+
+def _hash(value: str) -> int:
+    """64-bit position on the ring."""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def routing_key(request_data: Dict[str, Any]) -> Optional[str]:
+    """Return the conversation a send request belongs to (recipient or group)."""
+    if request_data.get("number"):
+        return request_data["number"]
+    if request_data.get("group_id"):
+        return f"group:{request_data['group_id']}"
+    if request_data.get("numbers"):
+        return "group:" + ",".join(sorted(request_data["numbers"]))
+    return None
+
+
+class SenderPool:
+    """Consistent-hash ring of sender lines with bounded failover."""
+
+    def __init__(
+        self,
+        numbers: List[str],
+        virtual_nodes: int = SENDBLUE_SENDER_POOL_VNODES,
+        max_failover: int = SENDBLUE_SENDER_POOL_FAILOVER,
+        cooldown: float = SENDBLUE_SENDER_POOL_COOLDOWN,
+        max_depth: int = SENDBLUE_SENDER_POOL_MAX_DEPTH
+    ):
+        self.numbers = list(dict.fromkeys(numbers))
+        self.virtual_nodes = virtual_nodes
+        self.max_failover = max_failover
+        self.cooldown = cooldown
+        self.max_depth = max_depth
+        self.assigned: Dict[str, int] = {number: 0 for number in self.numbers}
+        self.failovers = 0
+        self._down_until: Dict[str, float] = {}
+        ring: List[Tuple[int, str]] = sorted(
+            (_hash(f"{number}#{replica}"), number)
+            for number in self.numbers
+            for replica in range(virtual_nodes)
+        )
+        self._points = [point for point, _ in ring]
+        self._owners = [number for _, number in ring]
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any sender lines are configured."""
+        return bool(self.numbers)
+
+    def candidates(self, key: str) -> List[str]:
+        """Return the key's primary line followed by its failover lines, in ring order."""
+        wanted = min(len(self.numbers), 1 + self.max_failover)
+        found: List[str] = []
+        start = bisect.bisect(self._points, _hash(key))
+        for offset in range(len(self._owners)):
+            number = self._owners[(start + offset) % len(self._owners)]
+            if number not in found:
+                found.append(number)
+                if len(found) == wanted:
+                    break
+        return found
+
+    def available(self, number: str) -> bool:
+        """Whether a line is not cooling down after a failure, not saturated, and its circuit is not open."""
+        if self._down_until.get(number, 0.0) > time.monotonic() or circuit_breakers.is_open(f"line:{number}"):
+            return False
+        return send_lanes.load(number) < self.max_depth
+
+    def route(self, key: str) -> List[str]:
+        """
+        Return the lines to try for a conversation, best first.
+
+        Available candidates keep their ring order and come first; if none is
+        available the primary line is still tried first, so a conversation
+        only moves when another line can take it.
+        """
+        candidates = self.candidates(key)
+        ordered = [number for number in candidates if self.available(number)]
+        ordered += [number for number in candidates if number not in ordered]
+        if ordered[0] != candidates[0]:
+            self.failovers += 1
+        self.assigned[ordered[0]] += 1
+        return ordered
+
+    def record_failure(self, number: str) -> None:
+        """Take a line out of rotation for the cooldown period."""
+        self._down_until[number] = time.monotonic() + self.cooldown
+
+    def record_success(self, number: str) -> None:
+        """Put a line back into rotation."""
+        self._down_until.pop(number, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return pool statistics for monitoring."""
+        now = time.monotonic()
+        return {
+            "numbers": self.numbers,
+            "virtual_nodes": self.virtual_nodes,
+            "max_failover": self.max_failover,
+            "assigned": dict(self.assigned),
+            "failovers": self.failovers,
+            "cooling_down": {
+                number: round(until - now, 1)
+                for number, until in self._down_until.items()
+                if until > now
+            }
+        }
+
+
+sender_pool = SenderPool(SENDBLUE_SENDER_POOL)
@@ -0,0 +1,72 @@
+"""
+Local SQLite storage shared by the server's caches and persistent state.
+
+Persistence is opt-in: each feature keeps its own database file inside
+SENDBLUE_DATA_DIR when it is set, and everything stays in memory otherwise.
+A data directory that cannot be created or written to also falls back to
+memory, with a warning, rather than failing the tools that use it.
+"""
+import logging
+import os
+import sqlite3
+from typing import Optional
+
+from src.config import SENDBLUE_DATA_DIR
+
+logger = logging.getLogger("sendblue-mcp")
+
+_unwritable_dirs = set()
+
+
+def database_path(filename: str, data_dir: Optional[str] = None) -> str:
+    """
+    Return the path of a database file in the data directory.
+
+    Args:
+        filename (str): Database file name, e.g. "lookup_cache.db"
+        data_dir (Optional[str]): Directory for database files ("" for none);
+            defaults to SENDBLUE_DATA_DIR
+
+    Returns:
+        str: Absolute file path, or ":memory:" if persistence is disabled
+        or the directory is not writable
+    """
+    if data_dir is None:
+        data_dir = SENDBLUE_DATA_DIR
+    if not data_dir:
+        return ":memory:"
+    try:
+        os.makedirs(data_dir, exist_ok=True)
+        writable = os.access(data_dir, os.W_OK | os.X_OK)
+    except OSError:
+        writable = False
+    if not writable:
+        if data_dir not in _unwritable_dirs:
+            _unwritable_dirs.add(data_dir)
+            logger.warning(f"SENDBLUE_DATA_DIR {data_dir} is not writable - keeping local state in memory")
+        return ":memory:"
+    return os.path.join(data_dir, filename)
+
+
+def connect(filename: str) -> sqlite3.Connection:
+    """
+    Open a database in WAL mode with settings suited to a single server process.
+
+    Args:
+        filename (str): Database file name inside the data directory
+
+    Returns:
+        sqlite3.Connection: Connection in autocommit mode with Row results
+    """
+    path = database_path(filename)
+    connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    connection.row_factory = sqlite3.Row
+    if path != ":memory:":
+        connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+def is_persistent(connection: sqlite3.Connection) -> bool:
+    """Whether a connection from connect() is backed by a file rather than memory."""
+    return connection.execute("PRAGMA database_list").fetchone()["file"] != ""
@@ -2,27 +2,99 @@
 MCP tools for the Sendblue API.
 Implements all the tools specified in the MCP Server Specification.
 """
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Tuple, Union
+import asyncio
+import logging
+import time
 import httpx
+from mcp.server.fastmcp import Context
+from pydantic import ValidationError
 
-from src.client import make_sendblue_api_request
+from src.client import make_sendblue_api_request, SendblueAPIError
+from src.config import SENDBLUE_BULK_CONCURRENCY, SENDBLUE_LOOKUP_CACHE_ENABLED
+from src.config import SENDBLUE_LOOKUP_BATCH_CONCURRENCY
+from src.config import SENDBLUE_MIRROR_ENABLED, SENDBLUE_HISTORY_MAX_MESSAGES
+from src.config import SENDBLUE_HISTORY_MAX_CONTENT_CHARS, SENDBLUE_WEBHOOK_ENABLED
+from src.config import SENDBLUE_MEDIA_CACHE_ENABLED, SENDBLUE_MEDIA_CACHE_SWAP_SENDS
+from src.config import SENDBLUE_SEARCH_ENABLED, SENDBLUE_GROUP_REGISTRY_ENABLED
+from src.config import SENDBLUE_GROUP_ADD_CONCURRENCY, SENDBLUE_QUEUE_ENABLED
+from src.history import fetch_all_messages
+from src.records import MessageRecord, normalize_messages, serialize_messages
+from src.records import BYTES_PER_TOKEN, serialize_within_budget, parse_timestamp, format_timestamp
+from src.inbound import inbound_buffer
+from src.conversations import conversation_index
+from src.webhooks import webhook_receiver, default_status_callback
+from src.delivery import delivery_tracker
+from src.lookup_cache import get_lookup_cache, NEGATIVE_STATUS_CODES
+from src.mirror import get_message_mirror
+from src.search import get_search_index
+from src.groups import get_group_registry
+from src.media_cache import get_media_cache
+from src.send_queue import get_send_queue, get_send_workers
+from src.scheduler import get_scheduler
+from src.ratelimit import rate_limiters
+from src.lanes import send_lanes
+from src.circuit import circuit_breakers
+from src.hedging import request_hedgers
+from src.sender_pool import sender_pool, routing_key
+from src.typing_indicators import typing_debouncer
 from src.models import (
     SendMessageParams,
+    SendMessagesBulkParams,
     SendGroupMessageParams,
     LookupNumberServiceParams,
+    LookupNumberServicesParams,
     SendTypingIndicatorParams,
     GetMessageHistoryParams,
+    ListConversationsParams,
+    GetConversationParams,
+    SearchMessagesParams,
+    WaitForReplyParams,
+    GetDeliveryStatusParams,
+    AwaitDeliveryParams,
+    GetSendJobParams,
+    ScheduleMessageParams,
+    CancelScheduledMessageParams,
+    ListSendJobsParams,
     AddRecipientToGroupParams,
-    UploadMediaParams
+    AddRecipientsToGroupParams,
+    UploadMediaParams,
+    MAX_GROUP_MEMBERS,
+    normalize_phone_number
 )
 
+logger = logging.getLogger("sendblue-mcp")
+
+
+def _error_result(error: httpx.HTTPError) -> Dict[str, Any]:
+    """Convert a failed API request into a tool error result."""
+    if isinstance(error, SendblueAPIError):
+        return error.to_dict()
+    return {
+        "status": "ERROR",
+        "error_message": str(error)
+    }
+
+
+def _with_retry_info(response: Dict[str, Any], request_stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Attach retry metadata to a successful response when the request had to be retried."""
+    if request_stats.get("retries") and isinstance(response, dict):
+        response["retry_info"] = {
+            "attempts": request_stats["attempts"],
+            "retries": request_stats["retries"],
+            "retry_wait_seconds": request_stats["retry_wait_seconds"]
+        }
+    return response
+
+
 async def send_message(
     to_number: str,
     content: Optional[str] = None,
     from_number: Optional[str] = None,
     media_url: Optional[str] = None,
     send_style: Optional[str] = None,
-    status_callback: Optional[str] = None
+    status_callback: Optional[str] = None,
+    enqueue: bool = False
 ) -> Dict[str, Any]:
     """
     Sends a message (iMessage or SMS) to a single recipient.
@@ -31,12 +103,18 @@ async def send_message(
         to_number: The E.164 formatted phone number of the recipient.
         content: The text content of the message.
         from_number: The E.164 formatted Sendblue number to send the message from.
+            If omitted and a sender pool is configured, the recipient's line
+            from the pool is used.
         media_url: Publicly accessible URL of an image or .caf voice note file.
         send_style: Expressive style for iMessage (e.g., "invisible", "fireworks", "slam").
-        status_callback: Webhook URL for message status updates.
+        status_callback: Webhook URL for message status updates. Defaults to
+            the built-in receiver when it is running with a public URL.
+        enqueue: Queue the message for background sending and return a job id
+            immediately instead of waiting for Sendblue (see get_send_job).
     
     Returns:
-        Dict containing the Sendblue API response with message status and details.
+        Dict containing the Sendblue API response with message status and
+        details, or with enqueue the queued job.
     """
     # Validate parameters
     params = SendMessageParams(
@@ -48,7 +126,27 @@ async def send_message(
         status_callback=status_callback
     )
     
-    # Prepare API request
+    if enqueue:
+        return _enqueue_send("/send-message", _build_send_message_request(params))
+    
+    media_url = await _cached_media_url(params.media_url)
+    
+    request_stats: Dict[str, Any] = {}
+    try:
+        # Make API request
+        response = await _post_send("/send-message", _build_send_message_request(params, media_url), request_stats)
+        _track_delivery(response)
+        return _with_retry_info(response, request_stats)
+    except httpx.HTTPError as e:
+        return _error_result(e)
+
+
+def _build_send_message_request(params: SendMessageParams, media_url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Translate validated send_message parameters into a Sendblue request body.
+    
+    A media_url given here (e.g. a cached media object) replaces params.media_url.
+    """
     request_data = {
         "number": params.to_number,
         "content": params.content
@@ -58,28 +156,212 @@ async def send_message(
     if params.from_number:
         request_data["from_number"] = params.from_number
     
-    if params.media_url:
-        request_data["media_url"] = params.media_url
+    media_url = media_url or params.media_url
+    if media_url:
+        request_data["media_url"] = media_url
     
     if params.send_style:
         request_data["send_style"] = params.send_style
     
-    if params.status_callback:
-        request_data["status_callback"] = params.status_callback
+    status_callback = params.status_callback or default_status_callback()
+    if status_callback:
+        request_data["status_callback"] = status_callback
+    
+    return request_data
+
+
+async def _cached_media_url(media_url: Optional[str]) -> Optional[str]:
+    """
+    Swap a media URL for its cached media object when SENDBLUE_MEDIA_CACHE_SWAP_SENDS is on.
     
+    The file is uploaded on first use; if that fails the original URL is sent.
+    """
+    if not media_url or not (SENDBLUE_MEDIA_CACHE_ENABLED and SENDBLUE_MEDIA_CACHE_SWAP_SENDS):
+        return media_url
     try:
-        # Make API request
-        response = await make_sendblue_api_request(
-            endpoint="/send-message",
-            method="POST",
-            data=request_data
-        )
-        return response
+        entry, _ = await get_media_cache().resolve(media_url, _upload_media)
     except httpx.HTTPError as e:
+        logger.warning(f"Media upload failed, sending the original URL: {str(e)}")
+        return media_url
+    return entry.get("media_object_id") or media_url
+
+
+def _track_delivery(response: Dict[str, Any]) -> None:
+    """Start tracking the delivery status of a sent message."""
+    if webhook_receiver.running:
+        delivery_tracker.update(MessageRecord.from_api(response))
+
+
+async def _post_send(
+    endpoint: str,
+    request_data: Dict[str, Any],
+    stats: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    POST a send, picking the line from the sender pool when no from_number is given.
+    
+    Any typing indicator still being refreshed for the recipient is stopped.
+    
+    If the chosen line fails in a way that is safe to resend (Sendblue did
+    not accept the message), the send fails over to the next pool line.
+    
+    Raises:
+        httpx.HTTPError: If the request fails on every line tried
+    """
+    if request_data.get("number"):
+        typing_debouncer.message_sent(request_data["number"])
+    
+    key = routing_key(request_data)
+    if request_data.get("from_number") or not sender_pool.enabled or key is None:
+        return await make_sendblue_api_request(endpoint=endpoint, method="POST", data=request_data, stats=stats)
+    
+    lines = sender_pool.route(key)
+    for attempt, number in enumerate(lines):
+        try:
+            response = await make_sendblue_api_request(
+                endpoint=endpoint,
+                method="POST",
+                data=dict(request_data, from_number=number),
+                stats=stats
+            )
+        except SendblueAPIError as e:
+            # Request errors (4xx) are about the message, not the line
+            if e.retryable or e.status_code is None or e.status_code >= 500:
+                sender_pool.record_failure(number)
+            if not e.retryable or attempt == len(lines) - 1:
+                raise
+            logger.warning(f"Send from {number} failed, failing over to {lines[attempt + 1]}: {str(e)}")
+            continue
+        sender_pool.record_success(number)
+        return response
+
+
+def _queue_disabled() -> Dict[str, Any]:
+    """Error returned by the send job tools while the send queue is disabled."""
+    return {
+        "status": "ERROR",
+        "error_message": "The send queue is disabled; set SENDBLUE_QUEUE_ENABLED=true to use send jobs"
+    }
+
+
+def _enqueue_send(endpoint: str, request_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Persist a send for the background workers and describe the queued job."""
+    if get_send_workers() is None:
         return {
             "status": "ERROR",
-            "error_message": str(e)
+            "error_message": "The send queue is disabled; set SENDBLUE_QUEUE_ENABLED=true to use enqueue"
+        }
+    job = get_send_queue().enqueue(endpoint, request_data)
+    return {"status": "ENQUEUED", "job_id": job["id"]}
+
+
+async def run_send_job(endpoint: str, request_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Send a queued message; used by the send queue workers.
+    
+    Raises:
+        httpx.HTTPError: If the request fails
+    """
+    media_url = request_data.get("media_url")
+    if media_url:
+        request_data = dict(request_data, media_url=await _cached_media_url(media_url))
+    if endpoint == "/send-group-message":
+        response = await _post_group_send(request_data)
+    else:
+        response = await _post_send(endpoint, request_data)
+    _track_delivery(response)
+    return response
+
+
+async def send_messages_bulk(
+    messages: List[Dict[str, Any]],
+    max_concurrency: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Sends many individual messages in one call, several at a time.
+    
+    Every entry is validated before anything is sent. Invalid entries and
+    failed sends are reported in their own result without stopping the rest
+    of the batch.
+    
+    Args:
+        messages: List of objects with the same fields as send_message
+            (to_number, content, from_number, media_url, send_style, status_callback).
+        max_concurrency: Maximum number of sends in flight at once.
+    
+    Returns:
+        Dict with one result per message (in input order) and a throughput summary.
+    """
+    # Validate parameters
+    bulk_params = SendMessagesBulkParams(messages=messages, max_concurrency=max_concurrency)
+    concurrency = bulk_params.max_concurrency or SENDBLUE_BULK_CONCURRENCY
+    
+    # Validate every entry up front so nothing is sent for a malformed item
+    results: List[Optional[Dict[str, Any]]] = [None] * len(bulk_params.messages)
+    valid: List[Tuple[int, SendMessageParams]] = []
+    for index, item in enumerate(bulk_params.messages):
+        try:
+            valid.append((index, SendMessageParams(**item)))
+        except ValidationError as e:
+            results[index] = {
+                "index": index,
+                "to_number": item.get("to_number"),
+                "status": "INVALID",
+                "error_message": str(e)
+            }
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    retries = 0
+    
+    async def send_one(index: int, params: SendMessageParams) -> None:
+        nonlocal retries
+        async with semaphore:
+            media_url = await _cached_media_url(params.media_url)
+            request_stats: Dict[str, Any] = {}
+            try:
+                response = await _post_send(
+                    "/send-message",
+                    _build_send_message_request(params, media_url),
+                    request_stats
+                )
+                _track_delivery(response)
+                results[index] = {
+                    "index": index,
+                    "to_number": params.to_number,
+                    "status": response.get("status"),
+                    "message_handle": response.get("message_handle"),
+                    "error_message": response.get("error_message")
+                }
+            except httpx.HTTPError as e:
+                results[index] = {
+                    "index": index,
+                    "to_number": params.to_number,
+                    **_error_result(e)
+                }
+            retries += request_stats.get("retries", 0)
+    
+    started = time.monotonic()
+    await asyncio.gather(*(send_one(index, params) for index, params in valid))
+    elapsed = time.monotonic() - started
+    
+    invalid_count = len(bulk_params.messages) - len(valid)
+    failed_count = sum(1 for r in results if r["status"] == "ERROR")
+    sent_count = len(valid) - failed_count
+    
+    return {
+        "status": "COMPLETED",
+        "results": results,
+        "summary": {
+            "total": len(results),
+            "sent": sent_count,
+            "failed": failed_count,
+            "invalid": invalid_count,
+            "retries": retries,
+            "max_concurrency": concurrency,
+            "elapsed_seconds": round(elapsed, 3),
+            "messages_per_second": round(len(valid) / elapsed, 2) if elapsed > 0 else None
         }
+    }
 
 
 async def send_group_message(
@@ -89,22 +371,34 @@ async def send_group_message(
     from_number: Optional[str] = None,
     media_url: Optional[str] = None,
     send_style: Optional[str] = None,
-    status_callback: Optional[str] = None
+    status_callback: Optional[str] = None,
+    enqueue: bool = False
 ) -> Dict[str, Any]:
     """
     Sends a message to a group of recipients. If the group does not exist, it will be created.
     
+    Groups created by sending to to_numbers are remembered, so later sends to
+    the same members (in any order) go to the existing group_id instead of
+    creating a new group.
+    
     Args:
         to_numbers: Array of E.164 formatted phone numbers for group recipients (max 25).
         group_id: UUID of an existing group.
         content: The text content of the message.
         from_number: The E.164 formatted Sendblue number to send the message from.
+            If omitted and a sender pool is configured, the group's line from
+            the pool is used.
         media_url: Publicly accessible URL to media.
         send_style: Expressive style for iMessage.
-        status_callback: Webhook URL for message status updates.
+        status_callback: Webhook URL for message status updates. Defaults to
+            the built-in receiver when it is running with a public URL.
+        enqueue: Queue the message for background sending and return a job id
+            immediately instead of waiting for Sendblue (see get_send_job).
     
     Returns:
-        Dict containing the Sendblue API response including group_id and message status.
+        Dict containing the Sendblue API response including group_id and
+        message status (with cached_group when a known group was reused), or
+        with enqueue the queued job.
     """
     # Validate parameters
     params = SendGroupMessageParams(
@@ -117,7 +411,77 @@ async def send_group_message(
         status_callback=status_callback
     )
     
-    # Prepare API request
+    if enqueue:
+        return _enqueue_send("/send-group-message", _build_send_group_message_request(params))
+    
+    media_url = await _cached_media_url(params.media_url)
+    request_data = _build_send_group_message_request(params, media_url)
+    
+    request_stats: Dict[str, Any] = {}
+    try:
+        # Make API request
+        response = await _post_group_send(request_data, request_stats)
+        _track_delivery(response)
+        return _with_retry_info(response, request_stats)
+    except httpx.HTTPError as e:
+        return _error_result(e)
+
+
+async def _post_group_send(
+    request_data: Dict[str, Any],
+    stats: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    POST a group send, reusing a known group when sending to a list of numbers.
+    
+    If the group registry has a group with exactly these members (from the
+    same line, when from_number is given), the message is sent to its
+    group_id instead, from the line the group lives on, and the response is
+    marked with cached_group. If Sendblue rejects the stored group, the send
+    is retried with the numbers and the registry is updated with the group
+    that creates. Groups created by numbers-based sends are remembered.
+    
+    Raises:
+        httpx.HTTPError: If the request fails
+    """
+    numbers = request_data.get("numbers")
+    if not numbers or not SENDBLUE_GROUP_REGISTRY_ENABLED:
+        return await _post_send("/send-group-message", request_data, stats)
+    
+    registry = get_group_registry()
+    group = registry.resolve(numbers, request_data.get("from_number"))
+    if group is not None:
+        resolved = {key: value for key, value in request_data.items() if key != "numbers"}
+        resolved["group_id"] = group["group_id"]
+        if group["from_number"] and not resolved.get("from_number"):
+            resolved["from_number"] = group["from_number"]
+        try:
+            response = await _post_send("/send-group-message", resolved, stats)
+            return {**response, "cached_group": True} if isinstance(response, dict) else response
+        except SendblueAPIError as e:
+            # Other failures are about the message or the API, not the group
+            if e.status_code not in NEGATIVE_STATUS_CODES:
+                raise
+            logger.warning(f"Known group {group['group_id']} was rejected, sending to the numbers instead: {str(e)}")
+    
+    response = await _post_send("/send-group-message", request_data, stats)
+    new_group_id = response.get("group_id") if isinstance(response, dict) else None
+    if new_group_id:
+        if group is not None and group["group_id"] != new_group_id:
+            registry.forget(group["group_id"])
+        registry.remember(numbers, new_group_id, response.get("from_number") or request_data.get("from_number"))
+    return response
+
+
+def _build_send_group_message_request(
+    params: SendGroupMessageParams,
+    media_url: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Translate validated send_group_message parameters into a Sendblue request body.
+    
+    A media_url given here (e.g. a cached media object) replaces params.media_url.
+    """
     request_data = {}
     
     # Add either numbers or group_id (required)
@@ -134,62 +498,196 @@ async def send_group_message(
     if params.from_number:
         request_data["from_number"] = params.from_number
     
-    if params.media_url:
-        request_data["media_url"] = params.media_url
+    media_url = media_url or params.media_url
+    if media_url:
+        request_data["media_url"] = media_url
     
     if params.send_style:
         request_data["send_style"] = params.send_style
     
-    if params.status_callback:
-        request_data["status_callback"] = params.status_callback
+    status_callback = params.status_callback or default_status_callback()
+    if status_callback:
+        request_data["status_callback"] = status_callback
     
-    try:
-        # Make API request
-        response = await make_sendblue_api_request(
-            endpoint="/send-group-message",
-            method="POST",
-            data=request_data
-        )
-        return response
-    except httpx.HTTPError as e:
-        return {
-            "status": "ERROR",
-            "error_message": str(e)
-        }
+    return request_data
 
 
-async def lookup_number_service(phone_number: str) -> Dict[str, Any]:
+async def lookup_number_service(
+    phone_number: str,
+    force_refresh: bool = False
+) -> Dict[str, Any]:
     """
     Determines if a phone number supports iMessage or SMS.
     
+    Results are cached locally, so repeat lookups of the same number are
+    answered without calling Sendblue.
+    
     Args:
         phone_number: The E.164 formatted phone number to evaluate.
+        force_refresh: Ignore any cached result and ask Sendblue again.
     
     Returns:
-        Dict containing the number and service type (iMessage or SMS).
+        Dict containing the number, service type (iMessage or SMS), and whether
+        the result came from the cache.
     """
     # Validate parameters
-    params = LookupNumberServiceParams(phone_number=phone_number)
+    params = LookupNumberServiceParams(phone_number=phone_number, force_refresh=force_refresh)
     
+    request_stats: Dict[str, Any] = {}
     try:
-        # Make API request 
+        result = await _lookup_service(params.phone_number, params.force_refresh, request_stats)
+        return _with_retry_info(result, request_stats)
+    except httpx.HTTPError as e:
+        return _error_result(e)
+
+
+async def lookup_number_services(
+    phone_numbers: List[str],
+    force_refresh: bool = False,
+    max_concurrency: Optional[int] = None,
+    ctx: Context = None
+) -> Dict[str, Any]:
+    """
+    Determines iMessage or SMS support for many phone numbers in one call.
+    
+    Numbers are normalized (spaces, dashes, dots and parentheses removed) and
+    deduplicated, then looked up concurrently under the rate limit. Cached
+    results are reused. Invalid numbers and failed lookups are reported per
+    entry without failing the batch.
+    
+    Args:
+        phone_numbers: Phone numbers to evaluate (E.164, formatting allowed).
+        force_refresh: Ignore cached results and ask Sendblue again.
+        max_concurrency: Maximum number of lookups in flight at once.
+    
+    Returns:
+        Dict with a compact number -> service map, per-number errors, invalid
+        inputs, and a summary.
+    """
+    # Validate parameters
+    batch_params = LookupNumberServicesParams(
+        phone_numbers=phone_numbers,
+        force_refresh=force_refresh,
+        max_concurrency=max_concurrency
+    )
+    concurrency = batch_params.max_concurrency or SENDBLUE_LOOKUP_BATCH_CONCURRENCY
+    
+    # Normalize and dedupe, keeping the first-seen order
+    numbers: Dict[str, None] = {}
+    invalid: Dict[str, str] = {}
+    for raw in batch_params.phone_numbers:
+        try:
+            numbers[normalize_phone_number(raw)] = None
+        except ValueError as e:
+            invalid[raw] = str(e)
+    
+    services: Dict[str, Optional[str]] = {}
+    errors: Dict[str, str] = {}
+    pending = iter(numbers)
+    total = len(numbers)
+    completed = 0
+    cached_count = 0
+    progress_step = max(1, total // 20)
+    
+    async def worker() -> None:
+        nonlocal completed, cached_count
+        for number in pending:
+            try:
+                result = await _lookup_service(number, batch_params.force_refresh, {})
+                if result.get("status") == "ERROR":
+                    errors[number] = result.get("error_message")
+                else:
+                    services[number] = result.get("service")
+                cached_count += result.get("cached", False)
+            except httpx.HTTPError as e:
+                errors[number] = str(e)
+            completed += 1
+            if ctx is not None and (completed % progress_step == 0 or completed == total):
+                await ctx.report_progress(completed, total)
+    
+    started = time.monotonic()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+    elapsed = time.monotonic() - started
+    
+    return {
+        "status": "COMPLETED",
+        "services": {number: services[number] for number in numbers if number in services},
+        "errors": errors,
+        "invalid": invalid,
+        "summary": {
+            "requested": len(batch_params.phone_numbers),
+            "unique": total,
+            "resolved": len(services),
+            "failed": len(errors),
+            "invalid": len(invalid),
+            "from_cache": cached_count,
+            "elapsed_seconds": round(elapsed, 3)
+        }
+    }
+
+
+async def _lookup_service(
+    phone_number: str,
+    force_refresh: bool,
+    request_stats: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Look up one validated number through the cache (when enabled).
+    
+    Raises:
+        httpx.HTTPError: If the lookup fails and the failure is not cacheable
+    """
+    if not SENDBLUE_LOOKUP_CACHE_ENABLED:
+        response, _ = await _evaluate_service(phone_number, request_stats)
+        return response
+    
+    result, cached = await get_lookup_cache().lookup(
+        phone_number,
+        lambda: _evaluate_service(phone_number, request_stats),
+        force_refresh=force_refresh
+    )
+    return {**result, "cached": cached}
+
+
+async def _evaluate_service(
+    phone_number: str,
+    request_stats: Dict[str, Any]
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Call GET /evaluate-service for one number.
+    
+    Returns:
+        Tuple of the result and whether it is a definitive failure worth caching.
+    """
+    try:
+        # Make API request
         response = await make_sendblue_api_request(
             endpoint="/evaluate-service",
             method="GET",
-            params={"number": params.phone_number}
+            params={"number": phone_number},
+            stats=request_stats
         )
-        return response
-    except httpx.HTTPError as e:
+        return response, False
+    except SendblueAPIError as e:
+        if e.status_code not in NEGATIVE_STATUS_CODES:
+            raise
         return {
+            "number": phone_number,
             "status": "ERROR",
-            "error_message": str(e)
-        }
+            "error_message": str(e),
+            "status_code": e.status_code
+        }, True
 
 
 async def send_typing_indicator(to_number: str) -> Dict[str, Any]:
     """
     Sends a typing indicator (animated dots) to a recipient.
     
+    Repeated calls for the same recipient are debounced: the indicator is
+    kept alive by a background refresh, so calling again within a few
+    seconds returns COALESCED without another request. Calls right after a
+    message was sent to the recipient return SUPPRESSED.
+    
     Args:
         to_number: The E.164 formatted phone number to send the typing indicator to.
     
@@ -199,24 +697,29 @@ async def send_typing_indicator(to_number: str) -> Dict[str, Any]:
     # Validate parameters
     params = SendTypingIndicatorParams(to_number=to_number)
     
+    request_stats: Dict[str, Any] = {}
+    try:
+        # Make API request (or coalesce with a recent one)
+        response = await typing_debouncer.request(params.to_number, _post_typing_indicator, request_stats)
+        return _with_retry_info(response, request_stats)
+    except httpx.HTTPError as e:
+        return _error_result(e)
+
+
+async def _post_typing_indicator(number: str, stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Send one typing indicator request to Sendblue and return the API response."""
     # Prepare API request
     request_data = {
-        "number": params.to_number
+        "number": number
     }
     
-    try:
-        # Make API request
-        response = await make_sendblue_api_request(
-            endpoint="/send-typing-indicator",
-            method="POST",
-            data=request_data
-        )
-        return response
-    except httpx.HTTPError as e:
-        return {
-            "status": "ERROR",
-            "error_message": str(e)
-        }
+    # Make API request
+    return await make_sendblue_api_request(
+        endpoint="/send-typing-indicator",
+        method="POST",
+        data=request_data,
+        stats=stats
+    )
 
 
 async def get_message_history(
@@ -224,8 +727,15 @@ async def get_message_history(
     conversation_id: Optional[str] = None,
     limit: Optional[int] = 50,
     offset: Optional[int] = 0,
-    from_date: Optional[str] = None
-) -> List[Dict[str, Any]]:
+    from_date: Optional[str] = None,
+    fetch_all: bool = False,
+    max_messages: Optional[int] = None,
+    time_budget_seconds: Optional[float] = None,
+    fields: Optional[List[str]] = None,
+    max_bytes: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    max_content_chars: Optional[int] = None
+) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
     """
     Retrieves message history for the account.
     
@@ -235,9 +745,26 @@ async def get_message_history(
         limit: Maximum number of messages per request.
         offset: Offset for paginating through messages.
         from_date: Filter messages sent after this date/time (e.g., "2023-06-15 12:00:00").
+        fetch_all: Fetch every page matching the filters (starting at offset)
+            instead of a single page; limit is ignored in this mode.
+        max_messages: With fetch_all, stop after this many messages (the
+            newest ones from offset on; next_offset says where to continue).
+        time_budget_seconds: With fetch_all, stop after this many seconds.
+        fields: Only return these message fields, using normalized names
+            (e.g. ["date", "timestamp", "content", "is_outbound", "status",
+            "send_style"]); empty fields are omitted.
+        max_bytes: Approximate JSON size budget for the returned messages; the
+            newest messages that fit are kept.
+        max_tokens: Like max_bytes, expressed as an approximate token count.
+        max_content_chars: Truncate message content longer than this. Defaults
+            to SENDBLUE_HISTORY_MAX_CONTENT_CHARS when a budget is given.
     
     Returns:
-        List of message objects.
+        List of message objects as returned by Sendblue, or with fetch_all
+        or any of fields /
+        max_bytes / max_tokens / max_content_chars a dict containing the
+        messages, how many were omitted or truncated, and with fetch_all a
+        pagination summary.
     """
     # Validate parameters
     params = GetMessageHistoryParams(
@@ -245,7 +772,14 @@ async def get_message_history(
         conversation_id=conversation_id,
         limit=limit,
         offset=offset,
-        from_date=from_date
+        from_date=from_date,
+        fetch_all=fetch_all,
+        max_messages=max_messages,
+        time_budget_seconds=time_budget_seconds,
+        fields=fields,
+        max_bytes=max_bytes,
+        max_tokens=max_tokens,
+        max_content_chars=max_content_chars
     )
     
     # Prepare query parameters
@@ -257,15 +791,37 @@ async def get_message_history(
     if params.conversation_id:
         query_params["cid"] = params.conversation_id
     
+    if params.from_date:
+        query_params["from_date"] = params.from_date
+    
+    # Answer from the local mirror when it is enabled and up to date
+    if SENDBLUE_MIRROR_ENABLED and not params.conversation_id:
+        records = await _query_mirror(params)
+        if records is not None:
+            _index_history(records)
+            if not params.fetch_all:
+                return _format_history(records, params)
+            return _format_history(records, params, {"complete": True, "source": "mirror"})
+    
+    if params.fetch_all:
+        try:
+            records, summary = await fetch_all_messages(
+                query_params,
+                start_offset=params.offset or 0,
+                max_messages=params.max_messages,
+                time_budget=params.time_budget_seconds
+            )
+        except httpx.HTTPError as e:
+            return _error_result(e)
+        _index_history(records)
+        return _format_history(records, params, {**summary, "source": "api"})
+    
     if params.limit:
         query_params["limit"] = params.limit
     
     if params.offset:
         query_params["offset"] = params.offset
     
-    if params.from_date:
-        query_params["from_date"] = params.from_date
-    
     try:
         # Make API request
         response = await make_sendblue_api_request(
@@ -274,12 +830,449 @@ async def get_message_history(
             params=query_params
         )
         # Return the messages array from the response
-        return response.get("messages", [])
+        records = normalize_messages(response.get("messages", []))
+        _index_history(records)
+        return _format_history(records, params)
     except httpx.HTTPError as e:
-        return [{
+        return [_error_result(e)]
+
+
+def _index_history(records: List[MessageRecord]) -> None:
+    """Feed fetched history into the conversation index and the search index."""
+    conversation_index.add(records)
+    if SENDBLUE_SEARCH_ENABLED:
+        get_search_index().add(records)
+
+
+def _format_history(
+    records: List[MessageRecord],
+    params: GetMessageHistoryParams,
+    summary: Optional[Dict[str, Any]] = None
+) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Serialize history records, applying the field projection and output budget.
+    
+    Returns:
+        A plain list of messages when neither a summary nor any shaping was
+        requested, otherwise a dict with the messages and counts.
+    """
+    max_bytes = params.max_bytes
+    if params.max_tokens is not None:
+        token_bytes = params.max_tokens * BYTES_PER_TOKEN
+        max_bytes = token_bytes if max_bytes is None else min(max_bytes, token_bytes)
+    max_content_chars = params.max_content_chars
+    if max_content_chars is None and max_bytes is not None:
+        max_content_chars = SENDBLUE_HISTORY_MAX_CONTENT_CHARS
+    
+    if summary is None and params.fields is None and max_bytes is None and max_content_chars is None:
+        return serialize_messages(records)
+    
+    messages, budget = serialize_within_budget(
+        records,
+        fields=params.fields,
+        max_bytes=max_bytes,
+        max_content_chars=max_content_chars
+    )
+    return {
+        "messages": messages,
+        "count": len(messages),
+        **budget,
+        **(summary or {})
+    }
+
+
+async def _query_mirror(params: GetMessageHistoryParams) -> Optional[List[MessageRecord]]:
+    """
+    Answer a history query from the local mirror, syncing it first if stale.
+    
+    Returns:
+        The matching message records, or None if the mirror cannot answer (sync failed
+        or did not catch up, or the filters cannot be evaluated locally).
+    """
+    mirror = get_message_mirror()
+    if not mirror.is_fresh():
+        try:
+            summary = await mirror.sync()
+        except httpx.HTTPError as e:
+            logger.warning(f"Message mirror sync failed, falling back to the API: {str(e)}")
+            return None
+        if not summary["complete"]:
+            return None
+    
+    if params.fetch_all:
+        limit = params.max_messages or SENDBLUE_HISTORY_MAX_MESSAGES
+    else:
+        limit = params.limit
+    try:
+        records = mirror.query(
+            number=params.contact_phone_number,
+            from_date=params.from_date,
+            limit=limit,
+            offset=params.offset or 0
+        )
+    except ValueError:
+        # from_date in a format we cannot parse locally; let Sendblue handle it
+        return None
+    # Single pages keep the API's newest-first order; fetch_all results are oldest first
+    if params.fetch_all:
+        records.reverse()
+    return records
+
+
+def _conversations_unavailable() -> Optional[Dict[str, Any]]:
+    """Return an error result if the conversation index is disabled."""
+    if not conversation_index.enabled:
+        return {
+            "status": "ERROR",
+            "error_message": "The conversation index is disabled; set SENDBLUE_CONVERSATIONS_ENABLED=true"
+        }
+    return None
+
+
+async def list_conversations(
+    limit: int = 20,
+    offset: int = 0,
+    unread_only: bool = False
+) -> Dict[str, Any]:
+    """
+    Lists conversations (one per contact or group chat), most recently active
+    first, from the local conversation index.
+    
+    The index is filled by get_message_history calls and by inbound messages
+    posted to the webhook receiver; call get_message_history with
+    fetch_all=true first to index the account's history.
+    
+    Args:
+        limit: Maximum number of conversations to return.
+        offset: Number of conversations to skip.
+        unread_only: Only conversations with inbound messages newer than the
+            last reply or the last get_conversation call.
+    
+    Returns:
+        Dict with the conversations (number or group_id, last activity,
+        message, inbound and unread counts, and a preview of the newest
+        message) and the number of indexed conversations.
+    """
+    # Validate parameters
+    params = ListConversationsParams(limit=limit, offset=offset, unread_only=unread_only)
+    
+    error = _conversations_unavailable()
+    if error is not None:
+        return error
+    
+    conversations = conversation_index.recent(params.limit, params.offset, params.unread_only)
+    return {
+        "conversations": [conversation.summary() for conversation in conversations],
+        "count": len(conversations),
+        "total_conversations": len(conversation_index)
+    }
+
+
+async def get_conversation(
+    phone_number: Optional[str] = None,
+    group_id: Optional[str] = None,
+    limit: int = 50,
+    before: Optional[str] = None,
+    mark_read: bool = True
+) -> Dict[str, Any]:
+    """
+    Returns the latest messages of one conversation from the local
+    conversation index, without calling the Sendblue API.
+    
+    Args:
+        phone_number: The E.164 formatted phone number of the contact.
+        group_id: The ID of the group chat; takes precedence over phone_number.
+        limit: Maximum number of messages to return (the newest ones).
+        before: Only messages sent before this ISO 8601 date/time, e.g. the
+            `date` of the oldest message already seen, to page backwards.
+        mark_read: Reset the conversation's unread counter.
+    
+    Returns:
+        Dict with the conversation summary (unread count as of before this
+        call), its messages (oldest first) and whether older indexed messages
+        exist.
+    """
+    # Validate parameters
+    params = GetConversationParams(
+        phone_number=phone_number,
+        group_id=group_id,
+        limit=limit,
+        before=before,
+        mark_read=mark_read
+    )
+    
+    error = _conversations_unavailable()
+    if error is not None:
+        return error
+    
+    conversation = conversation_index.get(params.phone_number, params.group_id)
+    if conversation is None:
+        target = f"group {params.group_id}" if params.group_id else params.phone_number
+        return {
+            "status": "ERROR",
+            "error_message": f"No indexed conversation with {target}; call get_message_history "
+                             f"to index its messages"
+        }
+    
+    records, has_more = conversation.page(
+        params.limit,
+        before=parse_timestamp(params.before) if params.before else None
+    )
+    summary = conversation.summary()
+    if params.mark_read:
+        conversation.mark_read()
+    return {
+        "conversation": summary,
+        "messages": serialize_messages(records),
+        "count": len(records),
+        "has_more": has_more
+    }
+
+
+async def search_messages(
+    query: str,
+    contact_phone_number: Optional[str] = None,
+    group_id: Optional[str] = None,
+    is_outbound: Optional[bool] = None,
+    status: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    order: str = "newest",
+    limit: int = 20,
+    offset: int = 0
+) -> Dict[str, Any]:
+    """
+    Searches message content with a local full-text index, without paging
+    through the account history.
+    
+    The index is filled by get_message_history calls and by inbound messages
+    posted to the webhook receiver; call get_message_history with
+    fetch_all=true first to index the account's history.
+    
+    Args:
+        query: Words that must all appear in the message, in any order.
+            "Double quoted" text must appear as a phrase and a trailing *
+            matches word prefixes (e.g. 'refund "order 1234" ship*').
+        contact_phone_number: Only messages with this E.164 phone number.
+        group_id: Only messages in this group chat.
+        is_outbound: Only sent (true) or received (false) messages.
+        status: Only messages with this status (e.g. DELIVERED, ERROR).
+        from_date: Only messages sent at or after this ISO 8601 date/time.
+        to_date: Only messages sent before this ISO 8601 date/time.
+        order: "newest" (default) or "relevance".
+        limit: Maximum number of messages to return.
+        offset: Number of matches to skip.
+    
+    Returns:
+        Dict with the matching messages (each with a `snippet` of its content
+        with the matched words in [brackets]) and whether more matches exist.
+    """
+    # Validate parameters
+    params = SearchMessagesParams(
+        query=query,
+        contact_phone_number=contact_phone_number,
+        group_id=group_id,
+        is_outbound=is_outbound,
+        status=status,
+        from_date=from_date,
+        to_date=to_date,
+        order=order,
+        limit=limit,
+        offset=offset
+    )
+    
+    if not SENDBLUE_SEARCH_ENABLED:
+        return {
             "status": "ERROR",
-            "error_message": str(e)
-        }]
+            "error_message": "Message search is disabled; set SENDBLUE_SEARCH_ENABLED=true"
+        }
+    
+    try:
+        results, has_more = get_search_index().search(
+            params.query,
+            number=params.contact_phone_number,
+            group_id=params.group_id,
+            is_outbound=params.is_outbound,
+            status=params.status,
+            since=parse_timestamp(params.from_date) if params.from_date else None,
+            until=parse_timestamp(params.to_date) if params.to_date else None,
+            order=params.order,
+            limit=params.limit,
+            offset=params.offset
+        )
+    except ValueError as e:
+        return {"status": "ERROR", "error_message": str(e)}
+    
+    messages = []
+    for record, snippet in results:
+        message = record.to_dict()
+        message["snippet"] = snippet
+        messages.append(message)
+    return {
+        "messages": messages,
+        "count": len(messages),
+        "has_more": has_more
+    }
+
+
+async def wait_for_reply(
+    phone_number: Optional[str] = None,
+    group_id: Optional[str] = None,
+    since: Optional[str] = None,
+    timeout_seconds: float = 60.0
+) -> Dict[str, Any]:
+    """
+    Waits for a contact or group to reply, using messages pushed to the
+    webhook receiver instead of polling the API.
+    
+    Args:
+        phone_number: The E.164 formatted phone number of the contact.
+        group_id: The ID of the group chat; takes precedence over phone_number.
+        since: Also return replies already received that were sent after this
+            ISO 8601 date/time (e.g. the `date` of your last message). Without
+            it only replies arriving after the call are returned.
+        timeout_seconds: Maximum time to wait for a reply.
+    
+    Returns:
+        Dict with status "REPLIED" and the reply messages (oldest first), or
+        status "TIMEOUT" if nothing arrived in time.
+    """
+    # Validate parameters
+    params = WaitForReplyParams(
+        phone_number=phone_number,
+        group_id=group_id,
+        since=since,
+        timeout_seconds=timeout_seconds
+    )
+    
+    if not SENDBLUE_WEBHOOK_ENABLED:
+        return {
+            "status": "ERROR",
+            "error_message": "The webhook receiver is disabled; set SENDBLUE_WEBHOOK_ENABLED=true "
+                             "and point Sendblue's inbound webhook at it to use wait_for_reply"
+        }
+    if not webhook_receiver.running:
+        return {
+            "status": "ERROR",
+            "error_message": "The webhook receiver is not running; check the server log for startup errors"
+        }
+    
+    started = time.monotonic()
+    entries = await inbound_buffer.wait(
+        number=params.phone_number,
+        group_id=params.group_id,
+        since=parse_timestamp(params.since) if params.since else None,
+        timeout=params.timeout_seconds
+    )
+    waited = round(time.monotonic() - started, 3)
+    if not entries:
+        return {"status": "TIMEOUT", "messages": [], "waited_seconds": waited}
+    
+    messages = []
+    for _, received_at, record in entries:
+        message = record.to_dict()
+        message["received_at"] = format_timestamp(received_at)
+        messages.append(message)
+    return {
+        "status": "REPLIED",
+        "messages": messages,
+        "count": len(messages),
+        "waited_seconds": waited
+    }
+
+
+def _delivery_unavailable() -> Optional[Dict[str, Any]]:
+    """Return an error result if status callbacks cannot be received."""
+    if not webhook_receiver.running:
+        return {
+            "status": "ERROR",
+            "error_message": "Delivery tracking needs the webhook receiver; set SENDBLUE_WEBHOOK_ENABLED=true "
+                             "and SENDBLUE_WEBHOOK_PUBLIC_URL"
+        }
+    return None
+
+
+def _delivery_statuses(handles: List[str]) -> Dict[str, Any]:
+    """Split handles into tracked delivery states and handles with no callback yet."""
+    statuses = {}
+    unknown = []
+    for handle in handles:
+        state = delivery_tracker.get(handle)
+        if state is None:
+            unknown.append(handle)
+        else:
+            statuses[handle] = state.to_dict()
+    return {"statuses": statuses, "unknown": unknown}
+
+
+async def get_delivery_status(message_handles: List[str]) -> Dict[str, Any]:
+    """
+    Returns the latest delivery status of sent messages, as reported by
+    Sendblue's status callbacks.
+    
+    Args:
+        message_handles: Message handles returned by send_message,
+            send_messages_bulk or send_group_message.
+    
+    Returns:
+        Dict mapping each known handle to its status (QUEUED, SENT, DELIVERED,
+        READ or ERROR, with error details), plus the handles that are not
+        tracked (not sent through this server, or evicted).
+    """
+    # Validate parameters
+    params = GetDeliveryStatusParams(message_handles=message_handles)
+    
+    error = _delivery_unavailable()
+    if error is not None:
+        return error
+    
+    return {"status": "OK", **_delivery_statuses(params.message_handles)}
+
+
+async def await_delivery(
+    message_handles: List[str],
+    until: str = "DELIVERED",
+    timeout_seconds: float = 60.0
+) -> Dict[str, Any]:
+    """
+    Waits until sent messages reach a delivery status, using Sendblue's status
+    callbacks instead of polling message history.
+    
+    A message also stops being waited on when it fails (ERROR), and SMS
+    messages count as done once SENT since carriers do not report delivery.
+    
+    Args:
+        message_handles: Message handles returned by the send tools.
+        until: Status to wait for: "SENT", "DELIVERED" (default) or "READ".
+        timeout_seconds: Maximum time to wait.
+    
+    Returns:
+        Dict with status "COMPLETED" or "TIMEOUT", each message's latest status,
+        and the handles still pending.
+    """
+    # Validate parameters
+    params = AwaitDeliveryParams(
+        message_handles=message_handles,
+        until=until,
+        timeout_seconds=timeout_seconds
+    )
+    
+    error = _delivery_unavailable()
+    if error is not None:
+        return error
+    
+    started = time.monotonic()
+    pending = await delivery_tracker.wait(
+        params.message_handles,
+        target=params.until,
+        timeout=params.timeout_seconds
+    )
+    return {
+        "status": "TIMEOUT" if pending else "COMPLETED",
+        **_delivery_statuses(params.message_handles),
+        "pending": pending,
+        "waited_seconds": round(time.monotonic() - started, 3)
+    }
 
 
 async def add_recipient_to_group(
@@ -289,6 +1282,9 @@ async def add_recipient_to_group(
     """
     Adds a new recipient to an existing group chat.
     
+    If the group is in the group registry, its member set is updated so
+    send_group_message resolves the new members to this group.
+    
     Args:
         group_id: The ID (uuid) of the group to which the recipient will be added.
         recipient_number: The E.164 formatted phone number of the recipient to add to the group.
@@ -302,56 +1298,399 @@ async def add_recipient_to_group(
         recipient_number=recipient_number
     )
     
+    request_stats: Dict[str, Any] = {}
+    try:
+        response = await _add_group_recipient(params.group_id, params.recipient_number, request_stats)
+        if SENDBLUE_GROUP_REGISTRY_ENABLED:
+            get_group_registry().add_members(params.group_id, [params.recipient_number])
+        return _with_retry_info(response, request_stats)
+    except httpx.HTTPError as e:
+        return _error_result(e)
+
+
+async def _add_group_recipient(
+    group_id: str,
+    number: str,
+    stats: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    POST one add_recipient change to /modify-group.
+    
+    Raises:
+        httpx.HTTPError: If the request fails
+    """
     # Prepare API request
     request_data = {
-        "group_id": params.group_id,
+        "group_id": group_id,
         "modify_type": "add_recipient",  # Hardcoded to add_recipient as per spec
-        "number": params.recipient_number
+        "number": number
     }
+    return await make_sendblue_api_request(
+        endpoint="/modify-group",
+        method="POST",
+        data=request_data,
+        stats=stats
+    )
+
+
+async def add_recipients_to_group(
+    group_id: str,
+    recipient_numbers: List[str],
+    max_concurrency: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Adds several recipients to an existing group chat in one call.
     
-    try:
-        # Make API request
-        response = await make_sendblue_api_request(
-            endpoint="/modify-group",
-            method="POST",
-            data=request_data
-        )
-        return response
-    except httpx.HTTPError as e:
+    All numbers are validated before anything is sent, and duplicates are
+    dropped. Numbers the group registry already knows to be members of the
+    group are skipped. The rest are added a few at a time; a failed add is
+    reported in its own result without stopping the others.
+    
+    Args:
+        group_id: The ID (uuid) of the group to which the recipients will be added.
+        recipient_numbers: E.164 formatted phone numbers of the recipients to add (max 25).
+        max_concurrency: Maximum number of modify-group requests in flight at once.
+    
+    Returns:
+        Dict with one result per number (in input order) and a summary.
+    """
+    # Validate parameters
+    params = AddRecipientsToGroupParams(
+        group_id=group_id,
+        recipient_numbers=recipient_numbers,
+        max_concurrency=max_concurrency
+    )
+    concurrency = params.max_concurrency or SENDBLUE_GROUP_ADD_CONCURRENCY
+    
+    group = get_group_registry().get(params.group_id) if SENDBLUE_GROUP_REGISTRY_ENABLED else None
+    known = set(group["members"]) if group is not None else set()
+    pending = [number for number in params.recipient_numbers if number not in known]
+    if len(known) + len(pending) > MAX_GROUP_MEMBERS:
         return {
             "status": "ERROR",
-            "error_message": str(e)
+            "error_message": (
+                f"Group {params.group_id} has {len(known)} known members; adding {len(pending)} more "
+                f"would exceed {MAX_GROUP_MEMBERS} participants"
+            )
         }
+    
+    results: Dict[str, Dict[str, Any]] = {
+        number: {"number": number, "status": "SKIPPED", "reason": "already a member"}
+        for number in params.recipient_numbers if number in known
+    }
+    semaphore = asyncio.Semaphore(concurrency)
+    retries = 0
+    
+    async def add_one(number: str) -> None:
+        nonlocal retries
+        async with semaphore:
+            request_stats: Dict[str, Any] = {}
+            try:
+                response = await _add_group_recipient(params.group_id, number, request_stats)
+                results[number] = {
+                    "number": number,
+                    "status": response.get("status", "SUCCESS"),
+                    "message": response.get("message")
+                }
+            except httpx.HTTPError as e:
+                results[number] = {"number": number, **_error_result(e)}
+            retries += request_stats.get("retries", 0)
+    
+    started = time.monotonic()
+    await asyncio.gather(*(add_one(number) for number in pending))
+    elapsed = time.monotonic() - started
+    
+    added = [number for number in pending if results[number]["status"] != "ERROR"]
+    if added and SENDBLUE_GROUP_REGISTRY_ENABLED:
+        get_group_registry().add_members(params.group_id, added)
+    
+    return {
+        "status": "COMPLETED",
+        "group_id": params.group_id,
+        "results": [results[number] for number in params.recipient_numbers],
+        "summary": {
+            "total": len(params.recipient_numbers),
+            "added": len(added),
+            "skipped": len(params.recipient_numbers) - len(pending),
+            "failed": len(pending) - len(added),
+            "retries": retries,
+            "max_concurrency": concurrency,
+            "elapsed_seconds": round(elapsed, 3)
+        }
+    }
 
 
-async def upload_media_for_sending(media_file_url: str) -> Dict[str, Any]:
+async def upload_media_for_sending(media_file_url: str, force_refresh: bool = False) -> Dict[str, Any]:
     """
     Uploads a media file from a publicly accessible URL to Sendblue's servers.
     
+    Uploads are cached by URL, so uploading the same file again returns the
+    existing media object without another upload.
+    
     Args:
         media_file_url: The publicly accessible URL of the media file.
+        force_refresh: Upload again even if the file was uploaded before.
     
     Returns:
-        Dict containing upload status and mediaObjectId if successful.
+        Dict containing upload status and mediaObjectId if successful, and
+        whether the media object came from the cache.
     """
     # Validate parameters
     params = UploadMediaParams(media_file_url=media_file_url)
     
-    # Prepare API request
-    request_data = {
-        "media_url": params.media_file_url
-    }
+    if not SENDBLUE_MEDIA_CACHE_ENABLED:
+        request_stats: Dict[str, Any] = {}
+        try:
+            response = await _upload_media(params.media_file_url, request_stats)
+            return _with_retry_info(response, request_stats)
+        except httpx.HTTPError as e:
+            return _error_result(e)
+    
+    uploaded: Dict[str, Any] = {}
+    
+    async def upload(url: str) -> Dict[str, Any]:
+        response = await _upload_media(url)
+        uploaded.update(response)
+        return response
     
     try:
-        # Make API request
-        response = await make_sendblue_api_request(
-            endpoint="/upload-media-object",
-            method="POST",
-            data=request_data
+        entry, cached = await get_media_cache().resolve(
+            params.media_file_url,
+            upload,
+            force_refresh=force_refresh
         )
-        return response
     except httpx.HTTPError as e:
+        return _error_result(e)
+    if uploaded:
+        # This call made the upload; return Sendblue's full response
+        return {**uploaded, "cached": False}
+    if "media_object_id" not in entry:
+        # Upload response without a media object; nothing was cached
+        return {**entry, "cached": False}
+    return {
+        "status": "OK",
+        "mediaObjectId": entry["media_object_id"],
+        "cached": cached
+    }
+
+
+async def _upload_media(media_url: str, stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Upload a media file to Sendblue and return the API response."""
+    # Prepare API request
+    request_data = {
+        "media_url": media_url
+    }
+    
+    # Make API request
+    return await make_sendblue_api_request(
+        endpoint="/upload-media-object",
+        method="POST",
+        data=request_data,
+        stats=stats
+    )
+
+
+def _describe_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Format a send job for tool output."""
+    description = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "endpoint": job["endpoint"],
+        "to": job["payload"].get("number") or job["payload"].get("numbers") or job["payload"].get("group_id"),
+        "created_at": format_timestamp(job["created_at"])
+    }
+    if job["available_at"] > job["created_at"]:
+        description["available_at"] = format_timestamp(job["available_at"])
+    if job["finished_at"]:
+        description["finished_at"] = format_timestamp(job["finished_at"])
+    if job["message_handle"]:
+        description["message_handle"] = job["message_handle"]
+    if job["error"]:
+        description["error_message"] = job["error"]
+    return description
+
+
+async def get_send_job(job_id: str) -> Dict[str, Any]:
+    """
+    Returns the state of a queued send.
+    
+    Args:
+        job_id: The job id returned by send_message or send_group_message
+            with enqueue=true.
+    
+    Returns:
+        Dict with the job status (queued, dispatching, sent, failed, or
+        unknown if the server stopped mid-send) and, once finished, the
+        message_handle and Sendblue response or error.
+    """
+    # Validate parameters
+    params = GetSendJobParams(job_id=job_id)
+    
+    if not SENDBLUE_QUEUE_ENABLED:
+        return _queue_disabled()
+    
+    job = get_send_queue().get(params.job_id)
+    if job is None:
+        return {"status": "ERROR", "error_message": f"No send job with id {params.job_id}"}
+    return {**_describe_job(job), "response": job["result"]}
+
+
+async def list_send_jobs(
+    status: Optional[str] = None,
+    limit: int = 50,
+    offset: int = 0
+) -> Dict[str, Any]:
+    """
+    Lists queued sends, newest first.
+    
+    Args:
+        status: Only jobs in this state (queued, dispatching, sent, failed, unknown).
+        limit: Maximum number of jobs to return.
+        offset: Number of jobs to skip.
+    
+    Returns:
+        Dict with the jobs and the number of jobs in each state.
+    """
+    # Validate parameters
+    params = ListSendJobsParams(status=status, limit=limit, offset=offset)
+    
+    if not SENDBLUE_QUEUE_ENABLED:
+        return _queue_disabled()
+    
+    queue = get_send_queue()
+    jobs = queue.list(status=params.status, limit=params.limit, offset=params.offset)
+    return {
+        "jobs": [_describe_job(job) for job in jobs],
+        "counts": queue.counts()
+    }
+
+
+async def schedule_message(
+    to_number: str,
+    content: Optional[str] = None,
+    from_number: Optional[str] = None,
+    media_url: Optional[str] = None,
+    send_style: Optional[str] = None,
+    status_callback: Optional[str] = None,
+    send_at: Optional[str] = None,
+    delay_seconds: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Schedules a message (iMessage or SMS) to be sent later.
+    
+    The message is stored locally and moved into the send queue when due, so
+    it is sent even if the server restarts in between (as long as it is
+    running at or after the scheduled time).
+    
+    Args:
+        to_number: The E.164 formatted phone number of the recipient.
+        content: The text content of the message.
+        from_number: The E.164 formatted Sendblue number to send the message from.
+        media_url: Publicly accessible URL of an image or .caf voice note file.
+        send_style: Expressive style for iMessage (e.g., "invisible", "fireworks", "slam").
+        status_callback: Webhook URL for message status updates.
+        send_at: ISO 8601 date/time to send at, e.g. "2024-05-01T15:00:00Z"
+            (UTC if no offset is given).
+        delay_seconds: Send this many seconds from now instead of at send_at.
+    
+    Returns:
+        Dict with the schedule_id and the time the message will be sent.
+    """
+    # Validate parameters
+    params = ScheduleMessageParams(
+        to_number=to_number,
+        content=content,
+        from_number=from_number,
+        media_url=media_url,
+        send_style=send_style,
+        status_callback=status_callback,
+        send_at=send_at,
+        delay_seconds=delay_seconds
+    )
+    
+    scheduler = get_scheduler()
+    if scheduler is None:
+        return {
+            "status": "ERROR",
+            "error_message": "Scheduled sends need the send queue; set SENDBLUE_QUEUE_ENABLED=true"
+        }
+    
+    send_at_ts = params.send_at_timestamp()
+    schedule_id = scheduler.schedule("/send-message", _build_send_message_request(params), send_at_ts)
+    return {
+        "status": "SCHEDULED",
+        "schedule_id": schedule_id,
+        "send_at": format_timestamp(send_at_ts)
+    }
+
+
+async def cancel_scheduled_message(schedule_id: int) -> Dict[str, Any]:
+    """
+    Cancels a message scheduled with schedule_message that has not been sent yet.
+    
+    Args:
+        schedule_id: The schedule id returned by schedule_message.
+    
+    Returns:
+        Dict with status "CANCELLED", or an error if the message was already
+        released to the send queue, cancelled, or is unknown.
+    """
+    # Validate parameters
+    params = CancelScheduledMessageParams(schedule_id=schedule_id)
+    
+    scheduler = get_scheduler()
+    if scheduler is None:
         return {
             "status": "ERROR",
-            "error_message": str(e)
-        }
\ No newline at end of file
+            "error_message": "Scheduled sends need the send queue; set SENDBLUE_QUEUE_ENABLED=true"
+        }
+    
+    if scheduler.cancel(params.schedule_id):
+        return {"status": "CANCELLED", "schedule_id": params.schedule_id}
+    
+    entry = scheduler.get(params.schedule_id)
+    if entry is None:
+        return {"status": "ERROR", "error_message": f"No scheduled message with id {params.schedule_id}"}
+    error = {
+        "status": "ERROR",
+        "error_message": f"Scheduled message {params.schedule_id} is already {entry['status']}"
+    }
+    if entry["job_id"]:
+        error["job_id"] = entry["job_id"]
+    return error
+
+
+async def get_api_diagnostics() -> Dict[str, Any]:
+    """
+    Reports the current state of the client-side traffic controls.
+    
+    Returns:
+        Dict containing the per-endpoint rate limiter state (request rate,
+        adaptive concurrency window, in-flight and waiting requests, and any
+        Retry-After pause currently in effect), circuit breaker states per
+        endpoint and sending line, request hedging for read-only endpoints
+        (hedge delay, hedges sent and won, budget), per-line send lanes (queue depth and
+        latency per from_number), sender pool assignments, typing indicator
+        debouncing, the conversation index, number lookup cache statistics,
+        message mirror freshness, the search index size, the group registry,
+        the inbound webhook buffer, delivery tracking, the media upload cache,
+        the send queue, and scheduled sends.
+    """
+    return {
+        "rate_limits": rate_limiters.snapshot(),
+        "circuit_breakers": circuit_breakers.snapshot(),
+        "request_hedging": request_hedgers.snapshot(),
+        "send_lanes": send_lanes.snapshot(),
+        "sender_pool": sender_pool.snapshot() if sender_pool.enabled else None,
+        "typing_indicators": typing_debouncer.snapshot(),
+        "conversations": conversation_index.snapshot(),
+        "lookup_cache": get_lookup_cache().snapshot() if SENDBLUE_LOOKUP_CACHE_ENABLED else None,
+        "message_mirror": get_message_mirror().snapshot() if SENDBLUE_MIRROR_ENABLED else None,
+        "message_search": get_search_index().snapshot() if SENDBLUE_SEARCH_ENABLED else None,
+        "group_registry": get_group_registry().snapshot() if SENDBLUE_GROUP_REGISTRY_ENABLED else None,
+        "inbound_webhooks": inbound_buffer.snapshot() if SENDBLUE_WEBHOOK_ENABLED else None,
+        "delivery_tracking": delivery_tracker.snapshot() if SENDBLUE_WEBHOOK_ENABLED else None,
+        "media_cache": get_media_cache().snapshot() if SENDBLUE_MEDIA_CACHE_ENABLED else None,
+        "send_queue": get_send_workers().snapshot() if get_send_workers() is not None else None,
+        "scheduler": get_scheduler().snapshot() if get_scheduler() is not None else None
+    }
@@ -0,0 +1,197 @@
+"""
+Debouncing for typing indicators.
+
+Agents call send_typing_indicator repeatedly while composing a reply. Per
+recipient, only the first call in a window becomes an API request. A single
+call makes exactly one request; when further calls arrive while that
+indicator is still showing, they are coalesced and a background timer
+re-sends it every refresh interval until no call has been seen for the
+active period.
+Once a message to the recipient goes out the indicator stops, and calls
+arriving right after the send are dropped as stale.
+
+Typing indicators have their own rate limiter budget, so they never take
+tokens from message sends.
+"""
+import asyncio
+import contextlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from src.config import (
+    SENDBLUE_TYPING_DEBOUNCE_ENABLED,
+    SENDBLUE_TYPING_DEBOUNCE_WINDOW,
+    SENDBLUE_TYPING_REFRESH_INTERVAL,
+    SENDBLUE_TYPING_ACTIVE_FOR,
+    SENDBLUE_TYPING_SUPPRESS_AFTER_SEND
+)
+
+logger = logging.getLogger("sendblue-mcp")
+
+# Recipients tracked at once; the least recently active are dropped first
+MAX_RECIPIENTS = 10000
+
+# Sends one typing indicator: (number, stats) -> Sendblue response
+IndicatorSender = Callable[[str, Optional[Dict[str, Any]]], Awaitable[Dict[str, Any]]]
+
+
+@dataclass(slots=True)
+class TypingState:
+    """Typing indicator state for one recipient (monotonic times)."""
+    last_sent: float = 0.0
+    active_until: float = 0.0
+    suppressed_until: float = 0.0
+    in_flight: bool = False
+    refresher: Optional["asyncio.Task[None]"] = None
+
+
+class TypingDebouncer:
+    """Coalesces typing indicator calls per recipient and refreshes active ones."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        window: float = SENDBLUE_TYPING_DEBOUNCE_WINDOW,
+        refresh_interval: float = SENDBLUE_TYPING_REFRESH_INTERVAL,
+        active_for: float = SENDBLUE_TYPING_ACTIVE_FOR,
+        suppress_after_send: float = SENDBLUE_TYPING_SUPPRESS_AFTER_SEND
+    ):
+        self.enabled = enabled
+        self.window = window
+        self.refresh_interval = refresh_interval
+        self.active_for = active_for
+        self.suppress_after_send = suppress_after_send
+        self.sent = 0
+        self.coalesced = 0
+        self.refreshed = 0
+        self.suppressed = 0
+        self._states: "OrderedDict[str, TypingState]" = OrderedDict()
+
+    def _state(self, number: str) -> TypingState:
+        state = self._states.get(number)
+        if state is None:
+            state = TypingState()
+            self._states[number] = state
+            while len(self._states) > MAX_RECIPIENTS:
+                _, evicted = self._states.popitem(last=False)
+                if evicted.refresher is not None:
+                    evicted.refresher.cancel()
+        else:
+            self._states.move_to_end(number)
+        return state
+
+    async def request(
+        self,
+        number: str,
+        send: IndicatorSender,
+        stats: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Show the typing indicator to a recipient, sending a request only if needed.
+
+        Args:
+            number (str): The recipient
+            send: Coroutine function making the API request; also used for refreshes
+            stats (Optional[Dict[str, Any]]): Filled with retry statistics if a request is made
+
+        Returns:
+            Dict[str, Any]: Sendblue's response, or a COALESCED / SUPPRESSED
+            status when no request was made
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        if not self.enabled:
+            return await send(number, stats)
+
+        now = time.monotonic()
+        state = self._state(number)
+        if now < state.suppressed_until:
+            self.suppressed += 1
+            return {
+                "status": "SUPPRESSED",
+                "number": number,
+                "reason": "A message was just sent to this number"
+            }
+
+        state.active_until = now + self.active_for
+        if state.in_flight or now - state.last_sent < self.window:
+            self.coalesced += 1
+            self._ensure_refresher(number, state, send)
+            return {"status": "COALESCED", "number": number}
+
+        state.last_sent = now
+        state.in_flight = True
+        try:
+            response = await send(number, stats)
+        except httpx.HTTPError:
+            # Let the next call try again right away
+            state.last_sent = 0.0
+            raise
+        finally:
+            state.in_flight = False
+        self.sent += 1
+        return response
+
+    def _ensure_refresher(self, number: str, state: TypingState, send: IndicatorSender) -> None:
+        if state.refresher is None or state.refresher.done():
+            state.refresher = asyncio.ensure_future(self._refresh(number, state, send))
+
+    async def _refresh(self, number: str, state: TypingState, send: IndicatorSender) -> None:
+        """Re-send the indicator every refresh interval while it is active."""
+        while True:
+            await asyncio.sleep(max(0.0, state.last_sent + self.refresh_interval - time.monotonic()))
+            if time.monotonic() >= state.active_until:
+                return
+            state.last_sent = time.monotonic()
+            try:
+                await send(number, None)
+            except httpx.HTTPError as e:
+                logger.debug(f"Typing indicator refresh for {number} failed: {str(e)}")
+                return
+            self.refreshed += 1
+
+    def message_sent(self, number: str) -> None:
+        """Stop the indicator for a recipient a message is being sent to."""
+        state = self._states.get(number)
+        if state is None:
+            return
+        if state.refresher is not None:
+            state.refresher.cancel()
+            state.refresher = None
+        state.active_until = 0.0
+        state.last_sent = 0.0
+        state.suppressed_until = time.monotonic() + self.suppress_after_send
+
+    async def close(self) -> None:
+        """Cancel every refresh timer."""
+        refreshers = [state.refresher for state in self._states.values() if state.refresher is not None]
+        for task in refreshers:
+            task.cancel()
+        for task in refreshers:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._states.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return debouncer statistics for monitoring."""
+        return {
+            "enabled": self.enabled,
+            "tracked": len(self._states),
+            "refreshing": sum(
+                1 for state in self._states.values()
+                if state.refresher is not None and not state.refresher.done()
+            ),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "refreshed": self.refreshed,
+            "suppressed": self.suppressed
+        }
+
+
+typing_debouncer = TypingDebouncer(enabled=SENDBLUE_TYPING_DEBOUNCE_ENABLED)
@@ -0,0 +1,190 @@
+"""
+Embedded webhook receiver for Sendblue callbacks.
+
+When enabled, a small Starlette app served by uvicorn runs inside the MCP
+server's event loop. Sendblue POSTs inbound messages to it (configure the URL
+in the Sendblue dashboard), and each message is added to the inbound buffer
+that wait_for_reply reads from, the conversation index and the search index.
+Status callbacks for outbound messages update the delivery tracker behind
+await_delivery and get_delivery_status.
+"""
+import asyncio
+import contextlib
+import hmac
+import json
+import logging
+from typing import Optional
+from urllib.parse import urlencode
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from src.config import (
+    SENDBLUE_SEARCH_ENABLED,
+    SENDBLUE_WEBHOOK_HOST,
+    SENDBLUE_WEBHOOK_PORT,
+    SENDBLUE_WEBHOOK_PATH,
+    SENDBLUE_WEBHOOK_SECRET,
+    SENDBLUE_WEBHOOK_PUBLIC_URL,
+    SENDBLUE_WEBHOOK_STATUS_PATH
+)
+from src.conversations import conversation_index
+from src.delivery import delivery_tracker
+from src.inbound import inbound_buffer
+from src.records import MessageRecord
+from src.search import get_search_index
+
+logger = logging.getLogger("sendblue-mcp")
+
+
+def _authorized(request: Request) -> bool:
+    if not SENDBLUE_WEBHOOK_SECRET:
+        return True
+    provided = request.query_params.get("secret", "")
+    return hmac.compare_digest(provided, SENDBLUE_WEBHOOK_SECRET)
+
+
+async def _read_payload(request: Request):
+    """Return the JSON object posted by Sendblue, or an error response."""
+    if not _authorized(request):
+        return None, JSONResponse({"status": "ERROR", "error_message": "Unauthorized"}, status_code=401)
+    try:
+        payload = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None, JSONResponse({"status": "ERROR", "error_message": "Invalid JSON"}, status_code=400)
+    if not isinstance(payload, dict):
+        return None, JSONResponse({"status": "ERROR", "error_message": "Expected a JSON object"}, status_code=400)
+    return payload, None
+
+
+async def receive_inbound_message(request: Request) -> JSONResponse:
+    """Handle an inbound message POST from Sendblue."""
+    payload, error = await _read_payload(request)
+    if error is not None:
+        return error
+    record = MessageRecord.from_api(payload)
+    if inbound_buffer.add(record):
+        conversation_index.add((record,))
+        if SENDBLUE_SEARCH_ENABLED:
+            get_search_index().add((record,))
+    # Always acknowledge, otherwise Sendblue redelivers the webhook
+    return JSONResponse({"status": "OK"})
+
+
+async def receive_status_callback(request: Request) -> JSONResponse:
+    """Handle a status callback POST for an outbound message."""
+    payload, error = await _read_payload(request)
+    if error is not None:
+        return error
+    delivery_tracker.callbacks += 1
+    record = MessageRecord.from_api(payload)
+    delivery_tracker.update(record)
+    conversation_index.update_status(record)
+    if SENDBLUE_SEARCH_ENABLED:
+        get_search_index().update_status(record)
+    return JSONResponse({"status": "OK"})
+
+
+def create_webhook_app() -> Starlette:
+    """Build the Starlette app serving the webhook routes."""
+    return Starlette(routes=[
+        Route(SENDBLUE_WEBHOOK_PATH, receive_inbound_message, methods=["POST"]),
+        Route(SENDBLUE_WEBHOOK_STATUS_PATH, receive_status_callback, methods=["POST"])
+    ])
+
+
+class EmbeddedServer(uvicorn.Server):
+    """uvicorn server that leaves signal handling to the MCP server."""
+
+    def install_signal_handlers(self) -> None:
+        pass
+
+    @contextlib.contextmanager
+    def capture_signals(self):
+        yield
+
+
+def _create_server(host: str, port: int) -> EmbeddedServer:
+    config = uvicorn.Config(
+        create_webhook_app(),
+        host=host,
+        port=port,
+        # stdout carries the MCP stdio transport, so never log access lines
+        # there; uvicorn's loggers propagate to our stderr handler instead
+        log_config=None,
+        log_level="warning",
+        access_log=False,
+        lifespan="off"
+    )
+    return EmbeddedServer(config)
+
+
+class WebhookReceiver:
+    """Runs the webhook app in the current event loop."""
+
+    def __init__(self, host: str = SENDBLUE_WEBHOOK_HOST, port: int = SENDBLUE_WEBHOOK_PORT):
+        self.host = host
+        self.port = port
+        self._server: Optional[EmbeddedServer] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def start(self) -> None:
+        """
+        Start serving and wait until the socket is bound.
+
+        Raises:
+            RuntimeError: If the server fails to start (e.g. the port is in use)
+        """
+        self._server = _create_server(self.host, self.port)
+        self._task = asyncio.ensure_future(self._serve(self._server))
+        while not self._server.started:
+            if self._task.done():
+                self._server = None
+                self._task.exception()
+                raise RuntimeError(f"Webhook receiver failed to start on {self.host}:{self.port}")
+            await asyncio.sleep(0.05)
+
+    @staticmethod
+    async def _serve(server: EmbeddedServer) -> None:
+        try:
+            await server.serve()
+        except SystemExit:
+            # uvicorn exits the process instead of raising when it cannot bind
+            logger.error("Webhook receiver exited during startup")
+
+    async def stop(self) -> None:
+        """Stop serving and wait for in-flight requests to finish."""
+        if self._server is None:
+            return
+        self._server.should_exit = True
+        if self._task is not None:
+            with contextlib.suppress(Exception, asyncio.CancelledError):
+                await self._task
+        self._server = None
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the receiver is accepting requests."""
+        return self._server is not None and self._server.started
+
+
+webhook_receiver = WebhookReceiver()
+
+
+def default_status_callback() -> Optional[str]:
+    """
+    Return the public status callback URL of the running receiver.
+
+    Returns None unless the receiver is running and SENDBLUE_WEBHOOK_PUBLIC_URL
+    is configured, since Sendblue must be able to reach the URL.
+    """
+    if not SENDBLUE_WEBHOOK_PUBLIC_URL or not webhook_receiver.running:
+        return None
+    url = SENDBLUE_WEBHOOK_PUBLIC_URL.rstrip("/") + SENDBLUE_WEBHOOK_STATUS_PATH
+    if SENDBLUE_WEBHOOK_SECRET:
+        url += "?" + urlencode({"secret": SENDBLUE_WEBHOOK_SECRET})
+    return url
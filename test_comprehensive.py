@@ -21,12 +21,26 @@ try:
     from src.main import main, mcp
     from src.tools import (
         send_message,
+        send_messages_bulk,
         send_group_message,
         lookup_number_service,
+        lookup_number_services,
         send_typing_indicator,
         get_message_history,
+        list_conversations,
+        get_conversation,
+        search_messages,
+        wait_for_reply,
+        get_delivery_status,
+        await_delivery,
+        get_send_job,
+        list_send_jobs,
+        schedule_message,
+        cancel_scheduled_message,
         add_recipient_to_group,
-        upload_media_for_sending
+        add_recipients_to_group,
+        upload_media_for_sending,
+        get_api_diagnostics
     )
     print("✓ All imports successful")
 except Exception as e:
@@ -49,12 +63,26 @@ try:
     tools = mcp._tools if hasattr(mcp, '_tools') else {}
     expected_tools = [
         'send_message',
+        'send_messages_bulk',
         'send_group_message',
         'lookup_number_service',
+        'lookup_number_services',
         'send_typing_indicator',
         'get_message_history',
+        'list_conversations',
+        'get_conversation',
+        'search_messages',
+        'wait_for_reply',
+        'get_delivery_status',
+        'await_delivery',
+        'get_send_job',
+        'list_send_jobs',
+        'schedule_message',
+        'cancel_scheduled_message',
         'add_recipient_to_group',
-        'upload_media_for_sending'
+        'add_recipients_to_group',
+        'upload_media_for_sending',
+        'get_api_diagnostics'
     ]
     
     registered_tools = list(tools.keys())
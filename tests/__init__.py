@@ -1,3 +1,8 @@
 """
 Test package for the Sendblue MCP server.
-"""
\ No newline at end of file
+
+Tests run with the default feature settings. Test cases that go through the
+tools call use_temp_data_dir() from tests.state_helper in setUp, so every
+database lives in an empty temporary directory, and run reset_state() on
+their event loop in tearDown.
+"""
@@ -0,0 +1,53 @@
+"""
+Per-test isolation of the server's process-wide state.
+"""
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.circuit import circuit_breakers
+from src.conversations import conversation_index
+from src.groups import close_group_registry
+from src.lanes import send_lanes
+from src.lookup_cache import close_lookup_cache
+from src.media_cache import close_media_cache
+from src.mirror import close_message_mirror
+from src.ratelimit import rate_limiters
+from src.scheduler import stop_scheduler
+from src.search import close_search_index
+from src.send_queue import stop_send_workers
+from src.typing_indicators import typing_debouncer
+
+
+async def reset_state() -> None:
+    """Close every lazily opened database and drop the state a test left behind."""
+    await stop_scheduler()
+    await stop_send_workers()
+    await typing_debouncer.close()
+    close_lookup_cache()
+    close_message_mirror()
+    close_search_index()
+    close_group_registry()
+    close_media_cache()
+    rate_limiters.reset()
+    send_lanes.reset()
+    circuit_breakers.reset()
+    conversation_index.clear()
+
+
+def use_temp_data_dir(test: unittest.TestCase) -> None:
+    """
+    Point SENDBLUE_DATA_DIR at an empty temporary directory for the rest of a test.
+
+    Test credentials are patched into the client as well, so requests reach
+    the mock transport whatever the environment has exported.
+    """
+    data_dir = tempfile.TemporaryDirectory()
+    test.addCleanup(data_dir.cleanup)
+    for patcher in (
+        patch("src.storage.SENDBLUE_DATA_DIR", data_dir.name),
+        patch("src.client.SENDBLUE_API_KEY_ID", "test_api_key_id"),
+        patch("src.client.SENDBLUE_API_SECRET_KEY", "test_api_secret_key")
+    ):
+        patcher.start()
+        test.addCleanup(patcher.stop)
@@ -0,0 +1,101 @@
+"""
+Unit tests for adding several recipients to a group at once.
+"""
+import unittest
+import asyncio
+import json
+
+import httpx
+
+from src.client import open_http_client, close_http_client
+from src.groups import get_group_registry
+from src.tools import add_recipients_to_group
+from tests.test_config import TEST_GROUP_ID, TEST_GROUP_MEMBERS
+from tests.state_helper import use_temp_data_dir, reset_state
+
+NEW_MEMBERS = [f"+1666555{i:04d}" for i in range(6)]
+FAILING_NUMBER = NEW_MEMBERS[2]
+
+
+class ModifyGroupServer:
+    """Answers /modify-group, tracking how many adds are in flight."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.numbers = []
+
+    async def __call__(self, request):
+        body = json.loads(request.content)
+        self.numbers.append(body["number"])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.in_flight -= 1
+        if body["number"] == FAILING_NUMBER:
+            return httpx.Response(400, json={"error_message": "Invalid recipient"})
+        return httpx.Response(200, json={"status": "SUCCESS", "message": "Recipient added"})
+
+
+class TestAddRecipientsToGroup(unittest.TestCase):
+    """Test cases for the add_recipients_to_group tool."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+        self.server = ModifyGroupServer()
+        self.loop.run_until_complete(open_http_client(transport=httpx.MockTransport(self.server)))
+
+    def tearDown(self):
+        self.loop.run_until_complete(close_http_client())
+        self.loop.run_until_complete(reset_state())
+        self.loop.close()
+
+    def add(self, numbers, **kwargs):
+        return self.loop.run_until_complete(add_recipients_to_group(TEST_GROUP_ID, numbers, **kwargs))
+
+    def test_results_in_input_order_with_bounded_concurrency(self):
+        """Every number gets a result in input order, with duplicates dropped and a failure reported on its own."""
+        result = self.add(NEW_MEMBERS + NEW_MEMBERS[:1], max_concurrency=2)
+
+        self.assertEqual([r["number"] for r in result["results"]], NEW_MEMBERS)
+        statuses = [r["status"] for r in result["results"]]
+        self.assertEqual(statuses.count("ERROR"), 1)
+        self.assertEqual(statuses[2], "ERROR")
+        self.assertEqual(result["summary"]["added"], 5)
+        self.assertEqual(result["summary"]["failed"], 1)
+        self.assertLessEqual(self.server.max_in_flight, 2)
+        self.assertEqual(sorted(self.server.numbers), sorted(NEW_MEMBERS))
+
+    def test_known_members_are_skipped_and_registry_updated(self):
+        """Numbers the registry knows are in the group are not sent; successful adds are recorded."""
+        get_group_registry().remember(TEST_GROUP_MEMBERS, TEST_GROUP_ID)
+        result = self.add(TEST_GROUP_MEMBERS[:1] + NEW_MEMBERS[:3])
+
+        self.assertEqual(result["results"][0]["status"], "SKIPPED")
+        self.assertEqual(result["summary"]["skipped"], 1)
+        self.assertNotIn(TEST_GROUP_MEMBERS[0], self.server.numbers)
+        members = get_group_registry().get(TEST_GROUP_ID)["members"]
+        self.assertIn(NEW_MEMBERS[0], members)
+        self.assertNotIn(FAILING_NUMBER, members)
+
+    def test_group_size_cap_counts_known_members(self):
+        """Adds that would take a known group past 25 members are refused before anything is sent."""
+        get_group_registry().remember([f"+1777555{i:04d}" for i in range(22)], TEST_GROUP_ID)
+        result = self.add(NEW_MEMBERS[:4])
+
+        self.assertEqual(result["status"], "ERROR")
+        self.assertEqual(self.server.numbers, [])
+
+    def test_invalid_number_fails_validation(self):
+        """Invalid numbers are rejected before any request is made."""
+        with self.assertRaises(ValueError):
+            self.add(NEW_MEMBERS[:2] + ["not-a-number"])
+        self.assertEqual(self.server.numbers, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
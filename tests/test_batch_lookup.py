@@ -0,0 +1,133 @@
+"""
+Unit tests for batch number-capability lookups.
+"""
+import unittest
+import asyncio
+from unittest.mock import patch
+
+import httpx
+
+from src.client import open_http_client, close_http_client
+from src.models import normalize_phone_number
+from src.retry import RetryPolicy
+from src.tools import lookup_number_services
+from tests.state_helper import use_temp_data_dir, reset_state
+
+NUMBERS = [f"+1999888{i:04d}" for i in range(1, 11)]
+REJECTED_NUMBER = NUMBERS[3]
+FAILING_NUMBER = NUMBERS[6]
+FAST_RETRIES = RetryPolicy(max_attempts=2, base_delay=0.001, max_delay=0.01, deadline=5.0)
+
+
+class LookupServer:
+    """Answers /evaluate-service, tracking how many lookups are in flight."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.numbers = []
+
+    async def __call__(self, request):
+        number = request.url.params["number"]
+        self.numbers.append(number)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.in_flight -= 1
+        if number == REJECTED_NUMBER:
+            return httpx.Response(400, json={"error_message": "Invalid number"})
+        if number == FAILING_NUMBER:
+            return httpx.Response(500, json={"error_message": "Internal error"})
+        return httpx.Response(200, json={"number": number, "service": "iMessage" if number[-1] in "02468" else "SMS"})
+
+
+class ProgressRecorder:
+    """Stands in for the MCP context and records progress reports."""
+
+    def __init__(self):
+        self.reports = []
+
+    async def report_progress(self, progress, total):
+        self.reports.append((progress, total))
+
+
+class TestNormalizePhoneNumber(unittest.TestCase):
+    """Test cases for normalize_phone_number."""
+
+    def test_formatting_is_removed(self):
+        """Spaces, dashes, dots, parentheses and a 00 prefix are normalized away."""
+        self.assertEqual(normalize_phone_number("+1 (999) 888-7777"), "+19998887777")
+        self.assertEqual(normalize_phone_number("0044.20.7946.0000"), "+442079460000")
+
+    def test_invalid_number(self):
+        """Numbers without a country code are rejected rather than guessed."""
+        with self.assertRaises(ValueError):
+            normalize_phone_number("999-888-7777")
+
+
+class TestLookupNumberServices(unittest.TestCase):
+    """Test cases for the lookup_number_services tool."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+        patcher = patch("src.client.default_retry_policy", FAST_RETRIES)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.server = LookupServer()
+        self.loop.run_until_complete(open_http_client(transport=httpx.MockTransport(self.server)))
+
+    def tearDown(self):
+        self.loop.run_until_complete(close_http_client())
+        self.loop.run_until_complete(reset_state())
+        self.loop.close()
+
+    def lookup(self, numbers, **kwargs):
+        return self.loop.run_until_complete(lookup_number_services(numbers, **kwargs))
+
+    def test_numbers_normalized_deduplicated_and_bounded(self):
+        """Formatted duplicates are looked up once, with at most max_concurrency in flight."""
+        formatted = NUMBERS[0][:2] + " " + NUMBERS[0][2:5] + "-" + NUMBERS[0][5:]
+        result = self.lookup(NUMBERS + [formatted, "not-a-number"], max_concurrency=3)
+
+        self.assertEqual(set(self.server.numbers), set(NUMBERS))
+        self.assertEqual(self.server.numbers.count(NUMBERS[0]), 1)
+        self.assertLessEqual(self.server.max_in_flight, 3)
+        self.assertEqual(result["invalid"].keys(), {"not-a-number"})
+        self.assertEqual(result["services"][NUMBERS[0]], "SMS")
+        self.assertEqual(result["services"][NUMBERS[1]], "iMessage")
+        self.assertEqual(result["summary"]["requested"], 12)
+        self.assertEqual(result["summary"]["unique"], 10)
+
+    def test_failures_are_reported_per_number(self):
+        """Rejected and failed lookups are listed as errors without failing the batch."""
+        result = self.lookup(NUMBERS)
+
+        self.assertEqual(result["status"], "COMPLETED")
+        self.assertEqual(set(result["errors"]), {REJECTED_NUMBER, FAILING_NUMBER})
+        self.assertEqual(result["summary"]["resolved"], 8)
+        self.assertEqual(list(result["services"]), [n for n in NUMBERS if n not in result["errors"]])
+
+    def test_second_batch_uses_cache(self):
+        """Resolved and rejected numbers are answered from the cache the second time."""
+        self.lookup(NUMBERS)
+        requests = len(self.server.numbers)
+        result = self.lookup(NUMBERS)
+
+        self.assertEqual(result["summary"]["from_cache"], 9)
+        self.assertEqual(self.server.numbers[requests:], [FAILING_NUMBER] * (len(self.server.numbers) - requests))
+
+    def test_progress_is_reported(self):
+        """Progress is reported to the MCP context up to the total."""
+        ctx = ProgressRecorder()
+        self.lookup(NUMBERS, ctx=ctx)
+
+        self.assertEqual(ctx.reports[-1], (10, 10))
+        self.assertEqual([p for p, _ in ctx.reports], sorted(p for p, _ in ctx.reports))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Unit tests for bulk sends.
+"""
+import unittest
+import asyncio
+import json
+
+import httpx
+
+from src.client import open_http_client, close_http_client
+from src.tools import send_messages_bulk
+from tests.state_helper import use_temp_data_dir, reset_state
+
+FAILING_NUMBER = "+19998880000"
+
+
+class SendServer:
+    """Answers /send-message, tracking how many sends are in flight."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.numbers = []
+
+    async def __call__(self, request):
+        body = json.loads(request.content)
+        self.numbers.append(body["number"])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.in_flight -= 1
+        if body["number"] == FAILING_NUMBER:
+            return httpx.Response(400, json={"error_message": "Invalid recipient"})
+        return httpx.Response(200, json={
+            "status": "QUEUED",
+            "number": body["number"],
+            "message_handle": f"handle-{body['number']}"
+        })
+
+
+class TestSendMessagesBulk(unittest.TestCase):
+    """Test cases for the send_messages_bulk tool."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+        self.server = SendServer()
+        self.loop.run_until_complete(open_http_client(transport=httpx.MockTransport(self.server)))
+
+    def tearDown(self):
+        self.loop.run_until_complete(close_http_client())
+        self.loop.run_until_complete(reset_state())
+        self.loop.close()
+
+    def test_results_in_input_order_with_bounded_concurrency(self):
+        """Every message gets a result in input order, with at most max_concurrency in flight."""
+        numbers = [f"+1999888{i:04d}" for i in range(1, 13)]
+        result = self.loop.run_until_complete(send_messages_bulk(
+            [{"to_number": number, "content": "Hello"} for number in numbers],
+            max_concurrency=3
+        ))
+
+        self.assertEqual([r["to_number"] for r in result["results"]], numbers)
+        self.assertEqual(result["results"][5]["message_handle"], f"handle-{numbers[5]}")
+        self.assertEqual(result["summary"]["sent"], 12)
+        self.assertLessEqual(self.server.max_in_flight, 3)
+
+    def test_invalid_and_failed_entries_do_not_stop_the_batch(self):
+        """Invalid entries are never sent and failed sends are reported per message."""
+        result = self.loop.run_until_complete(send_messages_bulk([
+            {"to_number": "+19998887777", "content": "Hello"},
+            {"to_number": "not-a-number", "content": "Hello"},
+            {"to_number": FAILING_NUMBER, "content": "Hello"}
+        ]))
+
+        statuses = [r["status"] for r in result["results"]]
+        self.assertEqual(statuses, ["QUEUED", "INVALID", "ERROR"])
+        self.assertNotIn("not-a-number", self.server.numbers)
+        self.assertEqual(result["summary"]["sent"], 1)
+        self.assertEqual(result["summary"]["failed"], 1)
+        self.assertEqual(result["summary"]["invalid"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+"""
+Unit tests for the circuit breakers.
+"""
+import unittest
+import asyncio
+import time
+
+import httpx
+
+from src.circuit import (
+    CLOSED,
+    OPEN,
+    HALF_OPEN,
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+    circuit_breakers,
+    is_failure
+)
+from src.client import open_http_client, close_http_client, make_sendblue_api_request, SendblueAPIError
+from src.retry import RetryPolicy
+from tests.test_config import TEST_PHONE_NUMBER
+from tests.state_helper import use_temp_data_dir, reset_state
+
+NO_RETRIES = RetryPolicy(max_attempts=1)
+
+
+def make_breaker(**kwargs):
+    options = {"window": 60, "min_requests": 4, "failure_rate": 0.5, "slow_call_seconds": 1.0,
+               "slow_call_rate": 0.5, "open_seconds": 60, "half_open_probes": 2}
+    options.update(kwargs)
+    return CircuitBreaker("send-message", **options)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test cases for CircuitBreaker state changes."""
+
+    def test_failures_and_status_codes(self):
+        """Transport errors, 408 and 5xx count against the circuit; 4xx and 429 do not."""
+        self.assertTrue(is_failure(None))
+        self.assertTrue(is_failure(408))
+        self.assertTrue(is_failure(503))
+        self.assertFalse(is_failure(400))
+        self.assertFalse(is_failure(429))
+
+    def test_opens_at_failure_rate_after_min_requests(self):
+        """The circuit only opens once enough requests were seen and enough of them failed."""
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.record(failed=True, latency=0.1, probe=False)
+        self.assertEqual(breaker.state, CLOSED)
+
+        breaker.record(failed=False, latency=0.1, probe=False)
+        self.assertEqual(breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError) as raised:
+            breaker.allow()
+        self.assertGreater(raised.exception.retry_after, 0)
+        self.assertEqual(breaker.snapshot()["rejected"], 1)
+
+    def test_opens_on_slow_calls(self):
+        """Successful but slow requests open the circuit too."""
+        breaker = make_breaker()
+        for latency in (2.0, 2.0, 0.1, 0.1):
+            breaker.record(failed=False, latency=latency, probe=False)
+
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_old_outcomes_leave_the_window(self):
+        """Failures older than the window no longer count."""
+        breaker = make_breaker(window=0.05)
+        for _ in range(3):
+            breaker.record(failed=True, latency=0.1, probe=False)
+        time.sleep(0.06)
+        breaker.record(failed=True, latency=0.1, probe=False)
+
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.snapshot()["window_requests"], 1)
+
+    def test_half_open_probes_close_the_circuit(self):
+        """After the open period a limited number of probes is let through; if all succeed it closes."""
+        breaker = make_breaker(open_seconds=0)
+        breaker._open(time.monotonic())
+
+        self.assertTrue(breaker.allow())
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.allow()
+
+        breaker.record(failed=False, latency=0.1, probe=True)
+        breaker.record(failed=False, latency=0.1, probe=True)
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertFalse(breaker.allow())
+
+    def test_failed_probe_reopens(self):
+        """A failing probe opens the circuit again."""
+        breaker = make_breaker(open_seconds=0)
+        breaker._open(time.monotonic())
+        breaker.allow()
+        breaker.record(failed=True, latency=None, probe=True)
+
+        self.assertEqual(breaker.state, OPEN)
+        self.assertEqual(breaker.times_opened, 2)
+
+
+class TestCircuitBreakerRegistry(unittest.TestCase):
+    """Test cases for CircuitBreakerRegistry."""
+
+    def test_sends_also_pass_the_line_breaker(self):
+        """Sends pass the endpoint breaker and the breaker of their from_number line."""
+        registry = CircuitBreakerRegistry()
+        names = [b.name for b in registry.for_request("/send-message", {"from_number": "+15550000001"})]
+
+        self.assertEqual(names, ["send-message", "line:+15550000001"])
+        self.assertEqual([b.name for b in registry.for_request("accounts/messages?limit=5")], ["accounts/messages"])
+        self.assertEqual(CircuitBreakerRegistry(enabled=False).for_request("send-message"), [])
+
+    def test_admit_is_all_or_nothing(self):
+        """If a later breaker rejects, probe slots taken on earlier ones are given back."""
+        registry = CircuitBreakerRegistry()
+        endpoint = registry.get("send-message")
+        line = registry.get("line:+15550000001")
+        endpoint.open_seconds = 0
+        endpoint._open(time.monotonic())
+        line._open(time.monotonic())
+
+        with self.assertRaises(CircuitOpenError):
+            registry.admit([endpoint, line])
+        self.assertEqual(endpoint._probes_in_flight, 0)
+        self.assertTrue(registry.is_open("line:+15550000001"))
+        self.assertFalse(registry.is_open("send-message"))
+
+
+class TestCircuitInClient(unittest.TestCase):
+    """Test cases for circuit breakers in make_sendblue_api_request."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+        self.requests = 0
+
+        def server(request):
+            self.requests += 1
+            return httpx.Response(503, json={"error_message": "unavailable"})
+
+        self.loop.run_until_complete(open_http_client(transport=httpx.MockTransport(server)))
+
+    def tearDown(self):
+        self.loop.run_until_complete(close_http_client())
+        self.loop.run_until_complete(reset_state())
+        self.loop.close()
+
+    def lookup(self):
+        return self.loop.run_until_complete(make_sendblue_api_request(
+            "evaluate-service", params={"number": TEST_PHONE_NUMBER}, retry_policy=NO_RETRIES
+        ))
+
+    def test_open_circuit_fails_fast(self):
+        """Once the endpoint's circuit opens, requests fail with CIRCUIT_OPEN without being sent."""
+        breaker = circuit_breakers.get("evaluate-service")
+        for _ in range(breaker.min_requests):
+            with self.assertRaises(SendblueAPIError):
+                self.lookup()
+        sent = self.requests
+        self.assertEqual(breaker.state, OPEN)
+
+        with self.assertRaises(SendblueAPIError) as raised:
+            self.lookup()
+        self.assertEqual(raised.exception.error_code, "CIRCUIT_OPEN")
+        self.assertTrue(raised.exception.retryable)
+        self.assertEqual(self.requests, sent)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Unit tests for the pooled Sendblue HTTP client.
+"""
+import unittest
+import asyncio
+import json
+from unittest.mock import patch
+
+import httpx
+
+import src.client
+from src.client import (
+    create_http_client,
+    open_http_client,
+    close_http_client,
+    get_http_client,
+    make_sendblue_api_request
+)
+from src.lanes import send_lanes
+from tests.test_config import TEST_PHONE_NUMBER
+from tests.state_helper import use_temp_data_dir, reset_state
+
+LINE = "+15550000001"
+
+
+class TestSharedClient(unittest.TestCase):
+    """Test cases for opening, sharing and closing the client."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+
+    def tearDown(self):
+        self.loop.run_until_complete(close_http_client())
+        self.loop.run_until_complete(reset_state())
+        self.loop.close()
+
+    def test_requests_share_one_client(self):
+        """Every request goes through the same pooled client until it is closed."""
+        clients = []
+
+        def server(request):
+            clients.append(get_http_client())
+            return httpx.Response(200, json={"number": request.url.params["number"], "service": "iMessage"})
+
+        client = self.loop.run_until_complete(open_http_client(transport=httpx.MockTransport(server)))
+        for _ in range(3):
+            self.loop.run_until_complete(make_sendblue_api_request("/evaluate-service", params={"number": TEST_PHONE_NUMBER}))
+
+        self.assertEqual(clients, [client] * 3)
+
+    def test_open_replaces_and_close_releases(self):
+        """Opening again closes the previous client; after closing, a new one is created lazily."""
+        first = self.loop.run_until_complete(open_http_client(transport=httpx.MockTransport(lambda r: None)))
+        second = self.loop.run_until_complete(open_http_client(transport=httpx.MockTransport(lambda r: None)))
+        self.assertTrue(first.is_closed)
+        self.assertIs(get_http_client(), second)
+
+        self.loop.run_until_complete(close_http_client())
+        self.assertTrue(second.is_closed)
+        self.assertIsNone(src.client._http_client)
+        lazy = get_http_client()
+        self.assertFalse(lazy.is_closed)
+        self.assertIsNot(lazy, second)
+
+    def test_http2_falls_back_without_h2(self):
+        """HTTP/2 is only requested when the h2 package is available."""
+        with patch("src.client._http2_available", return_value=False):
+            with self.assertLogs("sendblue-mcp", level="WARNING") as logs:
+                client = create_http_client(http2=True)
+        self.loop.run_until_complete(client.aclose())
+        self.assertIn("falling back to HTTP/1.1", logs.output[0])
+
+
+class TestClientLanes(unittest.TestCase):
+    """Test cases for sends queued in their line's lane by the client."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+        patcher = patch.object(send_lanes, "concurrency", 1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.delay = 0.02
+
+        async def server(request):
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                await asyncio.sleep(self.delay)
+            finally:
+                self.in_flight -= 1
+            return httpx.Response(200, json={"status": "QUEUED", **json.loads(request.content)})
+
+        self.loop.run_until_complete(open_http_client(transport=httpx.MockTransport(server)))
+
+    def tearDown(self):
+        self.loop.run_until_complete(close_http_client())
+        self.loop.run_until_complete(reset_state())
+        self.loop.close()
+
+    def send(self):
+        return make_sendblue_api_request(
+            "/send-message", method="POST", data={"number": TEST_PHONE_NUMBER, "from_number": LINE, "content": "Hi"}
+        )
+
+    def test_sends_on_one_line_respect_its_concurrency(self):
+        """Sends from the same line wait for its lane instead of all going out at once."""
+        async def scenario():
+            return await asyncio.gather(*(self.send() for _ in range(3)))
+
+        results = self.loop.run_until_complete(scenario())
+
+        self.assertEqual([r["status"] for r in results], ["QUEUED"] * 3)
+        self.assertEqual(self.max_in_flight, 1)
+        self.assertEqual(send_lanes.snapshot()["lanes"][LINE]["completed"], 3)
+
+    def test_timed_out_send_does_not_leak_its_slot(self):
+        """A send given up on while queued in its lane leaves the lane usable."""
+        async def scenario():
+            first = asyncio.ensure_future(self.send())
+            await asyncio.sleep(0)
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(self.send(), timeout=0.005)
+            await first
+            return await asyncio.wait_for(self.send(), timeout=1)
+
+        result = self.loop.run_until_complete(scenario())
+
+        self.assertEqual(result["status"], "QUEUED")
+        self.assertEqual(send_lanes.load(LINE), 0)
+        self.assertEqual(send_lanes.in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
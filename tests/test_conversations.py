@@ -0,0 +1,94 @@
+"""
+Unit tests for the in-memory conversation index.
+"""
+import unittest
+
+from src.conversations import ConversationIndex
+from src.records import MessageRecord
+
+BASE_TIME = 1700000000
+
+
+def message(uuid, number, offset, is_outbound=False, status="RECEIVED", group_id=None):
+    """Build a message record sent `offset` seconds after BASE_TIME."""
+    record = MessageRecord.from_api({
+        "uuid": uuid,
+        "number": number,
+        "content": f"Message {uuid}",
+        "is_outbound": is_outbound,
+        "status": status,
+        "group_id": group_id
+    })
+    record.timestamp = BASE_TIME + offset
+    return record
+
+
+class TestConversationIndex(unittest.TestCase):
+    """Test cases for ConversationIndex."""
+
+    def setUp(self):
+        self.index = ConversationIndex(enabled=True, max_threads=3, max_messages=2)
+
+    def test_threads_by_recent_activity(self):
+        """Threads are listed newest first and grouped by contact or group."""
+        self.index.add([
+            message("a1", "+15555550001", 10),
+            message("b1", "+15555550002", 20),
+            message("g1", "+15555550003", 30, group_id="group-1")
+        ])
+        self.index.add([message("a2", "+15555550001", 40)])
+
+        keys = [conversation.key for conversation in self.index.recent(limit=10)]
+        self.assertEqual(keys, ["number:+15555550001", "group:group-1", "number:+15555550002"])
+        self.assertEqual([c.key for c in self.index.recent(limit=1, offset=1)], ["group:group-1"])
+
+    def test_evicts_least_recently_active_thread(self):
+        """Past max_threads, the thread with the oldest activity is dropped."""
+        self.index.add([message("a1", "+15555550001", 10), message("b1", "+15555550002", 20)])
+        self.index.add([message("c1", "+15555550003", 30)])
+        # Thread a becomes the most recent; b is now the oldest
+        self.index.add([message("a2", "+15555550001", 40)])
+        self.index.add([message("d1", "+15555550004", 50)])
+
+        self.assertEqual(len(self.index), 3)
+        self.assertIsNone(self.index.get(number="+15555550002"))
+        self.assertIsNotNone(self.index.get(number="+15555550001"))
+        self.assertEqual(self.index.snapshot()["evicted_threads"], 1)
+        self.assertEqual(self.index.snapshot()["messages"], 4)
+
+    def test_duplicates_replaced_and_thread_trimmed(self):
+        """Messages are deduplicated by uuid and each thread keeps its newest max_messages."""
+        self.index.add([message("a1", "+15555550001", 10, status="SENT", is_outbound=True)])
+        self.index.add([message("a1", "+15555550001", 10, status="DELIVERED", is_outbound=True)])
+        conversation = self.index.get(number="+15555550001")
+        self.assertEqual(len(conversation.records), 1)
+        self.assertEqual(conversation.records[0].status, "DELIVERED")
+
+        self.index.add([message("a2", "+15555550001", 20), message("a3", "+15555550001", 30)])
+        self.assertEqual([record.uuid for record in conversation.records], ["a2", "a3"])
+
+    def test_unread_counts_inbound_after_last_reply(self):
+        """Inbound messages after the last outbound one are unread until marked read."""
+        self.index.add([
+            message("a1", "+15555550001", 10),
+            message("a2", "+15555550001", 20, is_outbound=True),
+            message("a3", "+15555550001", 30)
+        ])
+        self.index.max_messages = 10
+        self.index.add([message("a4", "+15555550001", 40)])
+        conversation = self.index.get(number="+15555550001")
+        self.assertEqual(conversation.unread, 2)
+        self.assertEqual([c.key for c in self.index.recent(limit=10, unread_only=True)], [conversation.key])
+
+        conversation.mark_read()
+        self.assertEqual(self.index.recent(limit=10, unread_only=True), [])
+
+    def test_disabled_index_ignores_messages(self):
+        """A disabled index stores nothing."""
+        index = ConversationIndex(enabled=False)
+        self.assertEqual(index.add([message("a1", "+15555550001", 10)]), 0)
+        self.assertEqual(len(index), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
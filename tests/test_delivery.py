@@ -0,0 +1,127 @@
+"""
+Unit tests for delivery status tracking.
+"""
+import unittest
+import asyncio
+from unittest.mock import patch, PropertyMock
+
+from src.delivery import DeliveryTracker
+from src.records import MessageRecord
+from src.tools import await_delivery, get_delivery_status
+from src.webhooks import WebhookReceiver
+from tests.test_config import TEST_PHONE_NUMBER
+
+
+def callback(handle, status, **fields):
+    """Build a status callback record."""
+    return MessageRecord.from_api({"message_handle": handle, "status": status, "number": TEST_PHONE_NUMBER, **fields})
+
+
+class TestDeliveryTracker(unittest.TestCase):
+    """Test cases for DeliveryTracker."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.tracker = DeliveryTracker(capacity=3)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_status_never_moves_backwards(self):
+        """Out-of-order callbacks cannot downgrade a status, and ERROR is final."""
+        self.tracker.update(callback("h1", "DELIVERED"))
+        self.tracker.update(callback("h1", "SENT"))
+        self.assertEqual(self.tracker.get("h1").status, "DELIVERED")
+
+        self.tracker.update(callback("h2", "ERROR", error_code=5001, error_message="Undeliverable"))
+        self.tracker.update(callback("h2", "READ"))
+        state = self.tracker.get("h2")
+        self.assertEqual(state.status, "ERROR")
+        self.assertEqual(state.error_code, 5001)
+        self.assertFalse(self.tracker.update(callback(None, "SENT")))
+
+    def test_least_recently_updated_evicted(self):
+        """Past capacity, the entry updated longest ago is dropped."""
+        for handle in ("h1", "h2", "h3"):
+            self.tracker.update(callback(handle, "SENT"))
+        self.tracker.update(callback("h1", "DELIVERED"))
+        self.tracker.update(callback("h4", "SENT"))
+
+        self.assertIsNone(self.tracker.get("h2"))
+        self.assertIsNotNone(self.tracker.get("h1"))
+        self.assertEqual(self.tracker.snapshot()["evicted"], 1)
+
+    def test_wait_for_many_handles(self):
+        """wait() returns once every handle reached the target; SMS counts as done when SENT."""
+        self.tracker.update(callback("h1", "SENT"))
+        self.tracker.update(callback("h2", "SENT"))
+
+        async def scenario():
+            waiting = asyncio.ensure_future(self.tracker.wait(["h1", "h2"], target="DELIVERED", timeout=5))
+            await asyncio.sleep(0.01)
+            self.tracker.update(callback("h1", "DELIVERED"))
+            self.tracker.update(callback("h2", "SENT", was_downgraded=True))
+            return await waiting
+
+        self.assertEqual(self.loop.run_until_complete(scenario()), [])
+        self.assertEqual(self.tracker.snapshot()["waiting"], 0)
+
+    def test_wait_timeout_reports_pending(self):
+        """Handles that did not get there in time are returned."""
+        self.tracker.update(callback("h1", "SENT"))
+        self.tracker.update(callback("h2", "READ"))
+
+        pending = self.loop.run_until_complete(self.tracker.wait(["h1", "h2", "h3"], timeout=0.05))
+        self.assertEqual(pending, ["h1", "h3"])
+        self.assertEqual(self.tracker.snapshot()["waiting"], 0)
+
+
+class TestDeliveryTools(unittest.TestCase):
+    """Test cases for get_delivery_status and await_delivery."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.tracker = DeliveryTracker()
+        for patcher in (
+            patch("src.tools.delivery_tracker", self.tracker),
+            patch.object(WebhookReceiver, "running", new_callable=PropertyMock, return_value=True)
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_statuses_and_unknown_handles(self):
+        """Known handles get their status; others are listed as unknown."""
+        self.tracker.update(callback("h1", "DELIVERED"))
+        result = self.loop.run_until_complete(get_delivery_status(["h1", "h2"]))
+
+        self.assertEqual(result["statuses"]["h1"]["status"], "DELIVERED")
+        self.assertEqual(result["unknown"], ["h2"])
+
+    def test_await_delivery_completes(self):
+        """await_delivery returns COMPLETED once the callback arrives."""
+        self.tracker.update(callback("h1", "SENT"))
+
+        async def scenario():
+            waiting = asyncio.ensure_future(await_delivery(["h1"], until="READ", timeout_seconds=5))
+            await asyncio.sleep(0.01)
+            self.tracker.update(callback("h1", "READ"))
+            return await waiting
+
+        result = self.loop.run_until_complete(scenario())
+        self.assertEqual(result["status"], "COMPLETED")
+        self.assertEqual(result["pending"], [])
+
+    def test_requires_webhook_receiver(self):
+        """Without the webhook receiver the tools report an error."""
+        with patch.object(WebhookReceiver, "running", new_callable=PropertyMock, return_value=False):
+            result = self.loop.run_until_complete(get_delivery_status(["h1"]))
+        self.assertEqual(result["status"], "ERROR")
+
+
+if __name__ == "__main__":
+    unittest.main()
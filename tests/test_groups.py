@@ -0,0 +1,129 @@
+"""
+Unit tests for the group registry and group reuse in send_group_message.
+"""
+import unittest
+import asyncio
+import json
+
+import httpx
+
+from src.client import open_http_client, close_http_client
+from src.groups import GroupRegistry, get_group_registry, member_key
+from src.tools import send_group_message
+from tests.test_config import TEST_GROUP_ID, TEST_GROUP_MEMBERS, TEST_MESSAGE_CONTENT
+from tests.state_helper import use_temp_data_dir, reset_state
+
+LINE_A = "+15550000001"
+LINE_B = "+15550000002"
+NEW_MEMBER = "+16665554444"
+
+
+class TestGroupRegistry(unittest.TestCase):
+    """Test cases for GroupRegistry."""
+
+    def setUp(self):
+        use_temp_data_dir(self)
+        self.registry = GroupRegistry()
+        self.addCleanup(self.registry.close)
+
+    def test_member_key_ignores_order_and_duplicates(self):
+        """The same members in any order, repeated or not, give the same key."""
+        self.assertEqual(
+            member_key(TEST_GROUP_MEMBERS),
+            member_key(list(reversed(TEST_GROUP_MEMBERS)) + TEST_GROUP_MEMBERS[:1])
+        )
+
+    def test_resolve_exact_members_and_line(self):
+        """Only groups with exactly these members, from a matching line, are found."""
+        self.registry.remember(TEST_GROUP_MEMBERS, TEST_GROUP_ID, LINE_A)
+
+        group = self.registry.resolve(reversed(TEST_GROUP_MEMBERS))
+        self.assertEqual(group["group_id"], TEST_GROUP_ID)
+        self.assertEqual(group["from_number"], LINE_A)
+        self.assertIsNotNone(self.registry.resolve(TEST_GROUP_MEMBERS, LINE_A))
+        self.assertIsNone(self.registry.resolve(TEST_GROUP_MEMBERS, LINE_B))
+        self.assertIsNone(self.registry.resolve(TEST_GROUP_MEMBERS[:1]))
+        self.assertEqual(self.registry.snapshot(), {"groups": 1, "hits": 2, "misses": 2})
+
+    def test_add_members_and_forget(self):
+        """Added members change the group's key; forgotten groups no longer resolve."""
+        self.registry.remember(TEST_GROUP_MEMBERS, TEST_GROUP_ID, LINE_A)
+
+        self.assertTrue(self.registry.add_members(TEST_GROUP_ID, [NEW_MEMBER]))
+        self.assertFalse(self.registry.add_members("unknown-group", [NEW_MEMBER]))
+        self.assertIsNone(self.registry.resolve(TEST_GROUP_MEMBERS))
+        group = self.registry.resolve(TEST_GROUP_MEMBERS + [NEW_MEMBER])
+        self.assertEqual(group["from_number"], LINE_A)
+
+        self.registry.forget(TEST_GROUP_ID)
+        self.assertIsNone(self.registry.get(TEST_GROUP_ID))
+        self.assertEqual(self.registry.count(), 0)
+
+    def test_survives_reopen(self):
+        """Groups are stored on disk and found again by a new registry."""
+        self.registry.remember(TEST_GROUP_MEMBERS, TEST_GROUP_ID)
+        self.registry.close()
+        self.registry = GroupRegistry()
+
+        self.assertEqual(self.registry.resolve(TEST_GROUP_MEMBERS)["group_id"], TEST_GROUP_ID)
+
+
+class GroupServer:
+    """Answers /send-group-message, creating a new group for every numbers-based send."""
+
+    def __init__(self, rejected_groups=()):
+        self.rejected_groups = set(rejected_groups)
+        self.requests = []
+
+    def __call__(self, request):
+        body = json.loads(request.content)
+        self.requests.append(body)
+        if body.get("group_id") in self.rejected_groups:
+            return httpx.Response(404, json={"error_message": "Group not found"})
+        group_id = body.get("group_id") or f"group-{len(self.requests)}"
+        return httpx.Response(200, json={"status": "QUEUED", "group_id": group_id})
+
+
+class TestGroupReuse(unittest.TestCase):
+    """Test cases for reusing known groups in send_group_message."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+
+    def tearDown(self):
+        self.loop.run_until_complete(close_http_client())
+        self.loop.run_until_complete(reset_state())
+        self.loop.close()
+
+    def send(self, server, numbers):
+        self.loop.run_until_complete(open_http_client(transport=httpx.MockTransport(server)))
+        return self.loop.run_until_complete(send_group_message(to_numbers=numbers, content=TEST_MESSAGE_CONTENT))
+
+    def test_second_send_reuses_group(self):
+        """A second send to the same members, in any order, goes to the group created by the first."""
+        server = GroupServer()
+        first = self.send(server, TEST_GROUP_MEMBERS)
+        second = self.send(server, list(reversed(TEST_GROUP_MEMBERS)))
+
+        self.assertNotIn("cached_group", first)
+        self.assertTrue(second["cached_group"])
+        self.assertEqual(second["group_id"], first["group_id"])
+        self.assertNotIn("numbers", server.requests[1])
+
+    def test_rejected_group_falls_back_to_numbers(self):
+        """If Sendblue rejects the stored group, the numbers create a new one that replaces it."""
+        get_group_registry().remember(TEST_GROUP_MEMBERS, TEST_GROUP_ID)
+        server = GroupServer(rejected_groups={TEST_GROUP_ID})
+        result = self.send(server, TEST_GROUP_MEMBERS)
+
+        self.assertEqual(result["status"], "QUEUED")
+        self.assertNotIn("cached_group", result)
+        self.assertEqual([r.get("group_id") for r in server.requests], [TEST_GROUP_ID, None])
+        self.assertIsNone(get_group_registry().get(TEST_GROUP_ID))
+        self.assertEqual(get_group_registry().resolve(TEST_GROUP_MEMBERS)["group_id"], result["group_id"])
+
+
+if __name__ == "__main__":
+    unittest.main()
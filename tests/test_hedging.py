@@ -0,0 +1,115 @@
+"""
+Unit tests for hedged requests.
+"""
+import unittest
+import asyncio
+
+import httpx
+
+from src.hedging import Hedger, HedgerRegistry
+
+
+class FakeAttempts:
+    """Attempt factory: each attempt queues, reports itself sent, then answers."""
+
+    def __init__(self, queued=0.0, latencies=(0.01,), fail=()):
+        self.queued = queued
+        self.latencies = list(latencies)
+        self.fail = set(fail)
+        self.started = 0
+
+    def __call__(self, timeout, on_sent):
+        index = self.started
+        self.started += 1
+        return self._run(index, on_sent)
+
+    async def _run(self, index, on_sent):
+        await asyncio.sleep(self.queued)
+        on_sent()
+        latency = self.latencies[min(index, len(self.latencies) - 1)]
+        await asyncio.sleep(latency)
+        if index in self.fail:
+            raise httpx.ConnectError(f"attempt {index} failed")
+        return httpx.Response(200, json={"attempt": index}), latency
+
+
+class TestHedger(unittest.TestCase):
+    """Test cases for Hedger."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.hedger = Hedger("evaluate-service", percentile=0.95, min_delay=0.02, min_samples=5, budget=1.0)
+        for _ in range(5):
+            self.hedger.record(0.01)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def send(self, attempts, timeout=5.0):
+        return self.loop.run_until_complete(self.hedger.send(attempts, timeout))
+
+    def test_no_hedge_before_enough_samples(self):
+        """Without enough latency samples a slow request is not hedged."""
+        self.hedger.latencies.clear()
+        attempts = FakeAttempts(latencies=(0.1,))
+        response, _ = self.send(attempts)
+
+        self.assertEqual(response.json()["attempt"], 0)
+        self.assertEqual(attempts.started, 1)
+
+    def test_slow_request_is_hedged(self):
+        """A request slower than the hedge delay gets a second attempt, which wins."""
+        attempts = FakeAttempts(latencies=(0.5, 0.01))
+        response, _ = self.send(attempts)
+
+        self.assertEqual(response.json()["attempt"], 1)
+        self.assertEqual(self.hedger.hedged, 1)
+        self.assertEqual(self.hedger.hedge_wins, 1)
+
+    def test_queue_time_does_not_trigger_hedge(self):
+        """Time spent waiting for rate-limit slots is not counted towards the hedge delay."""
+        attempts = FakeAttempts(queued=0.2, latencies=(0.01,))
+        self.send(attempts)
+
+        self.assertEqual(attempts.started, 1)
+        self.assertEqual(self.hedger.hedged, 0)
+
+    def test_budget_limits_hedges(self):
+        """Without budget tokens a slow request is not hedged."""
+        self.hedger.budget = 0.0
+        attempts = FakeAttempts(latencies=(0.1,))
+        self.send(attempts)
+
+        self.assertEqual(attempts.started, 1)
+        self.assertEqual(self.hedger.denied, 1)
+
+    def test_failed_attempt_falls_back_to_other(self):
+        """If the hedge fails, the primary's response is still used."""
+        attempts = FakeAttempts(latencies=(0.1, 0.01), fail={1})
+        response, _ = self.send(attempts)
+
+        self.assertEqual(response.json()["attempt"], 0)
+
+    def test_every_attempt_failing_raises(self):
+        """When both attempts fail the error is raised."""
+        attempts = FakeAttempts(latencies=(0.1, 0.01), fail={0, 1})
+        with self.assertRaises(httpx.ConnectError):
+            self.send(attempts)
+
+
+class TestHedgerRegistry(unittest.TestCase):
+    """Test cases for HedgerRegistry."""
+
+    def test_only_listed_gets_are_hedged(self):
+        """Only GETs to the hedged endpoints get a hedger."""
+        registry = HedgerRegistry(enabled=True)
+
+        self.assertIsNotNone(registry.for_request("GET", "/evaluate-service"))
+        self.assertIsNone(registry.for_request("POST", "/evaluate-service"))
+        self.assertIsNone(registry.for_request("POST", "/send-message"))
+        self.assertIsNone(HedgerRegistry(enabled=False).for_request("GET", "/evaluate-service"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Unit tests for the auto-paginating message history fetcher.
+"""
+import unittest
+import asyncio
+
+import httpx
+
+from src.client import open_http_client, close_http_client
+from src.history import fetch_all_messages
+from tests.test_config import TEST_PHONE_NUMBER
+from tests.state_helper import use_temp_data_dir
+
+BASE_TIME = 1700000000
+
+
+def make_messages(count):
+    """Build messages the way /accounts/messages returns them: newest first."""
+    return [
+        {
+            "uuid": f"message-{i:05d}",
+            "date": f"2023-11-{1 + i // 86400:02d}T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}.000Z",
+            "content": f"Message {i}",
+            "number": TEST_PHONE_NUMBER,
+            "is_outbound": i % 2 == 0,
+            "status": "DELIVERED"
+        }
+        for i in reversed(range(count))
+    ]
+
+
+class PagedMessages:
+    """Serves offset/limit pages of a fixed message list and records each request."""
+
+    def __init__(self, messages, fail_offsets=()):
+        self.messages = messages
+        self.fail_offsets = set(fail_offsets)
+        self.offsets = []
+
+    def __call__(self, request):
+        offset = int(request.url.params.get("offset", 0))
+        limit = int(request.url.params.get("limit", 50))
+        self.offsets.append(offset)
+        if offset in self.fail_offsets:
+            return httpx.Response(400, json={"error_message": "bad page"})
+        return httpx.Response(200, json={"messages": self.messages[offset:offset + limit]})
+
+
+class TestFetchAllMessages(unittest.TestCase):
+    """Test cases for fetch_all_messages."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+
+    def tearDown(self):
+        self.loop.run_until_complete(close_http_client())
+        self.loop.close()
+
+    def fetch(self, server, **kwargs):
+        self.loop.run_until_complete(open_http_client(transport=httpx.MockTransport(server)))
+        return self.loop.run_until_complete(
+            fetch_all_messages({"number": TEST_PHONE_NUMBER}, page_size=1000, **kwargs)
+        )
+
+    def test_fetches_every_page_oldest_first(self):
+        """A full scan returns every message once, ordered by date."""
+        server = PagedMessages(make_messages(2500))
+        messages, summary = self.fetch(server)
+
+        self.assertEqual(len(messages), 2500)
+        self.assertEqual(messages[0].uuid, "message-00000")
+        self.assertEqual(messages[-1].uuid, "message-02499")
+        self.assertTrue(summary["complete"])
+        self.assertIsNone(summary["next_offset"])
+
+    def test_max_messages_keeps_newest_and_resumes(self):
+        """A capped scan keeps the newest messages and next_offset continues after them."""
+        server = PagedMessages(make_messages(2500))
+        messages, summary = self.fetch(server, max_messages=1500)
+
+        self.assertEqual(len(messages), 1500)
+        self.assertEqual(messages[0].uuid, "message-01000")
+        self.assertEqual(messages[-1].uuid, "message-02499")
+        self.assertFalse(summary["complete"])
+        self.assertEqual(summary["stop_reason"], "max_messages")
+        self.assertEqual(summary["next_offset"], 1500)
+
+        rest, summary = self.fetch(server, start_offset=summary["next_offset"])
+        self.assertEqual(len(rest), 1000)
+        self.assertEqual(rest[-1].uuid, "message-00999")
+        self.assertTrue(summary["complete"])
+
+    def test_failed_page_ends_scan(self):
+        """A failing later page stops the scan with the pages before it."""
+        server = PagedMessages(make_messages(3500), fail_offsets={2000})
+        messages, summary = self.fetch(server)
+
+        self.assertEqual(len(messages), 2000)
+        self.assertEqual(summary["stop_reason"], "error")
+        self.assertEqual(summary["next_offset"], 2000)
+        self.assertIn("error_message", summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
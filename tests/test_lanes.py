@@ -0,0 +1,168 @@
+"""
+Unit tests for per-line send lanes.
+"""
+import unittest
+import asyncio
+
+from src.lanes import DEFAULT_LANE, LaneScheduler
+from tests.test_config import TEST_PHONE_NUMBER
+
+LINE_A = "+15550000001"
+LINE_B = "+15550000002"
+
+
+class TestLaneScheduler(unittest.TestCase):
+    """Test cases for LaneScheduler."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def make_lanes(self, **kwargs):
+        options = {"endpoints": ["send-message"], "rate": 0, "concurrency": 10, "total_concurrency": 1}
+        options.update(kwargs)
+        lanes = LaneScheduler(**options)
+        self.addCleanup(lanes.reset)
+        return lanes
+
+    def run_sends(self, lanes, lines):
+        """Start one send per entry in lines, all queued at once, and return the order they ran in."""
+        order = []
+
+        async def send(index, line):
+            async with lanes.slot("send-message", {"number": TEST_PHONE_NUMBER, "from_number": line}):
+                order.append((line, index))
+                await asyncio.sleep(0)
+
+        async def scenario():
+            await asyncio.gather(*(send(index, line) for index, line in enumerate(lines)))
+
+        self.loop.run_until_complete(scenario())
+        return order
+
+    def test_lane_name(self):
+        """Laned endpoints map to the from_number line or the default lane; others are not laned."""
+        lanes = self.make_lanes()
+
+        self.assertEqual(lanes.lane_name("/send-message", {"from_number": LINE_A}), LINE_A)
+        self.assertEqual(lanes.lane_name("send-message?x=1", {"number": TEST_PHONE_NUMBER}), DEFAULT_LANE)
+        self.assertIsNone(lanes.lane_name("send-typing-indicator", {"from_number": LINE_A}))
+        self.assertIsNone(self.make_lanes(enabled=False).lane_name("send-message", {"from_number": LINE_A}))
+
+    def test_burst_on_one_line_does_not_starve_another(self):
+        """Waiting lanes take turns, so a backlog on one line only delays the other by one turn."""
+        lanes = self.make_lanes()
+        order = self.run_sends(lanes, [LINE_A] * 4 + [LINE_B] * 2)
+
+        self.assertEqual([line for line, _ in order], [LINE_A, LINE_A, LINE_B, LINE_A, LINE_B, LINE_A])
+        self.assertEqual(lanes.in_flight, 0)
+
+    def test_weight_sets_sends_per_turn(self):
+        """A lane gets up to its weight in sends per turn, even when the shared cap grants one at a time."""
+        lanes = self.make_lanes(weights={LINE_A: 2})
+        order = self.run_sends(lanes, [LINE_A] * 5 + [LINE_B] * 2)
+
+        self.assertEqual(
+            [line for line, _ in order],
+            [LINE_A, LINE_A, LINE_A, LINE_B, LINE_A, LINE_A, LINE_B]
+        )
+
+    def test_concurrency_per_lane(self):
+        """A lane never runs more sends at once than its concurrency limit."""
+        lanes = self.make_lanes(concurrency=2, total_concurrency=10)
+        peak = 0
+
+        async def send():
+            nonlocal peak
+            async with lanes.slot("send-message", {"from_number": LINE_A}) as lane:
+                peak = max(peak, lane.in_flight)
+                await asyncio.sleep(0.01)
+
+        async def scenario():
+            await asyncio.gather(*(send() for _ in range(6)))
+
+        self.loop.run_until_complete(scenario())
+
+        self.assertEqual(peak, 2)
+        self.assertEqual(lanes.snapshot()["lanes"][LINE_A]["completed"], 6)
+
+    def test_rate_limited_lane_resumes_on_timer(self):
+        """A lane out of tokens is resumed by a timer rather than waiting for another release."""
+        lanes = self.make_lanes(rate=20, total_concurrency=10)
+        lanes.get_lane(LINE_A).tokens = 0.0
+
+        async def scenario():
+            async with lanes.slot("send-message", {"from_number": LINE_A}):
+                pass
+
+        self.loop.run_until_complete(asyncio.wait_for(scenario(), timeout=1))
+
+        self.assertEqual(lanes.snapshot()["lanes"][LINE_A]["completed"], 1)
+
+    def test_cancelled_waiter_leaves_the_queue(self):
+        """A send cancelled while queued is removed and frees nothing it did not hold."""
+        lanes = self.make_lanes()
+
+        async def scenario():
+            holder = await lanes.acquire(LINE_A)
+            waiter = asyncio.ensure_future(lanes.acquire(LINE_B))
+            await asyncio.sleep(0)
+            self.assertEqual(lanes.load(LINE_B), 1)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            lanes.release(holder)
+
+        self.loop.run_until_complete(scenario())
+
+        self.assertEqual(lanes.load(LINE_B), 0)
+        self.assertEqual(lanes.in_flight, 0)
+        self.assertEqual(list(lanes._ring), [])
+
+    def test_release_right_after_cancel_skips_the_waiter(self):
+        """A slot freed before a cancelled waiter has unwound goes to the next send, not the cancelled one."""
+        lanes = self.make_lanes(concurrency=1, total_concurrency=10)
+
+        async def scenario():
+            holder = await lanes.acquire(LINE_A)
+            cancelled = asyncio.ensure_future(lanes.acquire(LINE_A))
+            queued = asyncio.ensure_future(lanes.acquire(LINE_A))
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            lanes.release(holder)
+            with self.assertRaises(asyncio.CancelledError):
+                await cancelled
+            lane = await asyncio.wait_for(queued, timeout=1)
+            lanes.release(lane)
+            lanes.release(await asyncio.wait_for(lanes.acquire(LINE_A), timeout=1))
+
+        self.loop.run_until_complete(scenario())
+
+        self.assertEqual(lanes.load(LINE_A), 0)
+        self.assertEqual(lanes.in_flight, 0)
+
+    def test_cancel_after_grant_gives_the_slot_back(self):
+        """A send cancelled just after its slot was granted releases it."""
+        lanes = self.make_lanes(concurrency=1, total_concurrency=10)
+
+        async def scenario():
+            holder = await lanes.acquire(LINE_A)
+            waiter = asyncio.ensure_future(lanes.acquire(LINE_A))
+            await asyncio.sleep(0)
+            lanes.release(holder)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            lanes.release(await asyncio.wait_for(lanes.acquire(LINE_A), timeout=1))
+
+        self.loop.run_until_complete(scenario())
+
+        self.assertEqual(lanes.load(LINE_A), 0)
+        self.assertEqual(lanes.in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
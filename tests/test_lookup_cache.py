@@ -0,0 +1,136 @@
+"""
+Unit tests for the number lookup cache.
+"""
+import unittest
+import asyncio
+import time
+
+import httpx
+
+from src.client import open_http_client, close_http_client
+from src.lookup_cache import LookupCache
+from src.tools import lookup_number_service
+from tests.state_helper import use_temp_data_dir, reset_state
+from tests.test_config import TEST_PHONE_NUMBER
+
+
+class CountingFetch:
+    """Lookup fetcher that counts calls and can be told to fail."""
+
+    def __init__(self, result=None, negative=False, error=None, delay=0.0):
+        self.result = result or {"number": TEST_PHONE_NUMBER, "service": "iMessage"}
+        self.negative = negative
+        self.error = error
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.result, self.negative
+
+
+class TestLookupCache(unittest.TestCase):
+    """Test cases for LookupCache."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+        self.cache = LookupCache(max_entries=10, positive_ttl=60, negative_ttl=0.05)
+
+    def tearDown(self):
+        self.cache.close()
+        self.loop.close()
+
+    def lookup(self, fetch, **kwargs):
+        return self.loop.run_until_complete(self.cache.lookup(TEST_PHONE_NUMBER, fetch, **kwargs))
+
+    def test_repeat_lookup_is_cached(self):
+        """The second lookup is a hit; force_refresh fetches again."""
+        fetch = CountingFetch()
+        self.assertEqual(self.lookup(fetch)[1], False)
+        result, cached = self.lookup(fetch)
+
+        self.assertTrue(cached)
+        self.assertEqual(result["service"], "iMessage")
+        self.assertEqual(fetch.calls, 1)
+        self.lookup(fetch, force_refresh=True)
+        self.assertEqual(fetch.calls, 2)
+
+    def test_concurrent_lookups_share_one_fetch(self):
+        """Lookups of the same number in flight together make one request."""
+        fetch = CountingFetch(delay=0.02)
+
+        async def scenario():
+            return await asyncio.gather(*(self.cache.lookup(TEST_PHONE_NUMBER, fetch) for _ in range(5)))
+
+        results = self.loop.run_until_complete(scenario())
+        self.assertEqual(fetch.calls, 1)
+        self.assertEqual(len(results), 5)
+
+    def test_results_survive_reopen(self):
+        """Results are persisted in the data directory and read back after a restart."""
+        self.lookup(CountingFetch())
+        self.cache.close()
+        self.cache = LookupCache()
+        fetch = CountingFetch()
+
+        self.assertTrue(self.lookup(fetch)[1])
+        self.assertEqual(fetch.calls, 0)
+
+    def test_negative_results_expire_sooner(self):
+        """Definitive failures are cached for the shorter negative TTL."""
+        fetch = CountingFetch(result={"status": "ERROR"}, negative=True)
+        self.lookup(fetch)
+        self.assertTrue(self.lookup(fetch)[1])
+        time.sleep(0.06)
+
+        self.assertFalse(self.lookup(fetch)[1])
+        self.assertEqual(fetch.calls, 2)
+
+    def test_failed_fetch_is_not_cached(self):
+        """A fetch that raises leaves nothing in the cache."""
+        fetch = CountingFetch(error=httpx.ConnectError("refused"))
+        with self.assertRaises(httpx.ConnectError):
+            self.lookup(fetch)
+
+        self.assertIsNone(self.cache.get(TEST_PHONE_NUMBER))
+        self.assertEqual(self.cache.snapshot()["in_flight"], 0)
+
+
+class TestLookupNumberServiceCache(unittest.TestCase):
+    """Test cases for lookup_number_service with the cache enabled."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+        self.requests = 0
+
+        def handler(request):
+            self.requests += 1
+            return httpx.Response(400, json={"error_message": "Invalid number"})
+
+        self.loop.run_until_complete(open_http_client(transport=httpx.MockTransport(handler)))
+
+    def tearDown(self):
+        self.loop.run_until_complete(close_http_client())
+        self.loop.run_until_complete(reset_state())
+        self.loop.close()
+
+    def test_rejected_number_is_cached(self):
+        """A number Sendblue rejects is answered from the cache the second time."""
+        first = self.loop.run_until_complete(lookup_number_service(phone_number=TEST_PHONE_NUMBER))
+        second = self.loop.run_until_complete(lookup_number_service(phone_number=TEST_PHONE_NUMBER))
+
+        self.assertEqual(first["status"], "ERROR")
+        self.assertEqual(first["status_code"], 400)
+        self.assertTrue(second["cached"])
+        self.assertEqual(self.requests, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
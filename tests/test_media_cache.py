@@ -0,0 +1,138 @@
+"""
+Unit tests for the media object cache.
+"""
+import unittest
+import asyncio
+
+import httpx
+
+from src.client import open_http_client, close_http_client
+from src.media_cache import MediaCache
+from tests.state_helper import use_temp_data_dir
+from tests.test_config import TEST_MEDIA_URL
+
+
+class MediaSource:
+    """Serves media files; headers and bodies can be changed between requests."""
+
+    def __init__(self):
+        self.etag = '"v1"'
+        self.body = b"image bytes"
+        self.fail = False
+        self.requests = 0
+
+    def __call__(self, request):
+        self.requests += 1
+        if self.fail:
+            return httpx.Response(503)
+        return httpx.Response(200, headers={"ETag": self.etag}, content=self.body)
+
+
+class CountingUpload:
+    """Upload function handing out a new mediaObjectId per call."""
+
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+
+    async def __call__(self, url):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise httpx.ConnectError("upload failed")
+        return {"mediaObjectId": f"media-{self.calls}"}
+
+
+class TestMediaCache(unittest.TestCase):
+    """Test cases for MediaCache."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+        self.source = MediaSource()
+        self.loop.run_until_complete(open_http_client(transport=httpx.MockTransport(self.source)))
+        self.caches = []
+
+    def tearDown(self):
+        for cache in self.caches:
+            cache.close()
+        self.loop.run_until_complete(close_http_client())
+        self.loop.close()
+
+    def cache(self, **kwargs):
+        cache = MediaCache(**kwargs)
+        self.caches.append(cache)
+        return cache
+
+    def resolve(self, cache, upload, url=TEST_MEDIA_URL, **kwargs):
+        return self.loop.run_until_complete(cache.resolve(url, upload, **kwargs))
+
+    def test_upload_reused(self):
+        """A URL is uploaded once and its media object reused, also after a restart."""
+        upload = CountingUpload()
+        entry, cached = self.resolve(self.cache(), upload)
+        self.assertFalse(cached)
+        self.assertEqual(entry["media_object_id"], "media-1")
+
+        entry, cached = self.resolve(self.cache(), upload)
+        self.assertTrue(cached)
+        self.assertEqual(entry["media_object_id"], "media-1")
+        self.assertEqual(upload.calls, 1)
+
+    def test_concurrent_uploads_shared(self):
+        """Resolving one URL several times at once uploads it once."""
+        cache = self.cache()
+        upload = CountingUpload()
+
+        async def scenario():
+            return await asyncio.gather(*(cache.resolve(TEST_MEDIA_URL, upload) for _ in range(4)))
+
+        results = self.loop.run_until_complete(scenario())
+        self.assertEqual({entry["media_object_id"] for entry, _ in results}, {"media-1"})
+        self.assertEqual(upload.calls, 1)
+
+    def test_failed_upload_not_cached(self):
+        """A failed upload leaves nothing cached."""
+        cache = self.cache()
+        with self.assertRaises(httpx.ConnectError):
+            self.resolve(cache, CountingUpload(fail=True))
+        self.assertIsNone(cache.get(TEST_MEDIA_URL))
+
+    def test_etag_change_uploads_again(self):
+        """With etag revalidation, a changed source is uploaded again and an unchanged one is not."""
+        cache = self.cache(revalidate="etag", revalidate_after=0)
+        upload = CountingUpload()
+        self.resolve(cache, upload)
+        self.assertTrue(self.resolve(cache, upload)[1])
+
+        self.source.etag = '"v2"'
+        entry, cached = self.resolve(cache, upload)
+        self.assertFalse(cached)
+        self.assertEqual(entry["media_object_id"], "media-2")
+
+    def test_unreachable_source_keeps_entry(self):
+        """If the source cannot be revalidated, the cached object is still used."""
+        cache = self.cache(revalidate="etag", revalidate_after=0)
+        upload = CountingUpload()
+        self.resolve(cache, upload)
+        self.source.fail = True
+
+        entry, cached = self.resolve(cache, upload)
+        self.assertTrue(cached)
+        self.assertEqual(upload.calls, 1)
+
+    def test_identical_content_shared_across_urls(self):
+        """With hash revalidation, URLs serving the same bytes share one media object."""
+        cache = self.cache(revalidate="hash")
+        upload = CountingUpload()
+        self.resolve(cache, upload, url="https://example.com/a.jpg")
+        entry, cached = self.resolve(cache, upload, url="https://cdn.example.com/a.jpg")
+
+        self.assertTrue(cached)
+        self.assertEqual(entry["media_object_id"], "media-1")
+        self.assertEqual(upload.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Unit tests for the local message mirror.
+"""
+import unittest
+import asyncio
+
+import httpx
+
+from src.client import open_http_client, close_http_client
+from src.mirror import MessageMirror
+from tests.test_config import TEST_PHONE_NUMBER
+from tests.test_history import make_messages, PagedMessages
+from tests.state_helper import use_temp_data_dir, reset_state
+
+
+class TestMessageMirror(unittest.TestCase):
+    """Test cases for MessageMirror sync and query."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+        self.messages = make_messages(400)
+        self.server = PagedMessages(self.messages)
+        self.requests = []
+
+        def handler(request):
+            self.requests.append(request)
+            return self.server(request)
+
+        self.loop.run_until_complete(open_http_client(transport=httpx.MockTransport(handler)))
+        self.mirror = MessageMirror(sync_max_messages=150)
+
+    def tearDown(self):
+        self.mirror.close()
+        self.loop.run_until_complete(close_http_client())
+        self.loop.run_until_complete(reset_state())
+        self.loop.close()
+
+    def sync(self):
+        return self.loop.run_until_complete(self.mirror.sync())
+
+    def test_capped_sync_is_resumed_before_mirror_is_fresh(self):
+        """A capped scan is not marked synced; later syncs fill in the older messages."""
+        summary = self.sync()
+        self.assertFalse(summary["complete"])
+        self.assertFalse(self.mirror.is_fresh())
+        self.assertEqual(self.mirror.pending_scan()["offset"], 150)
+
+        self.sync()
+        summary = self.sync()
+        self.assertTrue(summary["complete"])
+        self.assertTrue(self.mirror.is_fresh())
+        self.assertIsNone(self.mirror.pending_scan())
+        self.assertEqual(self.mirror.snapshot()["messages"], 400)
+        # Resumed pages never carry a from_date: the first scan covers the whole history
+        self.assertFalse(any("from_date" in request.url.params for request in self.requests))
+
+    def test_sync_after_complete_scan_uses_watermark(self):
+        """Once the history is mirrored, syncs only ask for newer messages."""
+        self.mirror.sync_max_messages = None
+        self.sync()
+        self.requests.clear()
+
+        summary = self.sync()
+        self.assertTrue(summary["complete"])
+        self.assertTrue(all("from_date" in request.url.params for request in self.requests))
+
+    def test_query_pages_like_the_api(self):
+        """Queries return the newest messages first, with offsets counted from the newest."""
+        self.mirror.sync_max_messages = None
+        self.sync()
+
+        records = self.mirror.query(number=TEST_PHONE_NUMBER, limit=10, offset=20)
+        self.assertEqual(
+            [record.uuid for record in records],
+            [message["uuid"] for message in self.messages[20:30]]
+        )
+        self.assertEqual(records[0].to_dict(), self.messages[20])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Unit tests for the adaptive rate limiter.
+"""
+import unittest
+import asyncio
+import email.utils
+import time
+
+from src.ratelimit import (
+    AdaptiveLimiter,
+    RateLimiterRegistry,
+    TokenBucket,
+    parse_retry_after
+)
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    """Test cases for parse_retry_after."""
+
+    def test_seconds_and_dates(self):
+        """Both delta-seconds and HTTP dates are understood."""
+        self.assertEqual(parse_retry_after("2.5"), 2.5)
+        in_ten = email.utils.formatdate(time.time() + 10, usegmt=True)
+        self.assertAlmostEqual(parse_retry_after(in_ten), 10, delta=1.5)
+
+    def test_missing_or_invalid(self):
+        """Missing and unparseable values give None; past dates give 0."""
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertEqual(parse_retry_after("-3"), 0.0)
+
+
+class TestAdaptiveLimiter(unittest.TestCase):
+    """Test cases for AdaptiveLimiter and TokenBucket."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_throttling_halves_window_and_pauses(self):
+        """A 429 halves the concurrency window once and pauses the bucket for Retry-After."""
+        limiter = AdaptiveLimiter("send-message", rate=100, max_concurrency=8, min_concurrency=1)
+        limiter.record(429, retry_after=0.5)
+        limiter.record(429, retry_after=0.5)
+
+        self.assertEqual(limiter.window, 4.0)
+        self.assertEqual(limiter.throttled, 2)
+        self.assertGreater(limiter.bucket.paused_until, time.monotonic())
+
+    def test_healthy_responses_grow_window(self):
+        """Successful responses grow the window back, up to max_concurrency."""
+        limiter = AdaptiveLimiter("send-message", rate=100, max_concurrency=8, min_concurrency=1)
+        limiter.window = 2.0
+        for _ in range(100):
+            limiter.record(200)
+
+        self.assertEqual(limiter.window, 8.0)
+
+    def test_window_bounds_in_flight(self):
+        """No more requests than the window run at once."""
+        limiter = AdaptiveLimiter("evaluate-service", rate=1000, max_concurrency=2, min_concurrency=1)
+        peak = 0
+
+        async def request():
+            nonlocal peak
+            await limiter.acquire()
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+            await limiter.release(200)
+
+        async def scenario():
+            await asyncio.gather(*(request() for _ in range(6)))
+
+        self.loop.run_until_complete(scenario())
+
+        self.assertEqual(peak, 2)
+        self.assertEqual(limiter.in_flight, 0)
+        self.assertEqual(limiter.completed, 6)
+
+    def test_bucket_paces_requests(self):
+        """Once the burst is spent, tokens are handed out at the configured rate."""
+        bucket = TokenBucket(rate=50, capacity=1)
+
+        async def scenario():
+            started = time.monotonic()
+            for _ in range(6):
+                await bucket.acquire()
+            return time.monotonic() - started
+
+        elapsed = self.loop.run_until_complete(scenario())
+        self.assertGreaterEqual(elapsed, 0.09)
+
+
+class TestRateLimiterRegistry(unittest.TestCase):
+    """Test cases for RateLimiterRegistry."""
+
+    def test_unknown_endpoints_share_default_budget(self):
+        """Known endpoints get their own budget, everything else the default one."""
+        registry = RateLimiterRegistry({"send-message": 5.0, "default": 10.0})
+
+        self.assertEqual(registry.for_endpoint("/send-message").bucket.rate, 5.0)
+        self.assertIs(registry.for_endpoint("/unknown"), registry.for_endpoint("/other"))
+        registry.reset()
+        self.assertEqual(registry.snapshot()["budgets"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
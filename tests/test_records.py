@@ -0,0 +1,161 @@
+"""
+Unit tests for message records and size-budgeted history output.
+"""
+import unittest
+import asyncio
+from unittest.mock import patch
+
+import httpx
+
+from src.client import open_http_client, close_http_client
+from src.records import MessageRecord, normalize_messages, parse_timestamp, serialize_within_budget
+from src.tools import get_message_history
+from tests.test_config import TEST_PHONE_NUMBER
+from tests.test_history import make_messages, PagedMessages
+from tests.state_helper import use_temp_data_dir, reset_state
+
+# Room for a few of the test messages, but not all of them
+MAX_BYTES = 700
+
+CAMEL_CASE_MESSAGE = {
+    "accountEmail": "team@example.com",
+    "content": "Hello",
+    "date_sent": {"_seconds": 1700000000, "_nanoseconds": 250000000},
+    "date_updated": "2023-11-14T22:13:21Z",
+    "is_outbound": True,
+    "number": TEST_PHONE_NUMBER,
+    "sendStyle": "",
+    "type": "message",
+    "media_url": [],
+    "status": "DELIVERED",
+    "uuid": "camel-1",
+    "custom_field": {"kept": True}
+}
+
+
+class TestMessageRecord(unittest.TestCase):
+    """Test cases for MessageRecord normalization."""
+
+    def test_dates_and_aliases_are_unified(self):
+        """Every date form becomes epoch seconds and camelCase keys fill the snake_case fields."""
+        record = MessageRecord.from_api(CAMEL_CASE_MESSAGE)
+
+        self.assertEqual(record.timestamp, 1700000000.25)
+        self.assertEqual(record.updated_timestamp, parse_timestamp("2023-11-14T22:13:21+00:00"))
+        self.assertEqual(record.message_type, "message")
+        self.assertIsNone(record.send_style)
+        self.assertEqual(record.extra, {"custom_field": {"kept": True}})
+        self.assertEqual(parse_timestamp(1700000000), 1700000000.0)
+        self.assertIsNone(parse_timestamp("not a date"))
+
+    def test_to_dict_gives_back_sendblue_keys(self):
+        """Serializing returns Sendblue's own keys, order, date values and empty values."""
+        record = MessageRecord.from_api(CAMEL_CASE_MESSAGE)
+
+        self.assertEqual(record.to_dict(), CAMEL_CASE_MESSAGE)
+        self.assertEqual(list(record.to_dict()), list(CAMEL_CASE_MESSAGE))
+
+    def test_later_changes_are_added_under_normalized_names(self):
+        """A field set after receipt appears in the output; a changed date is rewritten in its source form."""
+        record = MessageRecord.from_api({"uuid": "m1", "date": "2024-01-01T10:00:00.000Z"})
+        record.status = "READ"
+        record.timestamp += 1
+
+        self.assertEqual(record.to_dict(), {"uuid": "m1", "date": "2024-01-01T10:00:01.000Z", "status": "READ"})
+
+    def test_normalized_and_projected_views(self):
+        """normalized() and project() use snake_case names, ISO dates and omit empty fields."""
+        record = MessageRecord.from_api(CAMEL_CASE_MESSAGE)
+        normalized = record.normalized()
+
+        self.assertEqual(normalized["message_type"], "message")
+        self.assertNotIn("sendStyle", normalized)
+        self.assertNotIn("send_style", normalized)
+        self.assertEqual(normalized["date"], "2023-11-14T22:13:20.250Z")
+        self.assertEqual(record.project(["date", "type", "send_style"]), {"date": "2023-11-14T22:13:20.250Z", "type": "message"})
+
+    def test_repeated_values_are_shared(self):
+        """Records of the same shape share their layout and interned strings."""
+        first, second = normalize_messages([
+            {"uuid": "a", "number": "".join(["+1999", "8887777"]), "status": "DELIVERED"},
+            {"uuid": "b", "number": "".join(["+19998", "887777"]), "status": "DELIVERED"}
+        ])
+
+        self.assertIs(first.layout, second.layout)
+        self.assertIs(first.number, second.number)
+
+
+class TestSerializeWithinBudget(unittest.TestCase):
+    """Test cases for serialize_within_budget."""
+
+    def setUp(self):
+        self.newest_first = normalize_messages(make_messages(10))
+
+    def test_keeps_newest_whatever_the_input_order(self):
+        """The newest messages that fit are kept, in the order they were given."""
+        kept, summary = serialize_within_budget(self.newest_first, max_bytes=MAX_BYTES)
+        count = len(kept)
+        self.assertTrue(0 < count < 10)
+        self.assertEqual([m["uuid"] for m in kept], [r.uuid for r in self.newest_first[:count]])
+        self.assertEqual(summary["omitted"], 10 - count)
+        self.assertLessEqual(summary["bytes"], MAX_BYTES)
+
+        oldest_first = list(reversed(self.newest_first))
+        kept, _ = serialize_within_budget(oldest_first, max_bytes=MAX_BYTES)
+        self.assertEqual([m["uuid"] for m in kept], [r.uuid for r in oldest_first[-count:]])
+
+    def test_projection_and_truncation(self):
+        """Fields are projected and long content is cut and counted."""
+        kept, summary = serialize_within_budget(self.newest_first[:2], fields=["content"], max_content_chars=4)
+
+        self.assertEqual(kept, [{"content": "Mess…"}, {"content": "Mess…"}])
+        self.assertEqual(summary, {"omitted": 0, "truncated": 2})
+
+
+class TestHistoryBudget(unittest.TestCase):
+    """Test cases for max_bytes in get_message_history, from the API and from the mirror."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+        self.messages = make_messages(10)
+        self.loop.run_until_complete(open_http_client(transport=httpx.MockTransport(PagedMessages(self.messages))))
+
+    def tearDown(self):
+        self.loop.run_until_complete(close_http_client())
+        self.loop.run_until_complete(reset_state())
+        self.loop.close()
+
+    def history(self, **kwargs):
+        result = self.loop.run_until_complete(
+            get_message_history(contact_phone_number=TEST_PHONE_NUMBER, max_bytes=MAX_BYTES, **kwargs)
+        )
+        self.assertTrue(0 < result["count"] < 10)
+        self.assertEqual(result["omitted"], 10 - result["count"])
+        return [message["uuid"] for message in result["messages"]]
+
+    def newest(self, count):
+        return [message["uuid"] for message in self.messages[:count]]
+
+    def test_single_page_keeps_newest(self):
+        """A budgeted API page keeps its newest messages, newest first like the API."""
+        uuids = self.history()
+        self.assertEqual(uuids, self.newest(len(uuids)))
+
+    def test_fetch_all_keeps_newest(self):
+        """A budgeted full scan keeps the newest messages, oldest first."""
+        uuids = self.history(fetch_all=True)
+        self.assertEqual(uuids, list(reversed(self.newest(len(uuids)))))
+
+    def test_mirror_keeps_newest(self):
+        """Pages answered from the mirror are budgeted the same way as API pages."""
+        with patch("src.tools.SENDBLUE_MIRROR_ENABLED", True):
+            uuids = self.history()
+            self.assertEqual(uuids, self.newest(len(uuids)))
+            uuids = self.history(fetch_all=True)
+            self.assertEqual(uuids, list(reversed(self.newest(len(uuids)))))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+Unit tests for request retries.
+"""
+import unittest
+import asyncio
+
+import httpx
+
+from src.client import open_http_client, close_http_client, make_sendblue_api_request, SendblueAPIError
+from src.retry import RetryPolicy, is_idempotent, is_retryable_exception, is_retryable_status
+from tests.state_helper import use_temp_data_dir, reset_state
+
+FAST_RETRIES = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.01, deadline=5.0)
+
+
+class ScriptedServer:
+    """Answers requests from a list of responses or exceptions, in order."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.requests = 0
+
+    def __call__(self, request):
+        outcome = self.outcomes[min(self.requests, len(self.outcomes) - 1)]
+        self.requests += 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """Test cases for the retry decisions."""
+
+    def test_sends_only_retried_before_processing(self):
+        """Sends are retried on 429 and connect errors, reads on any transient failure."""
+        self.assertTrue(is_idempotent("GET", "/accounts/messages"))
+        self.assertTrue(is_idempotent("POST", "/send-typing-indicator"))
+        self.assertFalse(is_idempotent("POST", "/send-message"))
+
+        self.assertTrue(is_retryable_status(429, idempotent=False))
+        self.assertFalse(is_retryable_status(503, idempotent=False))
+        self.assertTrue(is_retryable_status(503, idempotent=True))
+        self.assertFalse(is_retryable_status(400, idempotent=True))
+
+        self.assertTrue(is_retryable_exception(httpx.ConnectError("refused"), idempotent=False))
+        self.assertFalse(is_retryable_exception(httpx.ReadTimeout("slow"), idempotent=False))
+        self.assertTrue(is_retryable_exception(httpx.ReadTimeout("slow"), idempotent=True))
+
+    def test_backoff_respects_retry_after_and_cap(self):
+        """Backoff is jittered below the cap but never shorter than Retry-After."""
+        policy = RetryPolicy(base_delay=0.5, max_delay=2.0)
+        for attempt in range(1, 8):
+            self.assertLessEqual(policy.backoff(attempt), 2.0)
+        self.assertGreaterEqual(policy.backoff(1, retry_after=3.0), 3.0)
+
+
+class TestRequestRetries(unittest.TestCase):
+    """Test cases for retries in make_sendblue_api_request."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+
+    def tearDown(self):
+        self.loop.run_until_complete(close_http_client())
+        self.loop.run_until_complete(reset_state())
+        self.loop.close()
+
+    def request(self, server, endpoint, method="GET", stats=None):
+        self.loop.run_until_complete(open_http_client(transport=httpx.MockTransport(server)))
+        return self.loop.run_until_complete(make_sendblue_api_request(
+            endpoint,
+            method=method,
+            data={"number": "+19998887777", "content": "Hi"} if method == "POST" else None,
+            stats=stats,
+            retry_policy=FAST_RETRIES
+        ))
+
+    def test_read_retried_until_success(self):
+        """A GET that fails with 503 is retried and the retry is reported in stats."""
+        server = ScriptedServer(httpx.Response(503), httpx.Response(200, json={"messages": []}))
+        stats = {}
+        result = self.request(server, "/accounts/messages", stats=stats)
+
+        self.assertEqual(result, {"messages": []})
+        self.assertEqual(server.requests, 2)
+        self.assertEqual(stats["retries"], 1)
+
+    def test_send_not_retried_after_server_error(self):
+        """A send that failed with 500 may have been processed, so it is not repeated."""
+        server = ScriptedServer(httpx.Response(500, json={"error_message": "boom"}))
+        with self.assertRaises(SendblueAPIError) as raised:
+            self.request(server, "/send-message", method="POST")
+
+        self.assertEqual(server.requests, 1)
+        self.assertEqual(raised.exception.status_code, 500)
+        self.assertFalse(raised.exception.retryable)
+
+    def test_send_retried_when_not_accepted(self):
+        """Sends are retried after a 429 or a failed connection."""
+        server = ScriptedServer(
+            httpx.Response(429, headers={"Retry-After": "0"}),
+            httpx.ConnectError("refused"),
+            httpx.Response(200, json={"status": "QUEUED"})
+        )
+        result = self.request(server, "/send-message", method="POST")
+
+        self.assertEqual(result["status"], "QUEUED")
+        self.assertEqual(server.requests, 3)
+
+    def test_gives_up_after_max_attempts(self):
+        """The error of the last attempt is raised once max_attempts is reached."""
+        server = ScriptedServer(httpx.Response(503))
+        with self.assertRaises(SendblueAPIError) as raised:
+            self.request(server, "/evaluate-service")
+
+        self.assertEqual(server.requests, 3)
+        self.assertEqual(raised.exception.attempts, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
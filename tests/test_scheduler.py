@@ -0,0 +1,95 @@
+"""
+Unit tests for scheduled sends.
+"""
+import unittest
+import asyncio
+import time
+from unittest.mock import patch
+
+from src.scheduler import MessageScheduler
+from src.send_queue import SendQueue
+from tests.state_helper import use_temp_data_dir
+
+
+def payload(number):
+    return {"number": number, "content": "Reminder"}
+
+
+class TestMessageScheduler(unittest.TestCase):
+    """Test cases for MessageScheduler."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+        self.queue = SendQueue()
+        self.scheduler = MessageScheduler(self.queue, batch_size=2, release_rate=0)
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.scheduler.stop())
+        self.queue.close()
+        self.loop.close()
+
+    def test_due_entries_released_in_order_and_batches(self):
+        """Only due entries are released, earliest first, at most one batch per call."""
+        now = time.time()
+        later = self.scheduler.schedule("/send-message", payload("+19998880003"), now + 3600)
+        second = self.scheduler.schedule("/send-message", payload("+19998880002"), now - 10)
+        first = self.scheduler.schedule("/send-message", payload("+19998880001"), now - 20)
+        third = self.scheduler.schedule("/send-message", payload("+19998880004"), now - 5)
+
+        self.assertEqual(self.scheduler.release_due(now), 2)
+        self.assertEqual(self.scheduler.get(first)["status"], "released")
+        self.assertEqual(self.scheduler.get(second)["status"], "released")
+        self.assertEqual(self.scheduler.get(third)["status"], "pending")
+        self.assertEqual(self.scheduler.release_due(now), 1)
+        self.assertEqual(self.scheduler.release_due(now), 0)
+        self.assertEqual(self.scheduler.get(later)["status"], "pending")
+
+        job = self.queue.get(self.scheduler.get(first)["job_id"])
+        self.assertEqual(job["payload"], payload("+19998880001"))
+        self.assertEqual(self.queue.counts(), {"queued": 3})
+
+    def test_cancelled_entry_never_released(self):
+        """A cancelled entry is skipped when it comes due and cannot be cancelled twice."""
+        schedule_id = self.scheduler.schedule("/send-message", payload("+19998880001"), time.time() - 1)
+
+        self.assertTrue(self.scheduler.cancel(schedule_id))
+        self.assertFalse(self.scheduler.cancel(schedule_id))
+        self.assertEqual(self.scheduler.release_due(), 0)
+        self.assertEqual(self.queue.counts(), {})
+
+    def test_timer_fires_and_pending_entries_reload(self):
+        """The timer releases entries when due, and pending ones survive a restart."""
+        async def scenario():
+            self.scheduler.start()
+            self.scheduler.schedule("/send-message", payload("+19998880001"), time.time() + 0.05)
+            await asyncio.sleep(0.2)
+
+        self.scheduler.schedule("/send-message", payload("+19998880002"), time.time() + 3600)
+        self.loop.run_until_complete(scenario())
+        self.assertEqual(self.queue.counts(), {"queued": 1})
+
+        restarted = MessageScheduler(self.queue)
+        self.assertEqual(restarted.load(), 1)
+
+    def test_in_memory_schedule_warns_at_startup(self):
+        """Starting on a queue without a data directory warns that scheduled sends will not survive a restart."""
+        with patch("src.storage.SENDBLUE_DATA_DIR", ""):
+            memory_queue = SendQueue()
+        self.addCleanup(memory_queue.close)
+        scheduler = MessageScheduler(memory_queue)
+
+        async def scenario():
+            scheduler.start()
+            await scheduler.stop()
+
+        with self.assertLogs("sendblue-mcp", level="WARNING") as logs:
+            self.loop.run_until_complete(scenario())
+        self.assertIn("scheduled sends will be lost", logs.output[0])
+        self.assertFalse(scheduler.snapshot()["persistent"])
+        self.assertTrue(self.scheduler.snapshot()["persistent"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+Unit tests for local full-text message search.
+"""
+import unittest
+import asyncio
+
+import httpx
+
+from src.client import open_http_client, close_http_client
+from src.records import MessageRecord
+from src.search import MessageSearchIndex, build_match, message_rowid
+from src.tools import get_message_history, search_messages
+from tests.test_config import TEST_PHONE_NUMBER, TEST_GROUP_ID
+from tests.state_helper import use_temp_data_dir, reset_state
+
+OTHER_NUMBER = "+19998886666"
+
+
+def make_message(uuid, content, date, number=TEST_PHONE_NUMBER, **fields):
+    message = {
+        "uuid": uuid,
+        "content": content,
+        "date": date,
+        "number": number,
+        "is_outbound": False,
+        "status": "RECEIVED"
+    }
+    message.update(fields)
+    return message
+
+
+MESSAGES = [
+    make_message("m1", "Where is my refund for order #1234?", "2024-01-01T10:00:00.000Z"),
+    make_message("m2", "Your refund was shipped today", "2024-01-02T10:00:00.000Z",
+                 is_outbound=True, status="DELIVERED"),
+    make_message("m3", "Refunds take five days", "2024-01-03T10:00:00.000Z", number=OTHER_NUMBER),
+    make_message("m4", "Group refund update", "2024-01-04T10:00:00.000Z", number=None, group_id=TEST_GROUP_ID)
+]
+
+
+class TestBuildMatch(unittest.TestCase):
+    """Test cases for turning user queries into FTS5 expressions."""
+
+    def test_terms_phrases_and_prefixes(self):
+        """Words and phrases are quoted, and a trailing * stays a prefix marker."""
+        self.assertEqual(build_match('refund "order 1234" ship*'), 'content : ("refund" "order 1234" "ship"*)')
+        self.assertEqual(build_match("A-17 #1234"), 'content : ("A-17" "#1234")')
+
+    def test_empty_query(self):
+        """A query with nothing to search for is rejected."""
+        with self.assertRaises(ValueError):
+            build_match(' "" * ')
+
+    def test_rowid_sorts_by_time(self):
+        """Row ids of later messages are larger, whatever their uuid."""
+        self.assertLess(message_rowid(1700000000.0, "zzz"), message_rowid(1700000000.001, "aaa"))
+
+
+class TestMessageSearchIndex(unittest.TestCase):
+    """Test cases for MessageSearchIndex."""
+
+    def setUp(self):
+        use_temp_data_dir(self)
+        self.index = MessageSearchIndex()
+        self.addCleanup(self.index.close)
+        self.index.add(MessageRecord.from_api(message) for message in MESSAGES)
+
+    def uuids(self, query, **kwargs):
+        results, _ = self.index.search(query, **kwargs)
+        return [record.uuid for record, _ in results]
+
+    def test_newest_first_with_snippet(self):
+        """Matches come newest first, with the matched words highlighted."""
+        results, has_more = self.index.search("refund")
+
+        self.assertEqual([record.uuid for record, _ in results], ["m4", "m2", "m1"])
+        self.assertIn("[refund]", results[0][1])
+        self.assertFalse(has_more)
+
+    def test_phrase_prefix_and_punctuation(self):
+        """Phrases must match in order, prefixes match longer words, and punctuation is not syntax."""
+        self.assertEqual(self.uuids('"refund was"'), ["m2"])
+        self.assertEqual(self.uuids("refund*"), ["m4", "m3", "m2", "m1"])
+        self.assertEqual(self.uuids("#1234"), ["m1"])
+
+    def test_filters(self):
+        """Contact, group, direction, status and date filters narrow the matches."""
+        self.assertEqual(self.uuids("refund*", number=OTHER_NUMBER), ["m3"])
+        self.assertEqual(self.uuids("refund", group_id=TEST_GROUP_ID), ["m4"])
+        self.assertEqual(self.uuids("refund", is_outbound=True), ["m2"])
+        self.assertEqual(self.uuids("refund", status="RECEIVED"), ["m4", "m1"])
+        since = MessageRecord.from_api(MESSAGES[1]).timestamp
+        until = MessageRecord.from_api(MESSAGES[3]).timestamp
+        self.assertEqual(self.uuids("refund*", since=since, until=until), ["m3", "m2"])
+
+    def test_paging(self):
+        """limit and offset page through the matches and has_more reports what is left."""
+        _, has_more = self.index.search("refund", limit=2)
+        self.assertTrue(has_more)
+        self.assertEqual(self.uuids("refund", limit=2, offset=2), ["m1"])
+
+    def test_upsert_and_status_update(self):
+        """Re-adding a message updates it in place, and status callbacks keep it searchable."""
+        edited = dict(MESSAGES[0], content="Where is my parcel?")
+        self.index.add([MessageRecord.from_api(edited)])
+        self.assertTrue(self.index.update_status(MessageRecord.from_api({"uuid": "m1", "status": "READ"})))
+        self.assertFalse(self.index.update_status(MessageRecord.from_api({"uuid": "missing", "status": "READ"})))
+
+        self.assertEqual(self.index.count(), len(MESSAGES))
+        self.assertEqual(self.uuids("refund"), ["m4", "m2"])
+        results, _ = self.index.search("parcel")
+        self.assertEqual(results[0][0].status, "READ")
+
+
+class TestSearchMessagesTool(unittest.TestCase):
+    """Test cases for the search_messages tool."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+
+        def server(request):
+            return httpx.Response(200, json={"messages": list(reversed(MESSAGES))})
+
+        self.loop.run_until_complete(open_http_client(transport=httpx.MockTransport(server)))
+
+    def tearDown(self):
+        self.loop.run_until_complete(close_http_client())
+        self.loop.run_until_complete(reset_state())
+        self.loop.close()
+
+    def test_history_is_indexed_and_searchable(self):
+        """Messages fetched by get_message_history can then be searched."""
+        self.loop.run_until_complete(get_message_history())
+        result = self.loop.run_until_complete(search_messages(
+            "refund",
+            contact_phone_number=TEST_PHONE_NUMBER,
+            from_date="2024-01-02T00:00:00Z"
+        ))
+
+        self.assertEqual([m["uuid"] for m in result["messages"]], ["m2"])
+        self.assertEqual(result["count"], 1)
+        self.assertIn("snippet", result["messages"][0])
+
+    def test_empty_query_is_an_error(self):
+        """A query with no searchable terms returns an error result."""
+        result = self.loop.run_until_complete(search_messages('""'))
+
+        self.assertEqual(result["status"], "ERROR")
+
+
+if __name__ == "__main__":
+    unittest.main()
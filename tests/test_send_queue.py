@@ -0,0 +1,143 @@
+"""
+Unit tests for the durable send queue.
+"""
+import unittest
+import asyncio
+import time
+from unittest.mock import patch
+
+import src.send_queue
+from src.client import SendblueAPIError
+from src.send_queue import SendQueue, SendQueueWorkers
+from src.tools import get_send_job, list_send_jobs
+from tests.state_helper import use_temp_data_dir, reset_state
+
+
+class RecordingRunner:
+    """Job runner recording each send; responses are looked up by recipient."""
+
+    def __init__(self, outcomes=None):
+        self.outcomes = outcomes or {}
+        self.sent = []
+
+    async def __call__(self, endpoint, payload):
+        self.sent.append(payload["number"])
+        outcome = self.outcomes.get(payload["number"])
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome or {"status": "QUEUED", "message_handle": f"handle-{payload['number']}"}
+
+
+class TestSendQueue(unittest.TestCase):
+    """Test cases for SendQueue and its workers."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+        self.queue = SendQueue()
+
+    def tearDown(self):
+        self.queue.close()
+        self.loop.close()
+
+    def drain(self, runner, seconds=0.1):
+        async def scenario():
+            workers = SendQueueWorkers(self.queue, runner, workers=2)
+            workers.start()
+            await asyncio.sleep(seconds)
+            await workers.stop(grace=1)
+        self.loop.run_until_complete(scenario())
+
+    def test_jobs_sent_once_with_outcome(self):
+        """Workers send every job once and record Sendblue's response or error."""
+        sent = self.queue.enqueue("/send-message", {"number": "+19998880001", "content": "Hi"})
+        failed = self.queue.enqueue("/send-message", {"number": "+19998880002", "content": "Hi"})
+        runner = RecordingRunner({
+            "+19998880002": SendblueAPIError("Sendblue API error: 400 - Invalid number", status_code=400)
+        })
+        self.drain(runner)
+
+        self.assertEqual(sorted(runner.sent), ["+19998880001", "+19998880002"])
+        job = self.queue.get(sent["id"])
+        self.assertEqual(job["status"], "sent")
+        self.assertEqual(job["message_handle"], "handle-+19998880001")
+        self.assertEqual(self.queue.get(failed["id"])["status"], "failed")
+
+    def test_open_circuit_defers_job(self):
+        """A job rejected by an open circuit goes back to the queue instead of failing."""
+        job = self.queue.enqueue("/send-message", {"number": "+19998880001", "content": "Hi"})
+        error = SendblueAPIError("Circuit open", retry_after=30, retryable=True, error_code="CIRCUIT_OPEN")
+        self.drain(RecordingRunner({"+19998880001": error}))
+
+        job = self.queue.get(job["id"])
+        self.assertEqual(job["status"], "queued")
+        self.assertGreater(job["available_at"], time.time() + 20)
+
+    def test_interrupted_job_marked_unknown_after_restart(self):
+        """A job left dispatching by a crash is marked unknown and never sent again."""
+        job = self.queue.enqueue("/send-message", {"number": "+19998880001", "content": "Hi"})
+        self.assertEqual(self.queue.claim()["id"], job["id"])
+        self.queue.close()
+
+        self.queue = SendQueue()
+        runner = RecordingRunner()
+        self.drain(runner)
+
+        self.assertEqual(runner.sent, [])
+        recovered = self.queue.get(job["id"])
+        self.assertEqual(recovered["status"], "unknown")
+        self.assertIn("may or may not", recovered["error"])
+
+    def test_future_jobs_wait(self):
+        """Jobs are not claimed before their available_at time."""
+        self.queue.enqueue("/send-message", {"number": "+19998880001", "content": "Hi"}, available_at=time.time() + 60)
+        self.assertIsNone(self.queue.claim())
+        self.assertEqual(self.queue.counts(), {"queued": 1})
+
+    def test_in_memory_queue_warns_at_startup(self):
+        """Workers started on a queue without a data directory warn that jobs will not survive a restart."""
+        self.assertTrue(self.queue.persistent)
+        with patch("src.storage.SENDBLUE_DATA_DIR", ""):
+            memory_queue = SendQueue()
+        self.addCleanup(memory_queue.close)
+        self.assertFalse(memory_queue.persistent)
+
+        async def scenario():
+            workers = SendQueueWorkers(memory_queue, RecordingRunner(), workers=1)
+            workers.start()
+            await workers.stop(grace=1)
+            return workers
+
+        with self.assertLogs("sendblue-mcp", level="WARNING") as logs:
+            workers = self.loop.run_until_complete(scenario())
+        self.assertIn("queued sends will be lost", logs.output[0])
+        self.assertFalse(workers.snapshot()["persistent"])
+
+
+class TestSendJobToolsWithoutQueue(unittest.TestCase):
+    """Test cases for the send job tools while the queue is disabled."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+
+    def tearDown(self):
+        self.loop.run_until_complete(reset_state())
+        self.loop.close()
+
+    @patch("src.tools.SENDBLUE_QUEUE_ENABLED", False)
+    def test_tools_report_disabled_queue(self):
+        """get_send_job and list_send_jobs return an error without opening the queue."""
+        job = self.loop.run_until_complete(get_send_job("0" * 32))
+        jobs = self.loop.run_until_complete(list_send_jobs())
+
+        self.assertEqual(job["status"], "ERROR")
+        self.assertIn("SENDBLUE_QUEUE_ENABLED", job["error_message"])
+        self.assertEqual(jobs["status"], "ERROR")
+        self.assertIsNone(src.send_queue._send_queue)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+"""
+Unit tests for sticky sender assignment across a pool of lines.
+"""
+import unittest
+import asyncio
+import json
+from unittest.mock import patch
+
+import httpx
+
+from src.circuit import circuit_breakers
+from src.client import open_http_client, close_http_client
+from src.lanes import send_lanes
+from src.retry import RetryPolicy
+from src.sender_pool import SenderPool, routing_key
+from src.tools import send_message
+from tests.state_helper import use_temp_data_dir, reset_state
+
+LINES = ["+15550000001", "+15550000002", "+15550000003"]
+RECIPIENTS = [f"+1999888{i:04d}" for i in range(200)]
+FAST_RETRIES = RetryPolicy(max_attempts=2, base_delay=0.001, max_delay=0.01, deadline=5.0)
+
+
+class TestSenderPool(unittest.TestCase):
+    """Test cases for SenderPool routing."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.run_until_complete(reset_state())
+        self.loop.close()
+
+    def test_routing_key(self):
+        """Sends are keyed by recipient, group ID or sorted group members."""
+        self.assertEqual(routing_key({"number": RECIPIENTS[0]}), RECIPIENTS[0])
+        self.assertEqual(routing_key({"group_id": "g1"}), "group:g1")
+        self.assertEqual(
+            routing_key({"numbers": [RECIPIENTS[1], RECIPIENTS[0]]}),
+            routing_key({"numbers": [RECIPIENTS[0], RECIPIENTS[1]]})
+        )
+        self.assertIsNone(routing_key({"content": "Hello"}))
+
+    def test_assignment_is_sticky_and_spread(self):
+        """A recipient always gets the same line, and every line gets a share."""
+        pool = SenderPool(LINES, virtual_nodes=64, max_failover=1)
+        first = {number: pool.route(number)[0] for number in RECIPIENTS}
+
+        self.assertEqual(first, {number: pool.route(number)[0] for number in RECIPIENTS})
+        self.assertEqual(set(first.values()), set(LINES))
+        self.assertEqual(len(pool.candidates(RECIPIENTS[0])), 2)
+        self.assertEqual(pool.failovers, 0)
+
+    def test_adding_a_line_only_moves_recipients_to_it(self):
+        """Recipients either keep their line or move to the new one."""
+        before = SenderPool(LINES[:2], virtual_nodes=64)
+        after = SenderPool(LINES, virtual_nodes=64)
+
+        moved = 0
+        for number in RECIPIENTS:
+            old, new = before.candidates(number)[0], after.candidates(number)[0]
+            if old != new:
+                self.assertEqual(new, LINES[2])
+                moved += 1
+        self.assertGreater(moved, 0)
+
+    def test_failed_line_fails_over_until_it_recovers(self):
+        """A cooling-down line is skipped for its failover line and used again after a success."""
+        pool = SenderPool(LINES, virtual_nodes=64, max_failover=1, cooldown=60)
+        primary, backup = pool.candidates(RECIPIENTS[0])
+
+        pool.record_failure(primary)
+        self.assertEqual(pool.route(RECIPIENTS[0]), [backup, primary])
+        self.assertEqual(pool.failovers, 1)
+        self.assertIn(primary, pool.snapshot()["cooling_down"])
+
+        pool.record_success(primary)
+        self.assertEqual(pool.route(RECIPIENTS[0])[0], primary)
+
+    def test_unavailable_when_saturated_or_circuit_open(self):
+        """Lines with a full lane or an open circuit are not available."""
+        pool = SenderPool(LINES, virtual_nodes=8, max_depth=1)
+        self.assertTrue(pool.available(LINES[0]))
+
+        async def hold():
+            return await send_lanes.acquire(LINES[0])
+
+        self.loop.run_until_complete(hold())
+        self.assertFalse(pool.available(LINES[0]))
+
+        breaker = circuit_breakers.get(f"line:{LINES[1]}")
+        for _ in range(breaker.min_requests):
+            breaker.record(failed=True, latency=None, probe=False)
+        self.assertFalse(pool.available(LINES[1]))
+
+    def test_no_available_line_keeps_primary(self):
+        """If every candidate is down the primary line is still tried first."""
+        pool = SenderPool(LINES, virtual_nodes=64, max_failover=2)
+        for line in LINES:
+            pool.record_failure(line)
+
+        self.assertEqual(pool.route(RECIPIENTS[0]), pool.candidates(RECIPIENTS[0]))
+        self.assertEqual(pool.failovers, 0)
+
+
+class LineServer:
+    """Answers /send-message, refusing connections for the lines listed as down."""
+
+    def __init__(self, down=(), rejected=()):
+        self.down = set(down)
+        self.rejected = set(rejected)
+        self.lines = []
+
+    def __call__(self, request):
+        line = json.loads(request.content)["from_number"]
+        self.lines.append(line)
+        if line in self.down:
+            raise httpx.ConnectError("Connection refused")
+        if line in self.rejected:
+            return httpx.Response(400, json={"error_message": "Invalid recipient"})
+        return httpx.Response(200, json={"status": "QUEUED", "from_number": line})
+
+
+class TestSendFailover(unittest.TestCase):
+    """Test cases for sender pool failover in send_message."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+        self.pool = SenderPool(LINES, virtual_nodes=64, max_failover=1, cooldown=60)
+        self.primary, self.backup = self.pool.candidates(RECIPIENTS[0])
+        for patcher in (
+            patch("src.tools.sender_pool", self.pool),
+            patch("src.client.default_retry_policy", FAST_RETRIES)
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.loop.run_until_complete(close_http_client())
+        self.loop.run_until_complete(reset_state())
+        self.loop.close()
+
+    def send(self, server):
+        self.loop.run_until_complete(open_http_client(transport=httpx.MockTransport(server)))
+        return self.loop.run_until_complete(send_message(to_number=RECIPIENTS[0], content="Hello"))
+
+    def test_unreachable_line_fails_over(self):
+        """A send the primary line never accepted is resent from the next line."""
+        server = LineServer(down={self.primary})
+        result = self.send(server)
+
+        self.assertEqual(result["status"], "QUEUED")
+        self.assertEqual(result["from_number"], self.backup)
+        self.assertEqual(server.lines[-1], self.backup)
+        self.assertIn(self.primary, self.pool.snapshot()["cooling_down"])
+
+    def test_rejected_message_does_not_fail_over(self):
+        """A request error is about the message, so no other line is tried or marked down."""
+        server = LineServer(rejected={self.primary})
+        result = self.send(server)
+
+        self.assertEqual(result["status"], "ERROR")
+        self.assertEqual(server.lines, [self.primary])
+        self.assertEqual(self.pool.snapshot()["cooling_down"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+"""
+Unit tests for local database storage.
+"""
+import os
+import tempfile
+import unittest
+
+from src.storage import database_path
+
+
+class TestDatabasePath(unittest.TestCase):
+    """Test cases for database_path."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_no_data_dir_keeps_memory(self):
+        """Without a data directory nothing is written to disk."""
+        self.assertEqual(database_path("lookup_cache.db", data_dir=""), ":memory:")
+
+    def test_data_dir_is_created(self):
+        """A configured data directory is created and holds the database file."""
+        data_dir = os.path.join(self.tmp.name, "state")
+        path = database_path("lookup_cache.db", data_dir=data_dir)
+
+        self.assertEqual(path, os.path.join(data_dir, "lookup_cache.db"))
+        self.assertTrue(os.path.isdir(data_dir))
+
+    def test_unusable_data_dir_falls_back_to_memory(self):
+        """A data directory that cannot be created falls back to memory."""
+        blocker = os.path.join(self.tmp.name, "file")
+        with open(blocker, "w") as f:
+            f.write("not a directory")
+
+        with self.assertLogs("sendblue-mcp", level="WARNING"):
+            path = database_path("lookup_cache.db", data_dir=os.path.join(blocker, "state"))
+        self.assertEqual(path, ":memory:")
+
+
+if __name__ == "__main__":
+    unittest.main()
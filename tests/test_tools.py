@@ -33,7 +33,9 @@ from tests.test_config import (
     MOCK_HTTP_ERROR_RESPONSE
 )
 
+from src.client import open_http_client, close_http_client
 from tests.mock_helper import configure_client_mock_success, configure_client_mock_error
+from tests.state_helper import use_temp_data_dir, reset_state
 
 
 class TestSendMessageTool(unittest.TestCase):
@@ -42,8 +44,10 @@ class TestSendMessageTool(unittest.TestCase):
     def setUp(self):
         self.loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
     
     def tearDown(self):
+        self.loop.run_until_complete(reset_state())
         self.loop.close()
     
     def test_send_message_success(self):
@@ -105,8 +109,10 @@ class TestSendGroupMessageTool(unittest.TestCase):
     def setUp(self):
         self.loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
     
     def tearDown(self):
+        self.loop.run_until_complete(reset_state())
         self.loop.close()
     
     def test_send_group_message_with_numbers_success(self):
@@ -166,8 +172,10 @@ class TestLookupNumberServiceTool(unittest.TestCase):
     def setUp(self):
         self.loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
     
     def tearDown(self):
+        self.loop.run_until_complete(reset_state())
         self.loop.close()
     
     def test_lookup_number_service_success(self):
@@ -182,7 +190,18 @@ class TestLookupNumberServiceTool(unittest.TestCase):
                 # Verify the response matches our expected mock data
                 self.assertEqual(result["number"], TEST_PHONE_NUMBER)
                 self.assertEqual(result["service"], "iMessage")
-    
+
+    def test_lookup_number_service_cached(self):
+        """Test that a repeat lookup is answered from the cache."""
+        with patch('src.tools.make_sendblue_api_request', return_value=MOCK_LOOKUP_NUMBER_RESPONSE) as mock_request:
+            first = self.loop.run_until_complete(lookup_number_service(phone_number=TEST_PHONE_NUMBER))
+            second = self.loop.run_until_complete(lookup_number_service(phone_number=TEST_PHONE_NUMBER))
+
+            self.assertFalse(first["cached"])
+            self.assertTrue(second["cached"])
+            self.assertEqual(second["service"], "iMessage")
+            self.assertEqual(mock_request.call_count, 1)
+
     def test_lookup_number_service_error(self):
         """Test error handling in lookup_number_service."""
         with configure_client_mock_error():
@@ -203,8 +222,10 @@ class TestSendTypingIndicatorTool(unittest.TestCase):
     def setUp(self):
         self.loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
     
     def tearDown(self):
+        self.loop.run_until_complete(reset_state())
         self.loop.close()
     
     def test_send_typing_indicator_success(self):
@@ -240,8 +261,10 @@ class TestGetMessageHistoryTool(unittest.TestCase):
     def setUp(self):
         self.loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
     
     def tearDown(self):
+        self.loop.run_until_complete(reset_state())
         self.loop.close()
     
     def test_get_message_history_success(self):
@@ -259,6 +282,32 @@ class TestGetMessageHistoryTool(unittest.TestCase):
                 self.assertEqual(result[0]["number"], TEST_PHONE_NUMBER)
                 self.assertEqual(result[0]["content"], "Test message 1")
     
+    def test_get_message_history_keeps_sendblue_fields(self):
+        """Messages are returned exactly as Sendblue sent them by default."""
+        with patch('src.tools.make_sendblue_api_request', return_value=MOCK_GET_MESSAGES_RESPONSE):
+            result = self.loop.run_until_complete(
+                get_message_history(contact_phone_number=TEST_PHONE_NUMBER)
+            )
+        
+        self.assertEqual(result, MOCK_GET_MESSAGES_RESPONSE["messages"])
+        self.assertEqual(list(result[0]), list(MOCK_GET_MESSAGES_RESPONSE["messages"][0]))
+    
+    def test_get_message_history_fields_use_normalized_names(self):
+        """The fields projection returns the normalized shape."""
+        with patch('src.tools.make_sendblue_api_request', return_value=MOCK_GET_MESSAGES_RESPONSE):
+            result = self.loop.run_until_complete(
+                get_message_history(
+                    contact_phone_number=TEST_PHONE_NUMBER,
+                    fields=["date", "timestamp", "message_type", "sendStyle"]
+                )
+            )
+        
+        self.assertEqual(result["messages"][0], {
+            "date": "2023-08-15T16:04:38.866Z",
+            "timestamp": 1692115478.866,
+            "message_type": "message"
+        })
+    
     def test_get_message_history_with_params(self):
         """Test get_message_history with additional parameters."""
         with configure_client_mock_success():
@@ -298,8 +347,10 @@ class TestAddRecipientToGroupTool(unittest.TestCase):
     def setUp(self):
         self.loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
     
     def tearDown(self):
+        self.loop.run_until_complete(reset_state())
         self.loop.close()
     
     def test_add_recipient_to_group_success(self):
@@ -342,8 +393,10 @@ class TestUploadMediaForSendingTool(unittest.TestCase):
     def setUp(self):
         self.loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
     
     def tearDown(self):
+        self.loop.run_until_complete(reset_state())
         self.loop.close()
     
     def test_upload_media_for_sending_success(self):
@@ -374,5 +427,36 @@ class TestUploadMediaForSendingTool(unittest.TestCase):
                 self.assertTrue("error_message" in result)
 
 
+
+class TestUnexpectedClientErrors(unittest.TestCase):
+    """Errors raised outside the HTTP exchange still become tool error results."""
+    
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+    
+    def tearDown(self):
+        self.loop.run_until_complete(close_http_client())
+        self.loop.run_until_complete(reset_state())
+        self.loop.close()
+    
+    def test_missing_credentials_return_error_result(self):
+        """A header httpx rejects (unset credentials) is reported, not raised."""
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json=MOCK_SEND_MESSAGE_RESPONSE))
+        self.loop.run_until_complete(open_http_client(transport=transport))
+        with patch('src.client.SENDBLUE_API_KEY_ID', None):
+            result = self.loop.run_until_complete(
+                send_message(
+                    to_number=TEST_PHONE_NUMBER,
+                    content=TEST_MESSAGE_CONTENT
+                )
+            )
+        
+        self.assertEqual(result["status"], "ERROR")
+        self.assertIn("Error communicating with Sendblue API", result["error_message"])
+        self.assertFalse(result["retryable"])
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Unit tests for typing indicator debouncing.
+"""
+import unittest
+import asyncio
+
+import httpx
+
+from src.typing_indicators import TypingDebouncer
+from tests.test_config import TEST_PHONE_NUMBER
+
+
+class CountingSender:
+    """Records every typing indicator request instead of calling Sendblue."""
+
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+
+    async def __call__(self, number, stats=None):
+        self.calls += 1
+        if self.fail:
+            raise httpx.HTTPError("Mock HTTP Error")
+        return {"number": number, "status": "SENT"}
+
+
+class TestTypingDebouncer(unittest.TestCase):
+    """Test cases for TypingDebouncer."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.debouncer = TypingDebouncer(
+            enabled=True,
+            window=0.2,
+            refresh_interval=0.05,
+            active_for=0.15,
+            suppress_after_send=0.2
+        )
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.debouncer.close())
+        self.loop.close()
+
+    def test_single_call_sends_one_request(self):
+        """One call makes exactly one POST, with no background refresh."""
+        send = CountingSender()
+        result = self.loop.run_until_complete(self.debouncer.request(TEST_PHONE_NUMBER, send))
+        self.loop.run_until_complete(asyncio.sleep(0.3))
+
+        self.assertEqual(result["status"], "SENT")
+        self.assertEqual(send.calls, 1)
+        self.assertEqual(self.debouncer.snapshot()["refreshed"], 0)
+
+    def test_repeat_call_is_coalesced_and_refreshed(self):
+        """A second call while active is coalesced and keeps the indicator alive."""
+        send = CountingSender()
+
+        async def scenario():
+            await self.debouncer.request(TEST_PHONE_NUMBER, send)
+            second = await self.debouncer.request(TEST_PHONE_NUMBER, send)
+            await asyncio.sleep(0.3)
+            return second
+
+        second = self.loop.run_until_complete(scenario())
+
+        self.assertEqual(second["status"], "COALESCED")
+        self.assertGreater(send.calls, 1)
+        # Refreshing stops once no call has been seen for the active period
+        calls = send.calls
+        self.loop.run_until_complete(asyncio.sleep(0.2))
+        self.assertEqual(send.calls, calls)
+
+    def test_message_sent_suppresses_and_stops_refresh(self):
+        """Calls right after a send are dropped and the refresh stops."""
+        send = CountingSender()
+
+        async def scenario():
+            await self.debouncer.request(TEST_PHONE_NUMBER, send)
+            await self.debouncer.request(TEST_PHONE_NUMBER, send)
+            self.debouncer.message_sent(TEST_PHONE_NUMBER)
+            result = await self.debouncer.request(TEST_PHONE_NUMBER, send)
+            await asyncio.sleep(0.15)
+            return result
+
+        result = self.loop.run_until_complete(scenario())
+
+        self.assertEqual(result["status"], "SUPPRESSED")
+        self.assertEqual(send.calls, 1)
+
+    def test_failed_request_is_not_debounced(self):
+        """After a failed request the next call tries again immediately."""
+        send = CountingSender(fail=True)
+        with self.assertRaises(httpx.HTTPError):
+            self.loop.run_until_complete(self.debouncer.request(TEST_PHONE_NUMBER, send))
+        send.fail = False
+        result = self.loop.run_until_complete(self.debouncer.request(TEST_PHONE_NUMBER, send))
+
+        self.assertEqual(result["status"], "SENT")
+        self.assertEqual(send.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
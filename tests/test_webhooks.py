@@ -0,0 +1,169 @@
+"""
+Unit tests for the webhook receiver, inbound buffer and wait_for_reply.
+"""
+import unittest
+import asyncio
+import time
+from unittest.mock import patch, PropertyMock
+
+import httpx
+
+from src.config import SENDBLUE_WEBHOOK_PATH
+from src.inbound import InboundBuffer
+from src.records import MessageRecord
+from src.tools import wait_for_reply
+from src.webhooks import WebhookReceiver, create_webhook_app
+from tests.state_helper import use_temp_data_dir, reset_state
+from tests.test_config import TEST_PHONE_NUMBER, TEST_GROUP_ID
+
+
+def inbound(uuid, number=TEST_PHONE_NUMBER, group_id=None, is_outbound=False, sent_at=None):
+    """Build an inbound webhook payload."""
+    return {
+        "message_handle": uuid,
+        "number": number,
+        "content": f"Reply {uuid}",
+        "is_outbound": is_outbound,
+        "status": "RECEIVED",
+        "group_id": group_id,
+        "date_sent": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(sent_at or time.time()))
+    }
+
+
+class TestInboundBuffer(unittest.TestCase):
+    """Test cases for InboundBuffer."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.buffer = InboundBuffer(capacity=3)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_waiter_woken_by_matching_message(self):
+        """wait() returns as soon as a message for the contact is added."""
+        async def scenario():
+            waiter = asyncio.ensure_future(self.buffer.wait(number=TEST_PHONE_NUMBER, timeout=5))
+            await asyncio.sleep(0.01)
+            self.buffer.add(MessageRecord.from_api(inbound("other", number="+15555550100")))
+            self.buffer.add(MessageRecord.from_api(inbound("m1")))
+            return await waiter
+
+        entries = self.loop.run_until_complete(scenario())
+        self.assertEqual([entry[2].key for entry in entries], ["m1"])
+        self.assertEqual(self.buffer.snapshot()["waiting"], 0)
+
+    def test_since_returns_buffered_messages(self):
+        """With since, replies received before the call are returned immediately."""
+        self.buffer.add(MessageRecord.from_api(inbound("old", sent_at=time.time() - 120)))
+        self.buffer.add(MessageRecord.from_api(inbound("new")))
+        self.buffer.add(MessageRecord.from_api(inbound("mine", is_outbound=True)))
+
+        entries = self.loop.run_until_complete(
+            self.buffer.wait(number=TEST_PHONE_NUMBER, since=time.time() - 60, timeout=0.1)
+        )
+        self.assertEqual([entry[2].key for entry in entries], ["new"])
+
+    def test_timeout_and_redelivery(self):
+        """Nothing arriving times out; redelivered webhooks and evicted messages are handled."""
+        entries = self.loop.run_until_complete(self.buffer.wait(group_id=TEST_GROUP_ID, timeout=0.05))
+        self.assertEqual(entries, [])
+
+        self.assertTrue(self.buffer.add(MessageRecord.from_api(inbound("m1"))))
+        self.assertFalse(self.buffer.add(MessageRecord.from_api(inbound("m1"))))
+        for uuid in ("m2", "m3", "m4"):
+            self.buffer.add(MessageRecord.from_api(inbound(uuid)))
+        self.assertEqual(self.buffer.snapshot()["buffered"], 3)
+        self.assertEqual(self.buffer.snapshot()["duplicates"], 1)
+
+
+class TestWebhookApp(unittest.TestCase):
+    """Test cases for the webhook routes."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        use_temp_data_dir(self)
+        self.buffer = InboundBuffer()
+        patcher = patch("src.webhooks.inbound_buffer", self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.loop.run_until_complete(reset_state())
+        self.loop.close()
+
+    def post(self, path, **kwargs):
+        async def request():
+            transport = httpx.ASGITransport(app=create_webhook_app())
+            async with httpx.AsyncClient(transport=transport, base_url="http://webhook") as client:
+                return await client.post(path, **kwargs)
+        return self.loop.run_until_complete(request())
+
+    def test_inbound_message_is_buffered(self):
+        """A posted message is acknowledged and buffered once, even if redelivered."""
+        self.assertEqual(self.post(SENDBLUE_WEBHOOK_PATH, json=inbound("m1")).json(), {"status": "OK"})
+        self.post(SENDBLUE_WEBHOOK_PATH, json=inbound("m1"))
+
+        self.assertEqual(self.buffer.snapshot()["received"], 1)
+        self.assertEqual(self.buffer.snapshot()["duplicates"], 1)
+
+    def test_rejects_bad_payloads(self):
+        """Invalid JSON and non-object bodies get a 400."""
+        self.assertEqual(self.post(SENDBLUE_WEBHOOK_PATH, content=b"{not json").status_code, 400)
+        self.assertEqual(self.post(SENDBLUE_WEBHOOK_PATH, json=[1, 2]).status_code, 400)
+
+    @patch("src.webhooks.SENDBLUE_WEBHOOK_SECRET", "s3cret")
+    def test_secret_required_when_configured(self):
+        """With a secret configured, requests without it are rejected."""
+        self.assertEqual(self.post(SENDBLUE_WEBHOOK_PATH, json=inbound("m1")).status_code, 401)
+        self.assertEqual(self.post(SENDBLUE_WEBHOOK_PATH + "?secret=s3cret", json=inbound("m1")).status_code, 200)
+
+
+class TestWaitForReplyTool(unittest.TestCase):
+    """Test cases for the wait_for_reply tool."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.buffer = InboundBuffer()
+        for patcher in (
+            patch("src.tools.inbound_buffer", self.buffer),
+            patch("src.tools.SENDBLUE_WEBHOOK_ENABLED", True),
+            patch.object(WebhookReceiver, "running", new_callable=PropertyMock, return_value=True)
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_reply_returned(self):
+        """A reply posted while waiting is returned with its receive time."""
+        async def scenario():
+            waiting = asyncio.ensure_future(wait_for_reply(phone_number=TEST_PHONE_NUMBER, timeout_seconds=5))
+            await asyncio.sleep(0.01)
+            self.buffer.add(MessageRecord.from_api(inbound("m1")))
+            return await waiting
+
+        result = self.loop.run_until_complete(scenario())
+        self.assertEqual(result["status"], "REPLIED")
+        self.assertEqual(result["messages"][0]["message_handle"], "m1")
+        self.assertIn("received_at", result["messages"][0])
+
+    def test_timeout(self):
+        """Without a reply the tool reports TIMEOUT."""
+        result = self.loop.run_until_complete(wait_for_reply(phone_number=TEST_PHONE_NUMBER, timeout_seconds=0.05))
+        self.assertEqual(result["status"], "TIMEOUT")
+
+    def test_disabled_receiver(self):
+        """With the receiver disabled the tool explains how to enable it."""
+        with patch("src.tools.SENDBLUE_WEBHOOK_ENABLED", False):
+            result = self.loop.run_until_complete(wait_for_reply(phone_number=TEST_PHONE_NUMBER))
+        self.assertEqual(result["status"], "ERROR")
+        self.assertIn("SENDBLUE_WEBHOOK_ENABLED", result["error_message"])
+
+
+if __name__ == "__main__":
+    unittest.main()